@@ -7,29 +7,36 @@ multiple configurations (development, production, testing).
 
 Architecture Overview:
 - Flask backend serves both the REST API and static frontend assets
-- SQLAlchemy ORM for database operations (PostgreSQL in production)
+- SQLAlchemy ORM for database operations (PostgreSQL in production; SQLite
+  works as a local stand-in via app/sql.py)
 - CORS enabled for API endpoints to support frontend development
 - Blueprints organize routes by domain (dashboard, revenue, customers, etc.)
 
 Key Components:
 - /api/* routes: RESTful API endpoints for dashboard data
 - Static file serving: Built React frontend served in production
-- Database: Auto-creates tables on startup if they don't exist
+- Database: Schema is created explicitly with `flask --app run init-db`; the
+  factory never connects to the database, so gunicorn --preload is safe
+
+Startup is kept cheap for autoscaled workers: heavy libraries (NumPy) are
+imported on first use, and a per-phase timing breakdown is logged.
 """
 
 import os
-from flask import Flask, send_from_directory
+import time
+from flask import Flask, abort
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .config import config
+from . import sql  # noqa: F401  registers portable SQL functions (date_trunc on SQLite)
 
 # Global SQLAlchemy instance - initialized with app in create_app()
 db = SQLAlchemy()
 
 
-def create_app(config_name: str = None) -> Flask:
+def create_app(config_name: str = None, overrides: dict = None) -> Flask:
     """
     Application factory for creating Flask app instances.
 
@@ -40,6 +47,8 @@ def create_app(config_name: str = None) -> Flask:
     Args:
         config_name: Configuration to use ('development', 'production', 'testing').
                     Defaults to FLASK_ENV environment variable or 'development'.
+        overrides: Settings applied on top of the configuration class, e.g. a
+                   throwaway database for `flask check-query-budgets`.
 
     Returns:
         Configured Flask application instance ready to serve requests.
@@ -51,28 +60,105 @@ def create_app(config_name: str = None) -> Flask:
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
 
+    timings = {}
+    started = phase_started = time.perf_counter()
+
+    def mark(phase):
+        nonlocal phase_started
+        now = time.perf_counter()
+        timings[phase] = round((now - phase_started) * 1000, 1)
+        phase_started = now
+
     # Check if we have a built frontend to serve
     static_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
     has_static = os.path.exists(static_folder)
 
     app = Flask(__name__, static_folder=static_folder if has_static else None)
     app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
+
+    # Fast JSON encoding with native Decimal/date/NumPy support and ?format=columnar
+    from .serialization import AnalyticsJSONProvider
+    app.json = AnalyticsJSONProvider(app, app.config['JSON_PROVIDER'])
 
     # Trust proxy headers (Railway, Heroku, etc.) for proper HTTPS handling
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
+    mark('config')
+
+    # Size the connection pool from worker/thread counts before the engine is created
+    from . import pool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = pool.build_engine_options(app.config)
 
     # Initialize extensions
     db.init_app(app)
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    pool.init_app(app)
+
+    # Registered first so it runs after every other after_request hook
+    from . import compression
+    compression.init_app(app)
+
+    # Per-route concurrency limits; saturated cost classes shed load with 503
+    from . import admission
+    admission.init_app(app)
+
+    CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": ["X-Data-Version", "X-Total-Points", "X-Series-Totals"]}})
+    mark('extensions')
 
     # Register blueprints
-    from .routes import dashboard, revenue, customers, operations, forecasting
+    from .routes import dashboard, revenue, customers, operations, forecasting, admin, ingest, stream
 
     app.register_blueprint(dashboard.bp)
     app.register_blueprint(revenue.bp)
     app.register_blueprint(customers.bp)
     app.register_blueprint(operations.bp)
     app.register_blueprint(forecasting.bp)
+    app.register_blueprint(admin.bp)
+    app.register_blueprint(ingest.bp)
+    app.register_blueprint(stream.bp)
+
+    # Identical concurrent API requests share one computation, and results are
+    # cached per data version (wrapped in this order: cache -> single-flight ->
+    # query budget counting -> memory accounting -> view)
+    from . import memprofile, querybudget, singleflight, cache, warmer, streams, deltas, downsample
+    memprofile.init_app(app)
+    querybudget.init_app(app)
+    singleflight.init_app(app)
+    cache.init_app(app)
+    warmer.init_app(app)
+
+    # Live KPI updates pushed to open dashboards when the data version changes,
+    # X-Data-Version / since_version deltas and max_points downsampling for
+    # the long time series
+    streams.init_app(app)
+    deltas.init_app(app)
+    downsample.init_app(app)
+
+    # Registered last so a ?profile=1 report replaces the response before the
+    # other after_request hooks (compression, cache headers) see it
+    from . import profiling
+    profiling.init_app(app)
+    mark('blueprints')
+
+    # A fanned-out query that exceeds its timeout is reported as a gateway timeout
+    from .parallel import QueryTimeoutError
+
+    @app.errorhandler(QueryTimeoutError)
+    def handle_query_timeout(e):
+        return {'status': 'error', 'message': str(e)}, 504
+
+    # Malformed start_date/end_date or dimension filters are a client error
+    from .filters import InvalidFilterError
+
+    @app.errorhandler(InvalidFilterError)
+    def handle_invalid_filter(e):
+        return {'status': 'error', 'message': str(e)}, 400
+
+    # Invalid ingest lines are reported with their line numbers
+    from .ingest import IngestError
+
+    @app.errorhandler(IngestError)
+    def handle_ingest_error(e):
+        return {'status': 'error', 'message': str(e), 'errors': e.errors}, 400
 
     # Health check endpoint
     @app.route('/api/health')
@@ -85,29 +171,47 @@ def create_app(config_name: str = None) -> Flask:
         try:
             from data.seed_data import seed_database as run_seed
             run_seed()
+            # Pick up the new data version now (and start re-warming) rather than
+            # after the next version check
+            app.extensions['result_cache'].data_version(force=True)
             return {'status': 'success', 'message': 'Database seeded successfully'}
         except Exception as e:
             import traceback
             return {'status': 'error', 'message': str(e), 'trace': traceback.format_exc()}, 500
 
-    # Serve frontend static files in production
+    # Serve frontend static files in production. The manifest is built once
+    # here so requests never have to stat the filesystem.
     if has_static:
+        from .assets import AssetManifest, send_asset
+        manifest = AssetManifest(static_folder)
+        app.extensions['asset_manifest'] = manifest
+
         @app.route('/')
         def serve_index():
-            return send_from_directory(static_folder, 'index.html')
+            return send_asset(manifest.get('index.html'), app.config)
 
         @app.route('/<path:path>')
         def serve_static(path):
-            # Try to serve the file, fall back to index.html for SPA routing
-            if os.path.exists(os.path.join(static_folder, path)):
-                return send_from_directory(static_folder, path)
-            return send_from_directory(static_folder, 'index.html')
-
-    # Create tables (skip if they already exist)
-    with app.app_context():
-        try:
-            db.create_all()
-        except Exception:
-            pass  # Tables already exist
+            asset = manifest.get(path)
+            if asset is not None:
+                return send_asset(asset, app.config)
+            # Missing hashed bundles are a real 404 - never answer them with HTML
+            if path.startswith('assets/'):
+                abort(404)
+            # Fall back to index.html for SPA routing
+            return send_asset(manifest.get('index.html'), app.config)
+
+    # CLI commands (flask --app run init-db, ...)
+    from . import cli
+    cli.init_app(app)
+    mark('routes')
+
+    timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+    app.extensions['startup_timings'] = timings
+    app.logger.info(
+        'App created in %.1fms (%s)',
+        timings['total'],
+        ', '.join(f'{phase}={ms}ms' for phase, ms in timings.items() if phase != 'total'),
+    )
 
     return app
@@ -0,0 +1,163 @@
+"""
+Admission Control and Load Shedding
+
+Under a burst (everyone opening the dashboard at 9am) heavy analytical routes
+queue behind each other and starve cheap ones. Each API route is assigned a
+cost class with its own concurrency limit and bounded wait queue:
+
+- interactive: KPI cards and summaries - generous limits, must stay fast
+- standard: ordinary breakdowns and lists (the default)
+- heavy: long time series, cohorts and forecasts - few at a time
+
+A request that finds its class saturated waits in the class queue for up to
+the class's `wait` seconds. If the queue is full or the wait expires, it is
+shed immediately with `503 Service Unavailable` and a `Retry-After` header
+instead of tying up a worker thread.
+
+Classes, limits and route assignments live in app/config.py (ADMISSION_*).
+Limits apply per worker process.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request
+
+
+class CostClass:
+    """A concurrency limit with a bounded wait queue."""
+
+    def __init__(self, name: str, limit: int, queue: int, wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.wait = wait
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting up to `wait` seconds. Returns False when shed."""
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                self.admitted += 1
+                return True
+
+            if self.waiting >= self.queue:
+                self.rejected += 1
+                return False
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.wait
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'queue': self.queue,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
+
+
+class AdmissionController:
+    """Classifies API requests and admits or sheds them per cost class."""
+
+    def __init__(self, config):
+        self.classes = {
+            name: CostClass(name, spec['limit'], spec['queue'], spec['wait'])
+            for name, spec in config['ADMISSION_CLASSES'].items()
+        }
+        self.routes = config['ADMISSION_ROUTES']
+        self.default_class = config['ADMISSION_DEFAULT_CLASS']
+        self.exempt = set(config['ADMISSION_EXEMPT'])
+        self.heavy_range_days = config['ADMISSION_HEAVY_RANGE_DAYS']
+        self.retry_after = config['ADMISSION_RETRY_AFTER']
+
+    def classify(self, endpoint: str, args) -> str:
+        """Return the cost class name for a request, or None if exempt."""
+        if endpoint is None or endpoint in self.exempt:
+            return None
+        if endpoint.split('.', 1)[0] in self.exempt:
+            return None
+
+        cost_class = self.routes.get(endpoint, self.default_class)
+
+        # Long date ranges make an otherwise ordinary route expensive
+        if cost_class == self.default_class and self._range_days(args) > self.heavy_range_days:
+            cost_class = 'heavy'
+        return cost_class
+
+    @staticmethod
+    def _range_days(args) -> int:
+        start_date = args.get('start_date')
+        if not start_date:
+            return 0
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date = args.get('end_date')
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else datetime.now().date()
+        except ValueError:
+            return 0
+        return (end - start).days
+
+    def snapshot(self) -> dict:
+        return {name: cost_class.snapshot() for name, cost_class in self.classes.items()}
+
+
+def init_app(app):
+    """Install admission control hooks on the app."""
+    controller = AdmissionController(app.config)
+    app.extensions['admission'] = controller
+
+    if not app.config.get('ADMISSION_CONTROL_ENABLED', True):
+        return
+
+    @app.before_request
+    def admit_request():
+        if not request.path.startswith('/api/'):
+            return None
+
+        name = controller.classify(request.endpoint, request.args)
+        if name is None:
+            return None
+
+        cost_class = controller.classes[name]
+        if not cost_class.acquire():
+            return (
+                {'status': 'error', 'message': f'Server busy ({name} requests saturated), retry shortly'},
+                503,
+                {'Retry-After': str(controller.retry_after)},
+            )
+        g.admission_class = cost_class
+        return None
+
+    @app.teardown_request
+    def release_admission(exc):
+        cost_class = g.pop('admission_class', None)
+        if cost_class is not None:
+            cost_class.release()
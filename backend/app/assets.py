@@ -0,0 +1,175 @@
+"""
+Static Asset Serving
+
+Serves the built React frontend from backend/static with:
+
+- An asset manifest built once at startup, so requests never stat the disk
+  to decide between a file and the SPA fallback.
+- Precompressed variants: `name.br` / `name.gz` written next to each file by
+  `flask --app run compress-assets` (run at image build time) are chosen by
+  the request's Accept-Encoding. When no variant exists on disk, a gzip (and
+  brotli, if the `brotli` package is installed) copy is generated in memory
+  on first request and reused.
+- Cache headers: Vite content-hashes everything under assets/, so those are
+  `immutable` for a year; index.html is always revalidated (cheap 304s) so a
+  deploy is picked up immediately.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from io import BytesIO
+
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # optional - gzip only
+    brotli = None
+
+# Vite output names: assets/<name>-<8+ char content hash>.<ext>
+HASHED_ASSET_RE = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt'}
+VARIANT_EXTENSIONS = {'.br': 'br', '.gz': 'gzip'}
+COMPRESS_MIN_SIZE = 1024
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+
+class Asset:
+    """A servable file and its precompressed variants."""
+
+    def __init__(self, rel_path: str, abs_path: str):
+        stat = os.stat(abs_path)
+        self.rel_path = rel_path
+        self.abs_path = abs_path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+        self.etag = hashlib.md5(f'{rel_path}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()
+        self.hashed = bool(HASHED_ASSET_RE.match(rel_path))
+        self.compressible = (
+            os.path.splitext(rel_path)[1] in COMPRESSIBLE_EXTENSIONS and self.size >= COMPRESS_MIN_SIZE
+        )
+        self.variants = {}      # encoding -> path of precompressed file on disk
+        self._generated = {}    # encoding -> bytes compressed on first request
+        self._lock = threading.Lock()
+
+    def generated(self, encoding: str):
+        """Compress the file in memory once and cache the result."""
+        if encoding not in self._generated:
+            with self._lock:
+                if encoding not in self._generated:
+                    with open(self.abs_path, 'rb') as f:
+                        raw = f.read()
+                    self._generated[encoding] = compress_bytes(raw, encoding)
+        return self._generated[encoding]
+
+
+def compress_bytes(raw: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(raw, quality=11)
+    return gzip.compress(raw, compresslevel=9, mtime=0)
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class AssetManifest:
+    """Index of every file under the static folder, built once."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.assets = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                abs_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(abs_path, root).replace(os.sep, '/')
+                if os.path.splitext(rel_path)[1] in VARIANT_EXTENSIONS:
+                    continue
+                self.assets[rel_path] = Asset(rel_path, abs_path)
+
+        # Attach precompressed variants to the files they belong to
+        for rel_path, asset in self.assets.items():
+            for ext, encoding in VARIANT_EXTENSIONS.items():
+                variant_path = asset.abs_path + ext
+                if os.path.exists(variant_path):
+                    asset.variants[encoding] = variant_path
+
+    def get(self, rel_path: str):
+        return self.assets.get(rel_path)
+
+
+def _negotiate(asset: Asset):
+    """Pick the best encoding the client accepts and we can provide."""
+    if not asset.compressible:
+        return None
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if not accepted[encoding]:
+            continue
+        if encoding in asset.variants or encoding in available_encodings():
+            return encoding
+    return None
+
+
+def _cache_control(asset: Asset, config) -> str:
+    if asset.hashed:
+        return IMMUTABLE_CACHE
+    if asset.rel_path == 'index.html':
+        return f"public, max-age={config['STATIC_INDEX_MAX_AGE']}, must-revalidate"
+    return f"public, max-age={config['STATIC_DEFAULT_MAX_AGE']}"
+
+
+def send_asset(asset: Asset, config):
+    """Build the response for an asset, compressed when the client allows it."""
+    encoding = _negotiate(asset)
+    etag = f'{asset.etag}-{encoding}' if encoding else asset.etag
+
+    if encoding is None:
+        response = send_file(
+            asset.abs_path, mimetype=asset.mimetype, etag=etag,
+            last_modified=asset.mtime, conditional=True,
+        )
+    elif encoding in asset.variants:
+        response = send_file(
+            asset.variants[encoding], mimetype=asset.mimetype, etag=etag,
+            last_modified=asset.mtime, conditional=True,
+        )
+    else:
+        response = send_file(
+            BytesIO(asset.generated(encoding)), mimetype=asset.mimetype, etag=etag,
+            last_modified=asset.mtime, conditional=True,
+        )
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if asset.compressible:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = _cache_control(asset, config)
+    return response
+
+
+def write_precompressed(manifest: AssetManifest):
+    """Write .gz (and .br) variants next to every compressible asset. Returns paths written."""
+    written = []
+    for asset in manifest.assets.values():
+        if not asset.compressible:
+            continue
+        with open(asset.abs_path, 'rb') as f:
+            raw = f.read()
+        for encoding in available_encodings():
+            ext = '.br' if encoding == 'br' else '.gz'
+            compressed = compress_bytes(raw, encoding)
+            # Skip variants that don't actually save anything
+            if len(compressed) >= len(raw):
+                continue
+            with open(asset.abs_path + ext, 'wb') as f:
+                f.write(compressed)
+            written.append(asset.rel_path + ext)
+    return written
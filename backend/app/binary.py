@@ -0,0 +1,151 @@
+"""
+Binary Typed-Column Response Format
+
+For long time series and exports, even columnar JSON is wasteful: every
+number is text the browser has to parse. Endpoints marked with
+@binary_format answer `Accept: application/vnd.analytics.columns` with typed
+column buffers the frontend reads directly into typed arrays
+(see `fetchBinaryRows` in frontend/src/services/api.ts).
+
+Layout (all integers little-endian):
+
+    magic     4 bytes   b'ACOL'
+    version   uint8     1
+    reserved  3 bytes
+    hdr_len   uint32    length of the JSON header in bytes
+    reserved  4 bytes   (keeps the header and buffers 8-byte aligned)
+    header    hdr_len bytes of UTF-8 JSON, zero-padded to a multiple of 8
+    buffers   column buffers, each starting on an 8-byte boundary
+
+The header is {"rows": n, "columns": [...]} with one entry per column:
+
+    {"name": ..., "type": ..., "offset": ..., "length": ...}
+
+`offset` is measured from the start of the body. Column types:
+
+    f64     Float64Array, null = NaN (also used for ints outside int32/with nulls)
+    i32     Int32Array, no nulls
+    date32  Int32Array of days since 1970-01-01 for 'YYYY-MM-DD' strings,
+            null = -2147483648
+    dict    Int32Array of indexes into the column's "dictionary" list of
+            strings, null = -1
+    json    no buffer; the column's values are stored in the header's "values"
+"""
+
+import datetime
+import json
+import re
+import struct
+import sys
+from array import array
+
+MIMETYPE = 'application/vnd.analytics.columns'
+MAGIC = b'ACOL'
+VERSION = 1
+PREFIX_SIZE = 16
+
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def binary_format(view):
+    """Mark a list-returning view as able to answer with the binary column format."""
+    view.binary_format = True
+    return view
+
+
+def _pack(typecode: str, values) -> bytes:
+    buffer = array(typecode, values)
+    if sys.byteorder != 'little':
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def _infer_type(values) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return 'json'
+    if any(isinstance(v, bool) for v in present):
+        return 'json'
+    if all(isinstance(v, int) for v in present):
+        if len(present) == len(values) and all(INT32_MIN <= v <= INT32_MAX for v in present):
+            return 'i32'
+        return 'f64'
+    if all(isinstance(v, (int, float)) for v in present):
+        return 'f64'
+    if all(isinstance(v, str) for v in present):
+        if all(DATE_RE.match(v) for v in present):
+            return 'date32'
+        return 'dict'
+    return 'json'
+
+
+def _encode_column(values, column_type: str, column: dict) -> bytes:
+    if column_type == 'f64':
+        return _pack('d', (float('nan') if v is None else float(v) for v in values))
+    if column_type == 'i32':
+        return _pack('i', values)
+    if column_type == 'date32':
+        return _pack('i', (
+            INT32_MIN if v is None else datetime.date.fromisoformat(v).toordinal() - EPOCH_ORDINAL
+            for v in values
+        ))
+    if column_type == 'dict':
+        dictionary = {}
+        indexes = []
+        for v in values:
+            if v is None:
+                indexes.append(-1)
+            else:
+                indexes.append(dictionary.setdefault(v, len(dictionary)))
+        column['dictionary'] = list(dictionary)
+        return _pack('i', indexes)
+    column['values'] = list(values)
+    return b''
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b'\0' * (-len(data) % 8)
+
+
+def encode_rows(rows: list, default=None) -> bytes:
+    """Encode a list of dicts as a typed-column body."""
+    names = {}
+    for row in rows:
+        for key in row:
+            names.setdefault(key, None)
+
+    columns, buffers = [], []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        column_type = _infer_type(values)
+        column = {'name': name, 'type': column_type}
+        buffers.append(_encode_column(values, column_type, column))
+        columns.append(column)
+
+    # Offsets depend on the header length, and the header contains the
+    # offsets - lay buffers out after a provisional header, then re-encode
+    # until the padded header length is stable (at most a couple of passes).
+    header_size = 0
+    while True:
+        offset = PREFIX_SIZE + header_size
+        for column, buffer in zip(columns, buffers):
+            column['offset'] = offset
+            column['length'] = len(buffer)
+            offset += len(_pad(buffer))
+        header = _pad(json.dumps(
+            {'rows': len(rows), 'columns': columns}, default=default, separators=(',', ':'),
+        ).encode())
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    prefix = MAGIC + struct.pack('<B3xI4x', VERSION, len(header))
+    return prefix + header + b''.join(_pad(buffer) for buffer in buffers)
+
+
+def prefers_binary(request) -> bool:
+    """True when the client explicitly ranks the binary format above JSON (`*/*` keeps JSON)."""
+    return request.accept_mimetypes.best_match(['application/json', MIMETYPE]) == MIMETYPE
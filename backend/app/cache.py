@@ -0,0 +1,340 @@
+"""
+Result Cache
+
+Caches the return value of API GET views so repeated requests for the same
+data (overwhelmingly the standard date presets) skip the database entirely.
+
+Keys combine three parts:
+- the current data version (see DataVersion), so a reseed, incremental load
+  or ingest makes every older entry unreachable without explicit purging
+- today's date, because routes default missing dates relative to today
+- the canonical request key from app/singleflight.py (endpoint plus sorted
+  query parameters)
+
+The data version is re-read from the database at most once every
+CACHE_VERSION_CHECK_INTERVAL seconds per worker. When it changes, registered
+listeners run - the warmer (app/warmer.py) uses this to repopulate the
+presets for the new data.
+
+Storage (CACHE_BACKEND):
+- sqlite (default): one SQLite file per host (CACHE_PATH), shared by every
+  gunicorn worker, so adding workers doesn't add cold misses
+- memory: per-process LRU, used for tests
+
+Stored keys are blake2b digests of the full key (app/hashing.py), identical
+in every process. Route responses seed their variation with stable_hash() for
+the same reason, so any worker's cached result is the one every worker would
+have computed.
+
+Only plain dict/list results are cached; Response objects and (body, status)
+tuples always go through the view. Responses carry `X-Cache: HIT` or `MISS`.
+
+View wrapping order is cache -> single-flight -> view, so a miss that many
+requests hit at once is still computed once.
+"""
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from flask import g, request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.hashing import stable_key
+from app.singleflight import is_exempt, request_key
+
+
+class MemoryStore:
+    """Thread-safe in-process LRU store with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """
+    Host-wide store shared by every worker process, backed by one SQLite file.
+
+    WAL mode lets workers read concurrently while one writes; values are
+    pickled. Each thread opens its own connection on first use. Expired rows
+    are purged, and the oldest rows trimmed beyond max_entries, every
+    PURGE_EVERY writes.
+
+    SQLite connections must not cross fork(): the app is preloaded in the
+    gunicorn master, so the schema is created on a connection closed right
+    away, and a forked child drops every connection it inherited (see
+    _forget_connections()) and opens its own.
+    """
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._open()
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_results_expires_at ON results (expires_at)')
+        finally:
+            connection.close()
+        _sqlite_stores.add(self)
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._open()
+        return connection
+
+    def _forget_connections(self):
+        """Drop the connections inherited from the parent process (never closed: the parent owns them)."""
+        self._local = threading.local()
+        self._writes = 0
+
+    def get(self, key):
+        try:
+            row = self._connect().execute(
+                'SELECT expires_at, value FROM results WHERE key = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] < time.time():
+            return None
+        return row[0], pickle.loads(row[1])
+
+    def set(self, key, value, ttl: float):
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            connection = self._connect()
+            connection.execute(
+                'INSERT OR REPLACE INTO results (key, expires_at, value) VALUES (?, ?, ?)',
+                (key, time.time() + ttl, payload),
+            )
+        except (sqlite3.Error, pickle.PickleError, TypeError):
+            return
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._purge(connection)
+
+    def _purge(self, connection):
+        try:
+            connection.execute('DELETE FROM results WHERE expires_at < ?', (time.time(),))
+            self.evictions += connection.execute(
+                'DELETE FROM results WHERE key IN ('
+                'SELECT key FROM results ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            ).rowcount
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> int:
+        return self._connect().execute('DELETE FROM results').rowcount
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+_sqlite_stores = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for store in list(_sqlite_stores):
+        store._forget_connections()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def create_store(config):
+    """Build the configured store: 'sqlite' (shared by all workers on the host) or 'memory'."""
+    backend = config['CACHE_BACKEND']
+    if backend == 'sqlite':
+        path = config['CACHE_PATH'] or os.path.join(tempfile.gettempdir(), 'analytics-cache.sqlite3')
+        return SQLiteStore(path, config['CACHE_MAX_ENTRIES'])
+    if backend == 'memory':
+        return MemoryStore(config['CACHE_MAX_ENTRIES'])
+    raise ValueError(f"Unknown CACHE_BACKEND {backend!r} (expected 'sqlite' or 'memory')")
+
+
+class ResultCache:
+    """Data-version-aware cache of view results."""
+
+    def __init__(self, store, ttl: float = 3600, version_check_interval: float = 5):
+        self.store = store
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._version = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+
+    def on_version_change(self, listener):
+        """Register listener(old_version, new_version), called when new data is observed."""
+        self._listeners.append(listener)
+
+    def data_version(self, force: bool = False) -> int:
+        """Current data version, re-read from the database when the check interval elapsed."""
+        now = time.monotonic()
+        fresh = now - self._version_checked < self.version_check_interval
+        if not force and self._version is not None and fresh:
+            return self._version
+
+        from app.models import DataVersion
+        try:
+            version = DataVersion.current()
+        except SQLAlchemyError:
+            # data_versions doesn't exist yet (init-db not run) - cache as version 0
+            db.session.rollback()
+            version = 0
+
+        with self._version_lock:
+            previous, self._version = self._version, version
+            self._version_checked = now
+        if previous is not None and previous != version:
+            for listener in self._listeners:
+                listener(previous, version)
+        return version
+
+    def key(self) -> str:
+        """Cache key for the current request (its data version is kept on g.data_version)."""
+        g.data_version = self.data_version()
+        return f'v{g.data_version}:{date.today().isoformat()}:{request_key()}'
+
+    def get(self, key):
+        """Return (hit, value)."""
+        entry = self.store.get(stable_key(key))
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, entry[1]
+
+    def set(self, key, value):
+        self.store.set(stable_key(key), value, self.ttl)
+
+    def clear(self) -> int:
+        return self.store.clear()
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'dataVersion': self._version,
+            'entries': len(self.store),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 3) if lookups else None,
+            'evictions': getattr(self.store, 'evictions', 0),
+            'backend': type(self.store).__name__,
+            'ttl': self.ttl,
+        }
+
+
+def cached(view, cache: ResultCache):
+    """Wrap a view so GET results are served from and stored in the result cache."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # g.cache_bypass: the request must run its view (e.g. ?profile=1)
+        if request.method != 'GET' or g.get('cache_bypass'):
+            return view(*args, **kwargs)
+
+        key = cache.key()
+        hit, value = cache.get(key)
+        g.cache_status = 'HIT' if hit else 'MISS'
+        if hit:
+            return value
+
+        result = view(*args, **kwargs)
+        if isinstance(result, (dict, list)):
+            cache.set(key, result)
+        return result
+
+    return wrapper
+
+
+def init_app(app):
+    """Wrap every API GET view with the result cache (call after single-flight)."""
+    cache = ResultCache(
+        create_store(app.config),
+        ttl=app.config['CACHE_TTL'],
+        version_check_interval=app.config['CACHE_VERSION_CHECK_INTERVAL'],
+    )
+    app.extensions['result_cache'] = cache
+
+    if not app.config.get('CACHE_ENABLED', True):
+        return
+
+    exempt = set(app.config['CACHE_EXEMPT'])
+    wrapped = set()
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/') or 'GET' not in rule.methods:
+            continue
+        if rule.endpoint in wrapped or is_exempt(rule.endpoint, exempt):
+            continue
+        app.view_functions[rule.endpoint] = cached(app.view_functions[rule.endpoint], cache)
+        wrapped.add(rule.endpoint)
+
+    @app.after_request
+    def add_cache_header(response):
+        status = g.pop('cache_status', None)
+        if status is not None:
+            response.headers['X-Cache'] = status
+        return response
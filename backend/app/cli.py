@@ -0,0 +1,129 @@
+"""
+Flask CLI Commands
+
+Operational commands run outside the request path, e.g. as a release step:
+
+    flask --app run init-db
+    flask --app run compress-assets
+    flask --app run check-query-budgets
+    flask --app run benchmark-statements
+
+Schema creation lives here rather than in create_app() so that web workers
+never touch the database while booting.
+"""
+
+import click
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from app import db
+
+
+def add_missing_columns(engine) -> list:
+    """
+    ALTER TABLE ... ADD COLUMN for nullable model columns missing from existing tables.
+
+    Only additive, nullable columns are handled; anything else needs a real migration.
+    """
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def init_app(app):
+    """Register CLI commands on the app."""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create any missing database tables, columns and indexes."""
+        # Import models so every table is registered on the metadata
+        from app import models  # noqa: F401
+
+        db.create_all()
+        for name in add_missing_columns(db.engine):
+            click.echo(f'  added column {name}')
+        # create_all() skips tables that already exist, so indexes added to
+        # existing models later (e.g. the filter dimension columns) are
+        # created individually
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        click.echo('Database schema is up to date.')
+
+    @app.cli.command('rebuild-sketches')
+    def rebuild_sketches():
+        """Build the daily quantile sketches for data loaded before they existed."""
+        from app.sketches import rebuild_daily_sketches
+
+        with db.engine.begin() as connection:
+            written = rebuild_daily_sketches(connection)
+        # Results computed without sketches were cached under the current data version
+        cleared = app.extensions['result_cache'].clear()
+        click.echo(f'Wrote {written} daily sketches, cleared {cleared} cached results.')
+
+    @app.cli.command('compress-assets')
+    def compress_assets():
+        """Write .gz/.br variants of the built frontend for precompressed serving."""
+        from app.assets import AssetManifest, write_precompressed
+
+        if app.static_folder is None:
+            raise click.ClickException('No static folder - build the frontend first.')
+
+        written = write_precompressed(AssetManifest(app.static_folder))
+        for path in written:
+            click.echo(f'  {path}')
+        click.echo(f'Wrote {len(written)} precompressed files.')
+
+    @app.cli.command('check-query-budgets')
+    @click.option('--all', 'show_all', is_flag=True, help='List every route, not only failures.')
+    def check_query_budgets(show_all):
+        """Run every API route on the synthetic dataset and fail on query budget overruns."""
+        from app.querybudget import check_budgets
+
+        report = check_budgets()
+        failures = [entry for entry in report if entry['problems']]
+        for entry in report:
+            if entry['problems']:
+                click.echo(f"  FAIL {entry['endpoint']}: {', '.join(entry['problems'])}")
+            elif show_all:
+                budget = entry['budget']
+                click.echo(
+                    f"  ok   {entry['endpoint']}: {entry['statements']}/{budget['statements']} statements, "
+                    f"{entry['rows']}/{budget['rows']} rows"
+                )
+        if failures:
+            raise click.ClickException(f'{len(failures)} of {len(report)} routes failed their query budget check.')
+        click.echo(f'All {len(report)} routes are within their query budgets.')
+
+    @app.cli.command('benchmark-statements')
+    @click.option('--iterations', default=2000, show_default=True, help='Calls timed per statement.')
+    @click.option('--dimensions', is_flag=True, help='Add region and segment filters to the date range.')
+    def benchmark_statements(iterations, dimensions):
+        """Measure per-call statement preparation saved by the cached (lambda) statements."""
+        from app.filters import FilterContext
+        from app.statements import benchmark
+        from app.warmer import preset_range
+
+        start_date, end_date = preset_range('last30d')
+        filters = FilterContext(
+            start_date, end_date,
+            **({'region': ('Europe', 'North America'), 'segment': ('enterprise',)} if dimensions else {}),
+        )
+
+        click.echo(f'{"statement":<22}{"expression":>12}{"lambda":>10}{"saved":>10}{"compile":>10}  (us per call)')
+        for entry in benchmark(db.engine.dialect, filters, iterations):
+            click.echo(
+                f"{entry['statement']:<22}{entry['expressionUs']:>12}{entry['lambdaUs']:>10}"
+                f"{entry['savedUs']:>10}{entry['compileUs']:>10}"
+            )
@@ -0,0 +1,187 @@
+"""
+API Response Compression
+
+Compresses /api/* responses according to the request's Accept-Encoding.
+Remote users on VPN are bandwidth-bound rather than CPU-bound, and the JSON
+payloads (daily trends, opportunity lists) are highly repetitive, so they
+typically shrink 5-10x.
+
+- Encodings: zstd and brotli when the optional `zstandard` / `brotli`
+  packages are installed, gzip always. The client's q-values decide; ties go
+  to the first entry in COMPRESS_ALGORITHMS.
+- Bodies smaller than COMPRESS_MIN_SIZE are sent as-is.
+- Streamed responses are compressed chunk by chunk with a flush after each
+  chunk, so the client still receives data as it is produced.
+- Compressed bodies are kept in a small LRU keyed by a digest of the
+  uncompressed body. A response served from a result cache has an identical
+  body, so it reuses the compressed bytes instead of compressing again.
+"""
+
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+def supported_encodings(config) -> list:
+    """Encodings from COMPRESS_ALGORITHMS whose libraries are available, in preference order."""
+    available = {'gzip'}
+    if brotli is not None:
+        available.add('br')
+    if zstandard is not None:
+        available.add('zstd')
+    return [name for name in config['COMPRESS_ALGORITHMS'] if name in available]
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _stream_compressor(encoding: str, level: int):
+    """Return (compress_chunk, finish) callables for incremental compression."""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        return (
+            lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish,
+        )
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    return (
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies bounded by total compressed size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+def _choose_encoding(encodings: list):
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def init_app(app):
+    """Install the compression after_request hook."""
+    config = app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return
+
+    encodings = supported_encodings(config)
+    levels = config['COMPRESS_LEVELS']
+    mimetypes = set(config['COMPRESS_MIMETYPES'])
+    min_size = config['COMPRESS_MIN_SIZE']
+    body_cache = CompressedBodyCache(config['COMPRESS_CACHE_BYTES'])
+    app.extensions['compression_cache'] = body_cache
+
+    def compress_response(response):
+        if not request.path.startswith('/api/') or request.method == 'HEAD':
+            return response
+        if response.mimetype not in mimetypes or response.status_code in (204, 206, 304):
+            return response
+        if response.status_code < 200 or 'Content-Encoding' in response.headers:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = _choose_encoding(encodings)
+        if encoding is None:
+            return response
+        level = levels[encoding]
+
+        if response.is_streamed:
+            compress_chunk, finish = _stream_compressor(encoding, level)
+            chunks = response.response
+
+            def generate():
+                try:
+                    for chunk in chunks:
+                        if isinstance(chunk, str):
+                            chunk = chunk.encode('utf-8')
+                        if chunk:
+                            yield compress_chunk(chunk)
+                    yield finish()
+                finally:
+                    if hasattr(chunks, 'close'):
+                        chunks.close()
+
+            response.response = generate()
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        if response.direct_passthrough:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+        compressed = body_cache.get(key)
+        if compressed is None:
+            compressed = compress(data, encoding, level)
+            body_cache.put(key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    app.after_request(compress_response)
@@ -13,6 +13,161 @@ class Config:
         'pool_recycle': 300,
     }
 
+    # Concurrent fan-out of independent queries within a request (app/parallel.py)
+    QUERY_FANOUT_ENABLED = os.getenv('QUERY_FANOUT_ENABLED', 'true').lower() == 'true'
+    QUERY_FANOUT_WORKERS = int(os.getenv('QUERY_FANOUT_WORKERS', '4'))
+    QUERY_FANOUT_TIMEOUT = float(os.getenv('QUERY_FANOUT_TIMEOUT', '10'))
+
+    # Connection pool governor (app/pool.py) - pool size is derived from these
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '2'))    # gunicorn workers per host
+    GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '6'))  # request threads per worker
+    DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', '20'))  # budget for all workers
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+    PGBOUNCER_MODE = os.getenv('PGBOUNCER_MODE', 'false').lower() == 'true'
+    PGBOUNCER_DISABLE_PREPARED = os.getenv('PGBOUNCER_DISABLE_PREPARED', 'true').lower() == 'true'
+
+    # Statement timeouts (milliseconds) applied to every transaction in a request
+    STATEMENT_TIMEOUT_MS = int(os.getenv('STATEMENT_TIMEOUT_MS', '15000'))
+    STATEMENT_TIMEOUTS = {
+        'health': 1000,
+        'dashboard.get_summary': 5000,
+        'dashboard.get_kpis': 5000,
+        'customers.get_overview': 5000,
+        'customers.get_segments': 5000,
+        'revenue.get_trends': 10000,
+        'customers.get_cohorts': 10000,
+        'ingest.ingest_transactions': 60000,
+    }
+
+    # Admission control (app/admission.py). Limits are per worker process:
+    # concurrent requests, wait-queue depth and max queue wait (seconds) per cost class
+    ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+    ADMISSION_CLASSES = {
+        'interactive': {'limit': 16, 'queue': 32, 'wait': 2.0},
+        'standard': {'limit': 8, 'queue': 16, 'wait': 3.0},
+        'heavy': {'limit': 2, 'queue': 4, 'wait': 5.0},
+    }
+    ADMISSION_DEFAULT_CLASS = 'standard'
+    ADMISSION_ROUTES = {
+        'dashboard.get_summary': 'interactive',
+        'dashboard.get_kpis': 'interactive',
+        'customers.get_overview': 'interactive',
+        'operations.get_pipeline_kpis': 'interactive',
+        'forecasting.get_forecasting_kpis': 'interactive',
+        'revenue.get_trends': 'heavy',
+        'revenue.get_transactions': 'heavy',
+        'ingest.ingest_transactions': 'heavy',
+        'customers.get_cohorts': 'heavy',
+        'customers.get_acquisition': 'heavy',
+        'forecasting.get_revenue_forecast': 'heavy',
+        'forecasting.get_seasonality': 'heavy',
+    }
+    # Endpoints (or whole blueprints) that are never queued or shed
+    ADMISSION_EXEMPT = ['health', 'admin', 'seed_db_endpoint', 'stream']
+    # Standard-class requests spanning more days than this are treated as heavy
+    ADMISSION_HEAVY_RANGE_DAYS = int(os.getenv('ADMISSION_HEAVY_RANGE_DAYS', '180'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '2'))
+
+    # Request coalescing (app/singleflight.py). Setting SINGLEFLIGHT_LOCK_DIR (a local
+    # directory) also coalesces across the workers on one host
+    SINGLEFLIGHT_ENABLED = os.getenv('SINGLEFLIGHT_ENABLED', 'true').lower() == 'true'
+    SINGLEFLIGHT_TIMEOUT = float(os.getenv('SINGLEFLIGHT_TIMEOUT', '30'))
+    SINGLEFLIGHT_LOCK_DIR = os.getenv('SINGLEFLIGHT_LOCK_DIR')
+    SINGLEFLIGHT_EXEMPT = ['health', 'admin', 'ingest', 'seed_db_endpoint', 'stream']
+
+    # Result cache (app/cache.py) - entries are keyed by data version, so the TTL
+    # only bounds staleness of date-relative defaults and memory use. The 'sqlite'
+    # backend is one file per host (CACHE_PATH, default in the temp dir) shared by
+    # all workers; 'memory' is per process
+    CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite')
+    CACHE_PATH = os.getenv('CACHE_PATH')
+    CACHE_TTL = int(os.getenv('CACHE_TTL', '3600'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+    CACHE_VERSION_CHECK_INTERVAL = float(os.getenv('CACHE_VERSION_CHECK_INTERVAL', '5'))
+    CACHE_EXEMPT = ['health', 'admin', 'ingest', 'seed_db_endpoint', 'revenue.get_transactions', 'stream']
+
+    # Cache warmer (app/warmer.py): presets warmed on worker start and on new data
+    WARMER_ENABLED = os.getenv('WARMER_ENABLED', 'true').lower() == 'true'
+    WARMER_PRESETS = ['last7d', 'last30d', 'last90d', 'ytd', 'lastYear']
+    WARMER_PAUSE = float(os.getenv('WARMER_PAUSE', '0.05'))  # seconds between warm requests
+
+    # Query budgets (app/querybudget.py): most SQL statements / rows fetched per
+    # request. 'warn' reports X-Query-Count/X-Query-Rows and logs overruns;
+    # `flask check-query-budgets` enforces the budgets on the synthetic dataset
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'off')
+    QUERY_BUDGET_DEFAULT = {'statements': 1, 'rows': 200}
+    QUERY_BUDGETS = {
+        # Concurrent fan-out (app/parallel.py): one statement per independent aggregate
+        'dashboard.get_summary': {'statements': 3},
+        'dashboard.get_kpis': {'statements': 3},
+        'customers.get_overview': {'statements': 4, 'rows': 500},
+        # Daily trend points for up to two years; since_version requests also
+        # look up the data versions in between (app/deltas.py)
+        'revenue.get_trends': {'statements': 2, 'rows': 750},
+        'customers.get_acquisition': {'statements': 2},
+        # One daily sketch per day (and region/channel with by=); filters the
+        # sketches don't cover read the raw values instead (app/sketches.py)
+        'revenue.get_quantiles': {'rows': 4000},
+        'operations.get_deal_size_distribution': {'statements': 2, 'rows': 800},
+        # Export endpoint - bounded by its `limit` cap instead
+        'revenue.get_transactions': {'rows': 100000},
+    }
+    QUERY_BUDGET_EXEMPT = ['health', 'admin', 'ingest', 'seed_db_endpoint', 'stream']
+
+    # Profiling (app/profiling.py): limits for the admin sampling profiler, and
+    # whether `?profile=1` returns a cProfile report for a single request
+    PROFILER_MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+    PROFILER_MAX_HZ = float(os.getenv('PROFILER_MAX_HZ', '1000'))
+    PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', 'false').lower() == 'true'
+
+    # Hot route queries (app/statements.py) are lambda statements, so they are
+    # neither rebuilt nor re-keyed per request; false builds plain expressions
+    CACHED_STATEMENTS = os.getenv('CACHED_STATEMENTS', 'true').lower() == 'true'
+
+    # Memory accounting (app/memprofile.py): tracemalloc peak/retained bytes and
+    # top allocation sites per route, served by /api/admin/memory. Adds
+    # snapshot overhead to every sampled request - enable while investigating
+    MEMORY_PROFILE = os.getenv('MEMORY_PROFILE', 'false').lower() == 'true'
+    MEMORY_PROFILE_SAMPLE_RATE = float(os.getenv('MEMORY_PROFILE_SAMPLE_RATE', '1.0'))
+    MEMORY_PROFILE_FRAMES = int(os.getenv('MEMORY_PROFILE_FRAMES', '32'))
+    MEMORY_PROFILE_TOP_SITES = 10
+    MEMORY_PROFILE_EXEMPT = ['health', 'admin', 'stream']
+
+    # Live KPI stream (app/streams.py). Each open stream holds a request thread, so
+    # by default at most half of a worker's threads (but at least one) serve streams; the watcher polls
+    # data_versions every STREAM_POLL_INTERVAL seconds, and streams close after
+    # STREAM_MAX_SECONDS (the browser reconnects after STREAM_RETRY_MS)
+    STREAM_MAX_CLIENTS = int(os.getenv('STREAM_MAX_CLIENTS', str(max(1, GUNICORN_THREADS // 2))))
+    STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', '2'))
+    STREAM_HEARTBEAT = 15  # seconds between keepalive comments
+    STREAM_MAX_SECONDS = float(os.getenv('STREAM_MAX_SECONDS', '600'))
+    STREAM_RETRY_MS = 3000
+
+    # JSON provider (app/serialization.py): 'auto' uses orjson when installed, else 'stdlib'
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+
+    # API response compression (app/compression.py). zstd/br need the optional
+    # zstandard/brotli packages; gzip is always available.
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_ALGORITHMS = ['zstd', 'br', 'gzip']
+    COMPRESS_LEVELS = {'zstd': 3, 'br': 5, 'gzip': 6}
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-ndjson', 'text/csv', 'text/plain',
+                          'application/vnd.analytics.columns']
+    COMPRESS_CACHE_BYTES = int(os.getenv('COMPRESS_CACHE_BYTES', str(16 * 1024 * 1024)))
+
+    # Static frontend caching (app/assets.py); hashed assets/* are always immutable
+    STATIC_INDEX_MAX_AGE = int(os.getenv('STATIC_INDEX_MAX_AGE', '0'))
+    STATIC_DEFAULT_MAX_AGE = int(os.getenv('STATIC_DEFAULT_MAX_AGE', '3600'))
+
+    # Transaction ingestion (app/ingest.py): rows per INSERT and errors reported per request
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '5000'))
+    INGEST_MAX_ERRORS = int(os.getenv('INGEST_MAX_ERRORS', '20'))
+
+    # Token required by /api/admin/* and /api/ingest/* (when unset, admin endpoints only work in debug/testing)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -21,6 +176,10 @@ class DevelopmentConfig(Config):
         'DATABASE_URL',
         'postgresql://localhost/analytics_dashboard'
     )
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'warn')
+    PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', 'true').lower() == 'true'
+    # The development server starts a thread per request
+    STREAM_MAX_CLIENTS = int(os.getenv('STREAM_MAX_CLIENTS', '50'))
 
 
 class ProductionConfig(Config):
@@ -39,6 +198,9 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_BACKEND = 'memory'
+    QUERY_BUDGET_MODE = 'warn'
+    PROFILE_REQUESTS = True
 
 
 config = {
@@ -0,0 +1,226 @@
+"""
+Atomic Dataset Loading
+
+A reseed used to TRUNCATE the live tables and insert row by row, so for the
+length of the load dashboards saw empty or half-loaded data while their
+queries contended with the inserts. replace_dataset() instead builds the new
+generation off to the side and swaps it in atomically.
+
+PostgreSQL:
+    1. Create every dataset table in the `analytics_shadow` schema (same DDL,
+       routed there with schema_translate_map) and bulk-load it with
+       multi-row INSERTs. Indexes are created with the tables, so the load
+       pays for them once; rollups, sketches and ANALYZE run before the swap too.
+    2. In one short transaction, move the live tables to `analytics_retired`
+       and the shadow tables into `public` (ALTER TABLE ... SET SCHEMA only
+       rewrites catalog entries), and record the new data version.
+    3. Drop the retired generation.
+
+    Readers see either the old generation or the new one, never a mix. The
+    swap needs an ACCESS EXCLUSIVE lock on each table; it gives up after
+    SWAP_LOCK_TIMEOUT_MS rather than queueing readers behind a long query,
+    and is retried a few times before the load fails.
+
+Other databases (SQLite in local development):
+    Delete and reload inside a single transaction, which readers on other
+    connections also observe atomically.
+
+Smaller changes (incremental loads, ingestion) write to the live tables in
+one ordinary transaction using the same helpers: bulk_insert(),
+add_lifetime_value(), and rebuild_daily_metrics() and rebuild_daily_sketches()
+for just the changed dates.
+
+Every load appends a row to data_versions (see record_version()), which is
+how caches and streams learn that the data changed.
+"""
+
+import time
+
+from sqlalchemy import bindparam, func, insert, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import Customer, DailyMetric, DailySketch, DataVersion, Pipeline, Product, SalesRep, Transaction
+from app.rollups import rebuild_daily_metrics
+from app.sketches import rebuild_daily_sketches
+
+SHADOW_SCHEMA = 'analytics_shadow'
+RETIRED_SCHEMA = 'analytics_retired'
+LIVE_SCHEMA = 'public'
+
+INSERT_BATCH_SIZE = 5000
+SWAP_LOCK_TIMEOUT_MS = 5000
+SWAP_ATTEMPTS = 3
+
+# pg_advisory_xact_lock key serializing data version allocation
+VERSION_LOCK_KEY = 0x616E6C74
+
+
+def dataset_tables():
+    """Tables that make up one generation of the dataset, in dependency order."""
+    return [
+        Product.__table__,
+        SalesRep.__table__,
+        Customer.__table__,
+        Transaction.__table__,
+        Pipeline.__table__,
+        DailyMetric.__table__,
+        DailySketch.__table__,
+    ]
+
+
+def bulk_insert(connection, table, rows, batch_size=INSERT_BATCH_SIZE) -> int:
+    """Insert dict rows with batched executemany; returns the number of rows."""
+    for i in range(0, len(rows), batch_size):
+        connection.execute(insert(table), rows[i:i + batch_size])
+    return len(rows)
+
+
+def add_lifetime_value(connection, amounts_by_customer) -> int:
+    """
+    Add completed revenue to each customer's lifetime_value.
+
+    Args:
+        amounts_by_customer: Customer id -> amount to add
+
+    Returns:
+        Number of customers updated
+    """
+    table = Customer.__table__
+    if not amounts_by_customer:
+        return 0
+    connection.execute(
+        table.update()
+        .where(table.c.id == bindparam('customer_id'))
+        .values(lifetime_value=func.coalesce(table.c.lifetime_value, 0) + bindparam('amount')),
+        [{'customer_id': customer_id, 'amount': amount}
+         for customer_id, amount in amounts_by_customer.items()],
+    )
+    return len(amounts_by_customer)
+
+
+def record_version(connection, source, changed_from=None, changed_to=None, delta=None,
+                   expired_before=None) -> int:
+    """
+    Append a data_versions row on `connection` and return the new version.
+
+    changed_from/changed_to bound the dates rows were added to or changed on;
+    expired_before records a rolling-window trim (every row dated earlier was
+    removed) separately, so the two don't merge into one range spanning the
+    whole window.
+
+    On PostgreSQL the transaction first takes an advisory lock held until it
+    ends, so loads that record versions commit one at a time and versions
+    become visible in the order they are numbered - a client holding version
+    N has seen every change up to N (see app/deltas.py). SQLite serializes
+    writers by itself.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': VERSION_LOCK_KEY})
+    result = connection.execute(insert(DataVersion.__table__).values(
+        source=source,
+        changed_from=changed_from,
+        changed_to=changed_to,
+        expired_before=expired_before,
+        delta=delta or {},
+    ))
+    return result.inserted_primary_key[0]
+
+
+def replace_dataset(engine, rows_by_table, source='reseed', changed_from=None, changed_to=None) -> int:
+    """
+    Replace every dataset table with `rows_by_table` atomically.
+
+    Args:
+        engine: Engine to load through
+        rows_by_table: Table name -> list of column dicts (tables not given are
+            left empty; daily_metrics and daily_sketches are always rebuilt
+            from the transactions and pipeline)
+        source, changed_from, changed_to: Recorded on the new data version
+
+    Returns:
+        The new data version
+    """
+    if engine.dialect.name == 'postgresql':
+        return _swap_in_shadow(engine, rows_by_table, source, changed_from, changed_to)
+    return _replace_in_place(engine, rows_by_table, source, changed_from, changed_to)
+
+
+def _load(connection, rows_by_table) -> dict:
+    delta = {}
+    for table in dataset_tables():
+        rows = rows_by_table.get(table.name)
+        if rows:
+            delta[table.name] = bulk_insert(connection, table, rows)
+    delta[DailyMetric.__tablename__] = rebuild_daily_metrics(connection)
+    delta[DailySketch.__tablename__] = rebuild_daily_sketches(connection)
+    return delta
+
+
+def _replace_in_place(engine, rows_by_table, source, changed_from, changed_to) -> int:
+    with engine.begin() as connection:
+        for table in reversed(dataset_tables()):
+            connection.execute(table.delete())
+        delta = _load(connection, rows_by_table)
+        return record_version(connection, source, changed_from, changed_to, delta)
+
+
+def _reset_sequences(connection, schema):
+    """Move each serial id sequence past the explicit ids that were loaded."""
+    for table in dataset_tables():
+        if 'id' not in table.c:
+            continue
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{schema}.{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {schema}.{table.name}), 0) + 1, false)"
+        ))
+
+
+def _swap_in_shadow(engine, rows_by_table, source, changed_from, changed_to) -> int:
+    tables = dataset_tables()
+
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS {SHADOW_SCHEMA} CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA {SHADOW_SCHEMA}'))
+
+    # Build the new generation - nothing here is visible to readers
+    shadow = engine.execution_options(schema_translate_map={None: SHADOW_SCHEMA})
+    with shadow.begin() as connection:
+        db.metadata.create_all(connection, tables=tables)
+        delta = _load(connection, rows_by_table)
+        _reset_sequences(connection, SHADOW_SCHEMA)
+        for table in tables:
+            connection.execute(text(f'ANALYZE {SHADOW_SCHEMA}.{table.name}'))
+
+    version = _swap(engine, tables, source, changed_from, changed_to, delta)
+
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS {RETIRED_SCHEMA} CASCADE'))
+        connection.execute(text(f'DROP SCHEMA IF EXISTS {SHADOW_SCHEMA} CASCADE'))
+    return version
+
+
+def _swap(engine, tables, source, changed_from, changed_to, delta) -> int:
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT_MS}ms'"))
+                connection.execute(text(f'DROP SCHEMA IF EXISTS {RETIRED_SCHEMA} CASCADE'))
+                connection.execute(text(f'CREATE SCHEMA {RETIRED_SCHEMA}'))
+
+                live = set(inspect(connection).get_table_names(schema=LIVE_SCHEMA))
+                for table in tables:
+                    if table.name in live:
+                        connection.execute(text(
+                            f'ALTER TABLE {LIVE_SCHEMA}.{table.name} SET SCHEMA {RETIRED_SCHEMA}'
+                        ))
+                for table in tables:
+                    connection.execute(text(
+                        f'ALTER TABLE {SHADOW_SCHEMA}.{table.name} SET SCHEMA {LIVE_SCHEMA}'
+                    ))
+                return record_version(connection, source, changed_from, changed_to, delta)
+        except OperationalError:
+            # Most likely lock_timeout behind a long-running reader
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            time.sleep(attempt)
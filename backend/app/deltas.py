@@ -0,0 +1,176 @@
+"""
+Delta Responses for Time Series
+
+Long-range series (revenue trends, customer acquisition) are refetched
+whenever React Query considers them stale or the user extends the range, and
+every refetch used to resend - and recompute - every bucket, although new
+data almost always lands in the last few. A client that already holds a copy
+can instead send what it holds:
+
+- since_version: the data version of its copy (the X-Data-Version header of
+  the response it came from, or `version` of a delta)
+- since: the date of its last bucket (optional); that bucket may have been
+  cut off by the old end date, and anything after it is new
+
+and gets back only the buckets that may differ, as an object:
+
+    {"version": 42, "full": false, "replaceFrom": "2024-03-01", "rows": [...]}
+
+The client drops its rows dated on or after replaceFrom and appends `rows`.
+replaceFrom is the first bucket touched by any data version after
+since_version (data_versions.changed_from) or the `since` bucket, whichever
+is earlier; only that window is queried. A rolling-window trim
+(data_versions.expired_before) only touches series starting before the
+cutoff, and those are resent from their start. Nothing changed and no `since`
+gives `"replaceFrom": null` and no rows. With `"full": true` the rows are the
+whole series and replace the copy - sent when an intervening version doesn't
+say which dates it changed (a reseed), when since_version is unknown, or when
+the series' buckets can change without their dates changing (acquisition
+filtered by channel or category, where a new transaction changes which
+customers match).
+
+The version reported is the one the result cache keyed the response under
+(see ResultCache.key()), so the data is at least that new. Versions become
+visible in the order they are numbered (see record_version()), so no change
+can hide below a version a client already holds.
+"""
+
+from datetime import date, timedelta
+
+from flask import current_app, g, request
+from sqlalchemy import select
+
+from app import db
+from app.filters import InvalidFilterError
+from app.models import DataVersion
+
+VERSION_HEADER = 'X-Data-Version'
+
+
+def delta_series(view):
+    """Mark a series view as reporting X-Data-Version and answering since_version requests."""
+    view.delta_series = True
+    return view
+
+
+def request_version() -> int:
+    """Data version the current request's results reflect (read once per request)."""
+    if 'data_version' not in g:
+        g.data_version = current_app.extensions['result_cache'].data_version()
+    return g.data_version
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the day/week (ISO, Monday)/month bucket containing `day`, as date_trunc gives it."""
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+class SeriesDelta:
+    """What part of a series the current request needs: all of it, or the buckets from replace_from on."""
+
+    def __init__(self, filters, granularity: str, version: int, since_version: int = None,
+                 full: bool = True, replace_from: date = None):
+        self.granularity = granularity
+        self.version = version
+        self.since_version = since_version
+        self.full = full
+        self.replace_from = replace_from
+        # Filters for the query: the same dimensions, starting at the first bucket to send
+        self.filters = filters
+        if not full and replace_from is not None and replace_from > filters.start:
+            self.filters = filters.with_dates(replace_from.isoformat(), filters.end_date)
+
+    @property
+    def requested(self) -> bool:
+        return self.since_version is not None
+
+    @property
+    def unchanged(self) -> bool:
+        """Nothing to send: the client's copy is current."""
+        return not self.full and self.replace_from is None
+
+    @classmethod
+    def from_request(cls, filters, granularity: str, tracked: bool = True) -> 'SeriesDelta':
+        """
+        Parse since_version/since and work out the window to send.
+
+        Args:
+            filters: The request's filters (with a start date)
+            granularity: 'day', 'week' or 'month' - how buckets are dated
+            tracked: False when changes can move buckets outside the dates
+                they touched, so deltas are always full
+        """
+        version = request_version()
+        raw_version = request.args.get('since_version')
+        if raw_version is None:
+            return cls(filters, granularity, version)
+        try:
+            since_version = int(raw_version)
+        except ValueError:
+            raise InvalidFilterError(f"Invalid since_version '{raw_version}', expected an integer")
+        raw_since = request.args.get('since')
+        try:
+            since = date.fromisoformat(raw_since) if raw_since else None
+        except ValueError:
+            raise InvalidFilterError(f"Invalid since '{raw_since}', expected YYYY-MM-DD")
+
+        if not tracked or since_version > version:
+            return cls(filters, granularity, version, since_version)
+
+        changes = db.session.execute(
+            select(
+                DataVersion.source, DataVersion.changed_from, DataVersion.changed_to, DataVersion.expired_before
+            ).where(
+                DataVersion.version > since_version, DataVersion.version <= version
+            )
+        ).all()
+        if any(
+            change.source == 'reseed' or (change.changed_from is None and change.expired_before is None)
+            for change in changes
+        ):
+            return cls(filters, granularity, version, since_version)
+
+        starts = [
+            change.changed_from for change in changes
+            if change.changed_from is not None
+            and change.changed_from <= filters.end and (change.changed_to or change.changed_from) >= filters.start
+        ]
+        # Trimmed rows were all dated before the cutoff
+        starts += [
+            filters.start for change in changes
+            if change.expired_before is not None and change.expired_before > filters.start
+        ]
+        if since is not None:
+            starts.append(since)
+        if not starts:
+            return cls(filters, granularity, version, since_version, full=False)
+
+        first = max(min(starts), filters.start)
+        return cls(filters, granularity, version, since_version, full=False,
+                   replace_from=bucket_start(first, granularity))
+
+    def respond(self, rows):
+        """The view's return value: the rows as-is, or the delta object when one was requested."""
+        if not self.requested:
+            return rows
+        return {
+            'version': self.version,
+            'full': self.full,
+            'replaceFrom': self.replace_from.isoformat() if self.replace_from else None,
+            'rows': rows,
+        }
+
+
+def init_app(app):
+    """Report the data version on responses of @delta_series views."""
+
+    @app.after_request
+    def add_version_header(response):
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, 'delta_series', False) and 'data_version' in g and response.status_code == 200:
+            response.headers[VERSION_HEADER] = str(g.data_version)
+        return response
@@ -0,0 +1,185 @@
+"""
+Time Series Downsampling (LTTB)
+
+A daily trend over two years is 730+ points, far more than a chart a few
+hundred pixels wide can draw - the browser downloads, parses and plots
+points that end up on the same pixel column. Views marked with
+@time_series accept `max_points` and then return at most that many points,
+chosen with Largest-Triangle-Three-Buckets:
+
+- the first and last points are always kept
+- the points in between are split into max_points - 2 equal buckets, and from
+  each bucket the point forming the largest triangle with the point kept from
+  the previous bucket and the average of the next bucket is kept
+
+which follows the visual shape of the series - spikes and dips survive where
+averaging or taking every nth point would flatten or skip them. On top of
+LTTB the series' highest and lowest points always replace their bucket's
+pick, so the peaks drawn are the real ones.
+
+Series split by a dimension (acquisition by channel) are sampled on the sum
+over the dimension per date, and every row of a chosen date is kept, so the
+splits stay aligned.
+
+Downsampling is applied when the response is built (see
+AnalyticsJSONProvider), like `format`: the cache and single-flight key
+ignores max_points (singleflight.PRESENTATION_PARAMS), so every resolution is
+cut from the same cached full series. The response says what was dropped:
+
+    X-Total-Points: 731                                    (points before sampling)
+    X-Series-Totals: {"revenue": 1234567.8, "orders": 9876} (sums over all points)
+
+so totals shown next to a chart stay exact. Delta responses (app/deltas.py)
+are objects rather than rows and are never downsampled.
+
+Usage Example:
+    @bp.route('/trends')
+    @time_series(y='revenue', totals=('revenue', 'orders'))
+    def get_trends(): ...
+
+    GET /api/revenue/trends?granularity=day&max_points=200
+"""
+
+import json
+
+from flask import current_app, g, has_request_context, request
+
+from app.filters import InvalidFilterError
+
+MAX_POINTS_PARAM = 'max_points'
+MIN_POINTS = 3
+
+TOTAL_POINTS_HEADER = 'X-Total-Points'
+TOTALS_HEADER = 'X-Series-Totals'
+
+
+class TimeSeries:
+    """Which row keys a time-series view's rows are plotted by."""
+
+    def __init__(self, y, x: str = 'date', split: str = None, totals=()):
+        # y: key (or keys, first non-null wins) of the value the shape follows
+        self.y = (y,) if isinstance(y, str) else tuple(y)
+        self.x = x
+        self.split = split
+        self.totals = tuple(totals)
+
+    def value(self, row) -> float:
+        for key in self.y:
+            if row.get(key) is not None:
+                return float(row[key])
+        return 0.0
+
+
+def time_series(y, x: str = 'date', split: str = None, totals=()):
+    """Mark a view returning date-ordered rows as accepting max_points."""
+    def decorate(view):
+        view.time_series = TimeSeries(y, x, split, totals)
+        return view
+    return decorate
+
+
+def lttb(x, y, threshold: int):
+    """
+    Indexes of the `threshold` points LTTB keeps from x/y (NumPy arrays, x ascending).
+
+    The triangle areas are computed as whole-array operations: for a candidate
+    B and next-bucket average C, twice the area with the previous pick A is
+    |Ax*(By - Cy) + Ay*(Cx - Bx) + (Bx*Cy - Cx*By)|, and the three
+    coefficients don't depend on A. Only the argmax per bucket runs in a
+    Python loop, because each bucket's A is the previous bucket's pick.
+    """
+    import numpy as np
+
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+
+    buckets = threshold - 2
+    # Bucket i holds points edges[i]..edges[i+1]-1; together they cover 1..n-2
+    edges = (np.arange(buckets + 1) * (n - 2) // buckets + 1).astype(np.intp)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    # C for each bucket is the next bucket's average, or the last point
+    next_x = np.repeat(np.append(avg_x[1:], x[-1]), counts)
+    next_y = np.repeat(np.append(avg_y[1:], y[-1]), counts)
+    inner_x, inner_y = x[1:n - 1], y[1:n - 1]
+    coef_ax = inner_y - next_y
+    coef_ay = next_x - inner_x
+    constant = inner_x * next_y - next_x * inner_y
+
+    picked = np.empty(threshold, dtype=np.intp)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i] - 1, edges[i + 1] - 1  # offsets into the inner arrays
+        area = np.abs(x[a] * coef_ax[lo:hi] + y[a] * coef_ay[lo:hi] + constant[lo:hi])
+        a = edges[i] + int(np.argmax(area))
+        picked[i + 1] = a
+
+    # The extremes replace whatever their bucket picked (the maximum wins a shared bucket)
+    for extreme in (int(np.argmin(y)), int(np.argmax(y))):
+        if 0 < extreme < n - 1:
+            picked[np.searchsorted(edges, extreme, side='right')] = extreme
+    return picked
+
+
+def downsample(rows: list, series: TimeSeries, max_points: int) -> list:
+    """The rows of at most max_points dates of `rows`, chosen by LTTB on the (summed) series."""
+    import numpy as np
+
+    dates = [row.get(series.x) for row in rows]
+    if any(value is None for value in dates):
+        return rows
+    days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+    # One point per date; a split series is sampled on its per-date sum
+    unique_days, position = np.unique(days, return_inverse=True)
+    if len(unique_days) <= max_points:
+        return rows
+    values = np.bincount(position, weights=np.fromiter((series.value(row) for row in rows), float, len(rows)))
+
+    keep = np.zeros(len(unique_days), dtype=bool)
+    keep[lttb(unique_days.astype(float), values, max_points)] = True
+    return [row for row, kept in zip(rows, keep[position]) if kept]
+
+
+def requested_series():
+    """(TimeSeries, max_points) when the current request asked to downsample a marked view."""
+    if not has_request_context() or g.get('max_points') is None or request.endpoint is None:
+        return None
+    series = getattr(current_app.view_functions.get(request.endpoint), 'time_series', None)
+    return (series, g.max_points) if series is not None else None
+
+
+def apply(rows: list):
+    """Downsample response rows as the request asks; returns (rows, headers)."""
+    requested = requested_series()
+    if requested is None:
+        return rows, {}
+    series, max_points = requested
+
+    headers = {TOTAL_POINTS_HEADER: str(len({row.get(series.x) for row in rows}))}
+    if series.totals:
+        totals = {key: sum(row.get(key) or 0 for row in rows) for key in series.totals}
+        headers[TOTALS_HEADER] = json.dumps({key: round(value, 2) for key, value in totals.items()})
+    return downsample(rows, series, max_points), headers
+
+
+def init_app(app):
+    """Validate max_points on @time_series views before they run."""
+
+    @app.before_request
+    def parse_max_points():
+        raw = request.args.get(MAX_POINTS_PARAM)
+        if raw is None or request.endpoint is None:
+            return
+        if getattr(app.view_functions.get(request.endpoint), 'time_series', None) is None:
+            return
+        try:
+            max_points = int(raw)
+        except ValueError:
+            max_points = None
+        if max_points is None or max_points < MIN_POINTS:
+            raise InvalidFilterError(f"Invalid max_points '{raw}', expected an integer of at least {MIN_POINTS}")
+        g.max_points = max_points
@@ -0,0 +1,246 @@
+"""
+Request Filter Context
+
+Every analytics endpoint accepts the same filters. FilterContext parses them
+once per request and turns them into SQL predicates, so a drill-down such as
+"Europe, partner channel" is answered by a narrower indexed query instead of
+the browser filtering a full download.
+
+Query Parameters:
+- start_date / end_date: Date range (YYYY-MM-DD). Each route picks its own
+  default window; some (forecasting, lifetime value) treat a missing date as
+  "unbounded".
+- region, channel, segment, category: Multi-valued dimension filters, given
+  either repeated (`region=Europe&region=APAC`) or comma-separated
+  (`region=Europe,APAC`). Values within a dimension are OR-ed; dimensions are
+  AND-ed.
+
+Dimensions are mapped onto each table by the columns that carry them:
+
+    dimension   transactions            customers               pipeline
+    region      transactions.region     customers.region        customer's region
+    channel     transactions.channel    has a transaction in    -
+    segment     customer's segment      customers.segment       customer's segment
+    category    product's category      bought in category      -
+
+Cross-table dimensions become uncorrelated `IN (SELECT id ...)` subqueries on
+indexed columns rather than joins, so they compose with any query shape
+(including ones that already join the same table) without changing its
+grouping.
+
+Usage Example:
+    filters = FilterContext.from_request(default_days=30)
+    db.session.query(func.sum(Transaction.amount)).filter(
+        *filters.transaction_predicates(), Transaction.status == 'completed'
+    )
+"""
+
+from datetime import datetime, timedelta
+
+from flask import request
+from sqlalchemy import select
+
+from app.models import Customer, Pipeline, Product, Transaction
+
+DIMENSIONS = ('region', 'channel', 'segment', 'category')
+DATE_FORMAT = '%Y-%m-%d'
+
+
+class InvalidFilterError(ValueError):
+    """Raised for malformed filter parameters; reported as 400 Bad Request."""
+
+
+def _parse_date(value: str, name: str):
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        raise InvalidFilterError(f"Invalid {name} '{value}', expected YYYY-MM-DD")
+
+
+def _parse_values(args, name: str) -> tuple:
+    """Collect a dimension's values from repeated and comma-separated parameters."""
+    values = set()
+    for raw in args.getlist(name):
+        values.update(part.strip() for part in raw.split(',') if part.strip())
+    return tuple(sorted(values))
+
+
+class FilterContext:
+    """Parsed date range and dimension filters for one request."""
+
+    def __init__(self, start_date=None, end_date=None, **dimensions):
+        # The raw strings are kept because existing endpoints echo them back
+        # and derive their deterministic variation from them
+        self.start_date = start_date
+        self.end_date = end_date
+        self.start = _parse_date(start_date, 'start_date') if start_date else None
+        self.end = _parse_date(end_date, 'end_date') if end_date else None
+        if self.start and self.end and self.start > self.end:
+            raise InvalidFilterError('start_date must not be after end_date')
+        self.dimensions = {name: tuple(dimensions.get(name) or ()) for name in DIMENSIONS}
+
+    @classmethod
+    def from_request(cls, default_days=None, args=None):
+        """
+        Parse filters from the query string.
+
+        Args:
+            default_days: When set, a missing start_date defaults to this many
+                days ago and a missing end_date to today. When None, missing
+                dates stay unset.
+            args: Mapping to parse instead of request.args.
+        """
+        args = request.args if args is None else args
+        start_date = args.get('start_date')
+        end_date = args.get('end_date')
+
+        if default_days is not None:
+            if not start_date:
+                start_date = (datetime.now() - timedelta(days=default_days)).strftime(DATE_FORMAT)
+            if not end_date:
+                end_date = datetime.now().strftime(DATE_FORMAT)
+
+        return cls(start_date, end_date, **{name: _parse_values(args, name) for name in DIMENSIONS})
+
+    def with_dates(self, start_date=None, end_date=None) -> 'FilterContext':
+        """A copy with another date range and the same dimension filters."""
+        return FilterContext(start_date, end_date, **self.dimensions)
+
+    @property
+    def region(self) -> tuple:
+        return self.dimensions['region']
+
+    @property
+    def channel(self) -> tuple:
+        return self.dimensions['channel']
+
+    @property
+    def segment(self) -> tuple:
+        return self.dimensions['segment']
+
+    @property
+    def category(self) -> tuple:
+        return self.dimensions['category']
+
+    @property
+    def has_dimensions(self) -> bool:
+        return any(self.dimensions.values())
+
+    @property
+    def period_days(self) -> int:
+        return (self.end - self.start).days if self.start and self.end else 0
+
+    def date_predicates(self, column) -> list:
+        predicates = []
+        if self.start:
+            predicates.append(column >= self.start)
+        if self.end:
+            predicates.append(column <= self.end)
+        return predicates
+
+    def _customer_ids(self, dimensions):
+        """Subquery of customer ids matching the given customer-level dimensions."""
+        query = select(Customer.id).correlate(None)
+        if 'region' in dimensions and self.region:
+            query = query.where(Customer.region.in_(self.region))
+        if 'segment' in dimensions and self.segment:
+            query = query.where(Customer.segment.in_(self.segment))
+        return query
+
+    def _product_ids(self):
+        return select(Product.id).correlate(None).where(Product.category.in_(self.category))
+
+    def transaction_predicates(self, dates: bool = True, start=None, end=None) -> list:
+        """
+        Predicates on Transaction for the date range and every dimension.
+
+        Args:
+            dates: Include the date range predicates.
+            start, end: Override the date range (e.g. for a previous period).
+        """
+        predicates = []
+        if dates:
+            start = start or self.start
+            end = end or self.end
+            if start:
+                predicates.append(Transaction.transaction_date >= start)
+            if end:
+                predicates.append(Transaction.transaction_date <= end)
+        if self.region:
+            predicates.append(Transaction.region.in_(self.region))
+        if self.channel:
+            predicates.append(Transaction.channel.in_(self.channel))
+        if self.segment:
+            predicates.append(Transaction.customer_id.in_(self._customer_ids(('segment',))))
+        if self.category:
+            predicates.append(Transaction.product_id.in_(self._product_ids()))
+        return predicates
+
+    def add_transaction_criteria(self, stmt, dates: bool = True, start=None, end=None):
+        """
+        transaction_predicates() as steps on a lambda statement (see app/statements.py).
+
+        Each filter that is set adds its own step, so the steps present - not
+        the values - decide which cached statement is used. Values are copied
+        to locals first: the lambdas' closure variables become bound parameters.
+        """
+        if dates:
+            start = start or self.start
+            end = end or self.end
+            if start:
+                stmt += lambda s: s.where(Transaction.transaction_date >= start)
+            if end:
+                stmt += lambda s: s.where(Transaction.transaction_date <= end)
+        if self.region:
+            region = self.region
+            stmt += lambda s: s.where(Transaction.region.in_(region))
+        if self.channel:
+            channel = self.channel
+            stmt += lambda s: s.where(Transaction.channel.in_(channel))
+        if self.segment:
+            customer_ids = self._customer_ids(('segment',))
+            stmt += lambda s: s.where(Transaction.customer_id.in_(customer_ids))
+        if self.category:
+            product_ids = self._product_ids()
+            stmt += lambda s: s.where(Transaction.product_id.in_(product_ids))
+        return stmt
+
+    def customer_predicates(self) -> list:
+        """Predicates on Customer for every dimension (dates are left to the caller)."""
+        predicates = []
+        if self.region:
+            predicates.append(Customer.region.in_(self.region))
+        if self.segment:
+            predicates.append(Customer.segment.in_(self.segment))
+        if self.channel or self.category:
+            purchases = select(Transaction.customer_id).correlate(None)
+            if self.channel:
+                purchases = purchases.where(Transaction.channel.in_(self.channel))
+            if self.category:
+                purchases = purchases.where(Transaction.product_id.in_(self._product_ids()))
+            predicates.append(Customer.id.in_(purchases))
+        return predicates
+
+    def pipeline_predicates(self) -> list:
+        """Predicates on Pipeline, applied through each opportunity's customer."""
+        if not (self.region or self.segment):
+            return []
+        return [Pipeline.customer_id.in_(self._customer_ids(('region', 'segment')))]
+
+    def add_pipeline_criteria(self, stmt):
+        """pipeline_predicates() as a step on a lambda statement."""
+        if self.region or self.segment:
+            customer_ids = self._customer_ids(('region', 'segment'))
+            stmt += lambda s: s.where(Pipeline.customer_id.in_(customer_ids))
+        return stmt
+
+    def cache_key(self) -> str:
+        """Canonical string identifying these filters, independent of parameter order."""
+        parts = [f'start={self.start_date or ""}', f'end={self.end_date or ""}']
+        parts.extend(
+            f'{name}={",".join(values)}' for name, values in self.dimensions.items() if values
+        )
+        return '&'.join(parts)
+
+    def __repr__(self):
+        return f'FilterContext({self.cache_key()})'
@@ -0,0 +1,26 @@
+"""
+Stable Hashing
+
+Python's built-in hash() of a str is salted per process (PYTHONHASHSEED), so
+two gunicorn workers - or the same worker after a restart - hash the same
+date string differently. Anything that must agree across processes uses
+these helpers instead:
+
+- stable_hash(): seeds for the deterministic per-period variation in route
+  responses, so identical requests return identical numbers from any worker
+  (and can therefore be cached and shared)
+- stable_key(): fixed-length digests for cache and lock-file keys
+"""
+
+import hashlib
+
+
+def stable_hash(value) -> int:
+    """Process-independent, non-negative integer hash of str(value)."""
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def stable_key(value: str) -> str:
+    """32-character hex digest of a key string."""
+    return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,274 @@
+"""
+Transaction Ingestion
+
+Loads real transactions through the application instead of out-of-band SQL,
+so the derived state stays consistent with the rows:
+
+- the body is NDJSON (one transaction object per line), parsed as it streams
+  in - it is never held in memory as a whole
+- rows are inserted in batches of INGEST_BATCH_SIZE with one multi-row
+  INSERT ... ON CONFLICT (external_id) DO NOTHING RETURNING per batch, so
+  re-sending a file is a no-op for rows already loaded
+- customer lifetime_value, the daily_metrics rollups and daily_sketches
+  for the touched dates and the data version are updated in the same
+  transaction as the inserts
+- every inserted row is stamped with that data version (transactions.
+  data_version), so the KPI stream (app/streams.py) can aggregate exactly
+  the rows a version added
+
+Line format (keys match the /api/revenue/transactions rows):
+
+    {"externalId": "erp-1001", "transactionDate": "2024-03-01", "amount": 1250.0,
+     "customerId": 42, "productId": 7, "quantity": 2, "salesRepId": 3,
+     "channel": "online", "status": "completed"}
+
+externalId, transactionDate, amount, customerId and productId are required.
+quantity defaults to 1, status to 'completed', and region to the customer's
+region. Unknown customers, products or sales reps are validation errors.
+
+A load is all-or-nothing: any invalid line rolls the whole request back and
+the first INGEST_MAX_ERRORS problems are reported with their line numbers.
+"""
+
+import json
+import math
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, select, update
+
+from app.dataload import add_lifetime_value, record_version
+from app.models import Customer, DataVersion, Product, SalesRep, Transaction
+from app.rollups import rebuild_daily_metrics
+from app.sketches import rebuild_daily_sketches
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+STATUSES = ('completed', 'pending', 'refunded')
+CHANNELS = ('direct', 'online', 'partner')
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+class IngestError(ValueError):
+    """Raised when an ingest body contains invalid lines; reported as 400 Bad Request."""
+
+    def __init__(self, errors: list):
+        super().__init__(f'{len(errors)} invalid line(s); nothing was ingested')
+        self.errors = errors
+
+
+def _required(record, key):
+    value = record.get(key)
+    if value is None or value == '':
+        raise ValueError(f"'{key}' is required")
+    return value
+
+
+def _integer(record, key, required=True):
+    value = _required(record, key) if required else record.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"'{key}' must be an integer")
+    return value
+
+
+def parse_line(raw) -> dict:
+    """Validate one NDJSON line and map it onto transaction columns."""
+    try:
+        record = _loads(raw)
+    except ValueError:
+        raise ValueError('not valid JSON')
+    if not isinstance(record, dict):
+        raise ValueError('expected a JSON object')
+
+    external_id = str(_required(record, 'externalId'))
+    if len(external_id) > 100:
+        raise ValueError("'externalId' is longer than 100 characters")
+
+    try:
+        transaction_date = date.fromisoformat(_required(record, 'transactionDate'))
+    except (TypeError, ValueError):
+        raise ValueError("'transactionDate' must be YYYY-MM-DD")
+
+    amount = _required(record, 'amount')
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount):
+        raise ValueError("'amount' must be a number")
+
+    quantity = _integer(record, 'quantity', required=False) or 1
+    status = record.get('status') or 'completed'
+    if status not in STATUSES:
+        raise ValueError(f"'status' must be one of {', '.join(STATUSES)}")
+    channel = record.get('channel')
+    if channel is not None and channel not in CHANNELS:
+        raise ValueError(f"'channel' must be one of {', '.join(CHANNELS)}")
+
+    return {
+        'external_id': external_id,
+        'transaction_date': transaction_date,
+        'amount': round(Decimal(str(amount)), 2),
+        'quantity': quantity,
+        'product_id': _integer(record, 'productId'),
+        'customer_id': _integer(record, 'customerId'),
+        'sales_rep_id': _integer(record, 'salesRepId', required=False),
+        'region': record.get('region'),
+        'channel': channel,
+        'status': status,
+    }
+
+
+def _insert_ignoring_duplicates(dialect_name):
+    """INSERT ... ON CONFLICT (external_id) DO NOTHING RETURNING for the connection's dialect."""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f'Ingestion is not supported on {dialect_name}')
+
+    return insert(Transaction.__table__).on_conflict_do_nothing(
+        index_elements=['external_id']
+    ).returning(
+        Transaction.customer_id, Transaction.transaction_date, Transaction.amount, Transaction.status
+    )
+
+
+class TransactionIngest:
+    """Validates and inserts one NDJSON body on a single connection/transaction."""
+
+    def __init__(self, connection, batch_size: int = 5000, max_errors: int = 20):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.statement = _insert_ignoring_duplicates(connection.dialect.name)
+
+        self.received = 0
+        self.inserted = 0
+        self.errors = []
+        self.batch = []  # (line number, row)
+        self.amounts = defaultdict(Decimal)
+        self.dates = set()
+        self.version = None  # reserved with the first inserted batch
+
+        # Reference data seen so far: customer id -> region, product ids, sales rep ids
+        self._customers = {}
+        self._products = set()
+        self._sales_reps = set()
+
+    def _lookup(self, rows):
+        """Load any customers, products and sales reps in `rows` that haven't been seen yet."""
+        customer_ids = {row['customer_id'] for _, row in rows} - self._customers.keys()
+        if customer_ids:
+            self._customers.update(self.connection.execute(
+                select(Customer.id, Customer.region).where(Customer.id.in_(customer_ids))
+            ).all())
+        product_ids = {row['product_id'] for _, row in rows} - self._products
+        if product_ids:
+            self._products.update(self.connection.execute(
+                select(Product.id).where(Product.id.in_(product_ids))
+            ).scalars())
+        sales_rep_ids = {row['sales_rep_id'] for _, row in rows} - self._sales_reps - {None}
+        if sales_rep_ids:
+            self._sales_reps.update(self.connection.execute(
+                select(SalesRep.id).where(SalesRep.id.in_(sales_rep_ids))
+            ).scalars())
+
+    def _error(self, line_no, message):
+        self.errors.append({'line': line_no, 'error': message})
+
+    def _flush(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+
+        self._lookup(batch)
+        rows = []
+        for line_no, row in batch:
+            if row['customer_id'] not in self._customers:
+                self._error(line_no, f"unknown customerId {row['customer_id']}")
+            elif row['product_id'] not in self._products:
+                self._error(line_no, f"unknown productId {row['product_id']}")
+            elif row['sales_rep_id'] is not None and row['sales_rep_id'] not in self._sales_reps:
+                self._error(line_no, f"unknown salesRepId {row['sales_rep_id']}")
+            else:
+                if row['region'] is None:
+                    row['region'] = self._customers[row['customer_id']]
+                rows.append(row)
+
+        # Once anything is invalid the request will be rolled back - keep
+        # validating for the error report but stop writing
+        if self.errors or not rows:
+            return
+
+        if self.version is None:
+            self.version = record_version(self.connection, 'ingest')
+        for row in rows:
+            row['data_version'] = self.version
+
+        for inserted in self.connection.execute(self.statement, rows):
+            self.inserted += 1
+            self.dates.add(inserted.transaction_date)
+            if inserted.status == 'completed':
+                self.amounts[inserted.customer_id] += inserted.amount
+
+    def feed(self, lines):
+        """Parse and insert every line of an NDJSON stream."""
+        for line_no, raw in enumerate(lines, 1):
+            if len(self.errors) >= self.max_errors:
+                break
+            if not raw.strip():
+                continue
+            self.received += 1
+            try:
+                self.batch.append((line_no, parse_line(raw)))
+            except ValueError as e:
+                self._error(line_no, str(e))
+                continue
+            if len(self.batch) >= self.batch_size:
+                self._flush()
+        self._flush()
+
+        if self.errors:
+            raise IngestError(self.errors[:self.max_errors])
+
+    def finish(self) -> dict:
+        """Update derived state for the inserted rows and fill in their data version."""
+        customers_updated = add_lifetime_value(self.connection, self.amounts)
+        rollups = sketches = 0
+        if self.dates:
+            rollups = rebuild_daily_metrics(self.connection, dates=sorted(self.dates))
+            sketches = rebuild_daily_sketches(self.connection, dates=sorted(self.dates))
+
+        if self.inserted:
+            version = self.version
+            self.connection.execute(update(DataVersion).where(DataVersion.version == version).values(
+                changed_from=min(self.dates),
+                changed_to=max(self.dates),
+                delta={
+                    'transactions_added': self.inserted,
+                    'customers_updated': customers_updated,
+                    'daily_metrics': rollups,
+                    'daily_sketches': sketches,
+                },
+            ))
+        else:
+            # Every row was a duplicate - nothing changed, so no new version
+            if self.version is not None:
+                self.connection.execute(delete(DataVersion).where(DataVersion.version == self.version))
+            version = self.connection.execute(select(DataVersion.version).order_by(
+                DataVersion.version.desc()
+            ).limit(1)).scalar() or 0
+
+        return {
+            'received': self.received,
+            'inserted': self.inserted,
+            'duplicates': self.received - self.inserted,
+            'customersUpdated': customers_updated,
+            'datesAffected': len(self.dates),
+            'version': version,
+        }
@@ -0,0 +1,266 @@
+"""
+Memory Accounting
+
+Some endpoints (at-risk customer scoring hydrates every customer as an ORM
+object; the seeder holds the whole dataset as lists of dicts) have memory
+use that grows with the data, and a worker that outgrows its limit is simply
+OOM-killed. MEMORY_PROFILE turns on tracemalloc and measures sampled API
+requests so worker memory limits can be set from numbers:
+
+- peak: the most memory the request had allocated at any one time,
+  covering the view, its fanned-out queries, JSON encoding and compression
+- retained: memory the request allocated that is still held when it is
+  torn down (first requests also fill SQLAlchemy's statement caches)
+- allocation sites: what the view had allocated and still held when it
+  returned, grouped by the innermost frame and the nearest app frame that
+  led to it, e.g. "app/routes/customers.py:312 -> sqlalchemy/orm/loading.py:162"
+
+Aggregates per route are served by GET /api/admin/memory (DELETE resets).
+
+tracemalloc is process-wide, so only one request is measured at a time
+(requests arriving while one is measured are not sampled), and allocations by
+other threads during a measured request count towards it - those samples are
+reported as `overlapping`. For clean numbers, measure a worker with one
+thread. Tracing slows every allocation in the process (more so with deeper
+MEMORY_PROFILE_FRAMES) and each measured request takes a snapshot, so keep
+MEMORY_PROFILE off in production except while investigating, and use
+MEMORY_PROFILE_SAMPLE_RATE to measure a fraction of requests.
+"""
+
+import os
+import random
+import threading
+import tracemalloc
+from collections import Counter, deque
+from functools import wraps
+
+from flask import g, request
+
+from app.singleflight import is_exempt
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Allocations made by the measurement itself, not the view
+_OWN_FILES = {tracemalloc.__file__, __file__}
+
+# Tracebacks labelled per snapshot, largest first; the rest are summed as one
+# entry (building labels for thousands of small tracebacks dominates the cost)
+LABELLED_TRACEBACKS = 200
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(APP_ROOT + os.sep):
+        return filename[len(APP_ROOT) + 1:]
+    marker = f'{os.sep}site-packages{os.sep}'
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _site_label(traceback) -> str:
+    """Innermost frame, prefixed with the nearest frame in app code when they differ."""
+    leaf = traceback[-1]
+    label = f'{_short_path(leaf.filename)}:{leaf.lineno}'
+    for frame in reversed(traceback):
+        if frame.filename.startswith(APP_ROOT + os.sep):
+            caller = f'{_short_path(frame.filename)}:{frame.lineno}'
+            return label if caller == label else f'{caller} -> {label}'
+    return label
+
+
+def allocation_sites(snapshot) -> Counter:
+    """Bytes held per allocation site in a snapshot."""
+    sites = Counter()
+    for index, stat in enumerate(snapshot.statistics('traceback')):
+        if index >= LABELLED_TRACEBACKS:
+            sites['(smaller allocations)'] += stat.size
+        elif stat.traceback[-1].filename not in _OWN_FILES:
+            sites[_site_label(stat.traceback)] += stat.size
+    return sites
+
+
+def max_rss_bytes() -> int:
+    """Peak resident set size of this process (Linux reports KiB, macOS bytes)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname().sysname == 'Darwin' else rss * 1024
+
+
+class RouteMemory:
+    """Running memory figures for one endpoint."""
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.view_runs = 0
+        self.overlapping = 0
+        self.peak_max = 0
+        self.peak_total = 0
+        self.retained_total = 0
+        self.recent_peaks = deque(maxlen=window)
+        self.site_bytes = Counter()
+        self.site_requests = Counter()
+
+    def record(self, peak: int, retained: int, sites: Counter, overlapping: bool):
+        self.requests += 1
+        self.overlapping += overlapping
+        self.peak_max = max(self.peak_max, peak)
+        self.peak_total += peak
+        self.retained_total += retained
+        self.recent_peaks.append(peak)
+        if sites is not None:
+            self.view_runs += 1
+            self.site_bytes.update(sites)
+            self.site_requests.update(sites.keys())
+
+    def snapshot(self, top: int) -> dict:
+        peaks = sorted(self.recent_peaks)
+        return {
+            'requests': self.requests,
+            'viewRuns': self.view_runs,
+            'overlapping': self.overlapping,
+            'peakBytes': {
+                'max': self.peak_max,
+                'mean': round(self.peak_total / self.requests) if self.requests else 0,
+                'p95': peaks[min(len(peaks) - 1, int(len(peaks) * 0.95))] if peaks else 0,
+            },
+            'retainedBytesMean': round(self.retained_total / self.requests) if self.requests else 0,
+            'topSites': [
+                {
+                    'site': site,
+                    'bytesPerRun': round(total / self.site_requests[site]),
+                    'runs': self.site_requests[site],
+                }
+                for site, total in self.site_bytes.most_common(top)
+            ],
+        }
+
+
+class MemoryProbe:
+    """
+    tracemalloc state for the one request currently being measured.
+
+    Traces are cleared when the request starts, so traced memory is exactly
+    what the request has allocated since, and the snapshot taken when the view
+    returns holds only the request's own live allocations - snapshotting and
+    diffing the whole heap instead costs seconds per request.
+    """
+
+    def __init__(self, overlapping: bool = False):
+        self.overlapping = overlapping
+        self.view_peak = 0
+        self.sites = None
+        tracemalloc.clear_traces()
+
+    def view_returned(self):
+        # Read the peak before the snapshot inflates it, then restart peak
+        # tracking for JSON encoding and compression
+        self.view_peak = tracemalloc.get_traced_memory()[1]
+        self.sites = allocation_sites(tracemalloc.take_snapshot())
+        tracemalloc.reset_peak()
+
+    def finish(self):
+        """(peak, retained) bytes since the request started."""
+        current, peak = tracemalloc.get_traced_memory()
+        return max(self.view_peak, peak), current
+
+
+class MemoryAccounting:
+    """Samples API requests one at a time and aggregates their memory use per endpoint."""
+
+    def __init__(self, sample_rate: float = 1.0, top_sites: int = 10):
+        self.sample_rate = sample_rate
+        self.top_sites = top_sites
+        self._measuring = threading.Lock()
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._active = 0
+
+    def request_started(self):
+        with self._lock:
+            self._active += 1
+            busy = self._active > 1
+        if random.random() >= self.sample_rate or not self._measuring.acquire(blocking=False):
+            return None
+        return MemoryProbe(overlapping=busy)
+
+    def request_finished(self, endpoint: str, probe):
+        with self._lock:
+            overlapping = self._active > 1
+            self._active -= 1
+        if probe is None:
+            return
+        try:
+            peak, retained = probe.finish()
+            with self._lock:
+                route = self._routes.setdefault(endpoint, RouteMemory())
+                route.record(peak, retained, probe.sites, probe.overlapping or overlapping)
+        finally:
+            self._measuring.release()
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {endpoint: route.snapshot(self.top_sites) for endpoint, route in self._routes.items()}
+        return {
+            'pid': os.getpid(),
+            'tracing': tracemalloc.is_tracing(),
+            'sampleRate': self.sample_rate,
+            'maxRssBytes': max_rss_bytes(),
+            'routes': dict(sorted(routes.items(), key=lambda item: -item[1]['peakBytes']['max'])),
+        }
+
+
+def measured(view):
+    """Wrap a view so allocation sites are captured while its result is still referenced."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        result = view(*args, **kwargs)
+        probe = g.get('memory_probe')
+        if probe is not None:
+            probe.view_returned()
+        return result
+
+    return wrapper
+
+
+def init_app(app):
+    """Start tracemalloc and measure sampled API requests when MEMORY_PROFILE is on."""
+    if not app.config.get('MEMORY_PROFILE'):
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(app.config['MEMORY_PROFILE_FRAMES'])
+
+    accounting = MemoryAccounting(
+        sample_rate=app.config['MEMORY_PROFILE_SAMPLE_RATE'],
+        top_sites=app.config['MEMORY_PROFILE_TOP_SITES'],
+    )
+    app.extensions['memory_accounting'] = accounting
+
+    exempt = set(app.config['MEMORY_PROFILE_EXEMPT'])
+    wrapped = set()
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/') or rule.endpoint in wrapped or is_exempt(rule.endpoint, exempt):
+            continue
+        app.view_functions[rule.endpoint] = measured(app.view_functions[rule.endpoint])
+        wrapped.add(rule.endpoint)
+
+    @app.before_request
+    def start_memory_probe():
+        if request.endpoint in wrapped:
+            g.memory_probe = accounting.request_started()
+
+    @app.teardown_request
+    def finish_memory_probe(exc):
+        if 'memory_probe' in g:
+            accounting.request_finished(request.endpoint, g.pop('memory_probe'))
@@ -17,7 +17,9 @@ Table Overview:
 - sales_reps: Sales team members with quota assignments
 - transactions: Completed sales/orders
 - pipeline: Active sales opportunities by stage
-- daily_metrics: Pre-aggregated metrics for performance (optional)
+- daily_metrics: Pre-aggregated daily rollups, rebuilt on every data load
+- daily_sketches: Mergeable daily quantile sketches of order value and deal size
+- data_versions: Log of dataset loads; the latest row is the served version
 """
 
 from .product import Product
@@ -26,6 +28,8 @@ from .sales_rep import SalesRep
 from .transaction import Transaction
 from .pipeline import Pipeline
 from .daily_metric import DailyMetric
+from .daily_sketch import DailySketch
+from .data_version import DataVersion
 
 __all__ = [
     'Product',
@@ -34,4 +38,6 @@ __all__ = [
     'Transaction',
     'Pipeline',
     'DailyMetric',
+    'DailySketch',
+    'DataVersion',
 ]
@@ -16,10 +16,6 @@ class DailyMetric(db.Model):
     )
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'metricDate': self.metric_date.isoformat() if self.metric_date else None,
-            'metricName': self.metric_name,
-            'metricValue': float(self.metric_value) if self.metric_value else 0,
-            'dimension': self.dimension,
-        }
+        """Exported fields, declared in app/serializers.py."""
+        from app.serializers import DAILY_METRIC
+        return DAILY_METRIC.from_object(self)
@@ -0,0 +1,24 @@
+from app import db
+
+
+class DailySketch(db.Model):
+    """
+    Quantile sketch (t-digest) of one metric's values on one day and dimension.
+
+    Built from the transactions/pipeline alongside daily_metrics (see
+    app/sketches.py); sketches for any date range are merged at query time.
+    """
+    __tablename__ = 'daily_sketches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sketch_date = db.Column(db.Date, nullable=False, index=True)
+    metric = db.Column(db.String(50), nullable=False)      # order_value, deal_size
+    dimension = db.Column(db.String(100), nullable=False)  # 'all', 'region:<region>', 'channel:<channel>'
+    count = db.Column(db.Integer, nullable=False)
+    min_value = db.Column(db.Float)
+    max_value = db.Column(db.Float)
+    centroids = db.Column(db.LargeBinary, nullable=False)  # little-endian float64 (mean, weight) pairs
+
+    __table_args__ = (
+        db.UniqueConstraint('sketch_date', 'metric', 'dimension', name='uix_daily_sketches'),
+    )
@@ -0,0 +1,37 @@
+from datetime import datetime
+from app import db
+
+
+class DataVersion(db.Model):
+    """
+    One row per change to the analytics dataset (reseed, incremental load, ingest).
+
+    The highest version identifies the dataset currently being served, so
+    anything derived from it (caches, streams) can tell when it is stale.
+    """
+    __tablename__ = 'data_versions'
+
+    version = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(50), nullable=False)  # reseed, incremental, ingest
+    changed_from = db.Column(db.Date)  # earliest transaction date affected
+    changed_to = db.Column(db.Date)    # latest transaction date affected
+    expired_before = db.Column(db.Date)  # transactions dated before this were removed
+    delta = db.Column(db.JSON)         # row counts inserted/removed per table
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def current(cls, session=None) -> int:
+        """Latest dataset version, or 0 before the first load."""
+        session = session or db.session
+        return session.query(db.func.max(cls.version)).scalar() or 0
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'source': self.source,
+            'changedFrom': self.changed_from.isoformat() if self.changed_from else None,
+            'changedTo': self.changed_to.isoformat() if self.changed_to else None,
+            'expiredBefore': self.expired_before.isoformat() if self.expired_before else None,
+            'delta': self.delta or {},
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+        }
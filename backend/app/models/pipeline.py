@@ -8,7 +8,7 @@ class Pipeline(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     opportunity_name = db.Column(db.String(255))
-    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'))
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), index=True)
     sales_rep_id = db.Column(db.Integer, db.ForeignKey('sales_reps.id'))
     stage = db.Column(db.String(50), index=True)  # lead, qualified, proposal, negotiation, closed-won, closed-lost
     amount = db.Column(db.Numeric(12, 2))
@@ -21,15 +21,6 @@ class Pipeline(db.Model):
     sales_rep = db.relationship('SalesRep', back_populates='pipelines')
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'opportunityName': self.opportunity_name,
-            'customerId': self.customer_id,
-            'customerName': self.customer.company if self.customer else None,
-            'salesRepId': self.sales_rep_id,
-            'salesRepName': self.sales_rep.name if self.sales_rep else None,
-            'stage': self.stage,
-            'amount': float(self.amount) if self.amount else 0,
-            'probability': self.probability,
-            'expectedCloseDate': self.expected_close_date.isoformat() if self.expected_close_date else None,
-        }
+        """Exported fields, declared in app/serializers.py."""
+        from app.serializers import PIPELINE
+        return PIPELINE.from_object(self)
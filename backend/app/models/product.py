@@ -16,11 +16,6 @@ class Product(db.Model):
     transactions = db.relationship('Transaction', back_populates='product')
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category,
-            'unitPrice': float(self.unit_price) if self.unit_price else 0,
-            'cost': float(self.cost) if self.cost else 0,
-            'isActive': self.is_active,
-        }
+        """Exported fields, declared in app/serializers.py."""
+        from app.serializers import PRODUCT
+        return PRODUCT.from_object(self)
@@ -17,11 +17,6 @@ class SalesRep(db.Model):
     pipelines = db.relationship('Pipeline', back_populates='sales_rep')
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'team': self.team,
-            'region': self.region,
-            'quota': float(self.quota) if self.quota else 0,
-            'hireDate': self.hire_date.isoformat() if self.hire_date else None,
-        }
+        """Exported fields, declared in app/serializers.py."""
+        from app.serializers import SALES_REP
+        return SALES_REP.from_object(self)
@@ -13,9 +13,11 @@ class Transaction(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), index=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), index=True)
     sales_rep_id = db.Column(db.Integer, db.ForeignKey('sales_reps.id'))
-    region = db.Column(db.String(50))
-    channel = db.Column(db.String(50))  # direct, online, partner
+    region = db.Column(db.String(50), index=True)
+    channel = db.Column(db.String(50), index=True)  # direct, online, partner
     status = db.Column(db.String(20))   # completed, pending, refunded
+    external_id = db.Column(db.String(100), unique=True, index=True)  # source system id, set by ingestion
+    data_version = db.Column(db.Integer, index=True)  # version that ingested the row; NULL for loaded data
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -24,15 +26,6 @@ class Transaction(db.Model):
     sales_rep = db.relationship('SalesRep', back_populates='transactions')
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'transactionDate': self.transaction_date.isoformat() if self.transaction_date else None,
-            'amount': float(self.amount) if self.amount else 0,
-            'quantity': self.quantity,
-            'productId': self.product_id,
-            'customerId': self.customer_id,
-            'salesRepId': self.sales_rep_id,
-            'region': self.region,
-            'channel': self.channel,
-            'status': self.status,
-        }
+        """Exported fields, declared in app/serializers.py."""
+        from app.serializers import TRANSACTION
+        return TRANSACTION.from_object(self)
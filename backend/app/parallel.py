@@ -0,0 +1,130 @@
+"""
+Concurrent Query Fan-Out
+
+Several endpoints (dashboard summary, customer overview) compute a handful of
+independent aggregates. Run sequentially on one session, their latency is the
+sum of every query; run concurrently, it approaches the slowest single query.
+
+run_parallel() executes a mapping of zero-argument callables on a bounded,
+process-wide thread pool. Each callable runs inside its own application
+context, so Flask-SQLAlchemy hands it a separate scoped session backed by its
+own pooled connection, which is returned to the pool when the task finishes.
+
+Usage Example:
+    results = run_parallel({
+        'revenue': lambda: db.session.query(func.sum(Transaction.amount)).scalar(),
+        'orders': lambda: db.session.query(func.count(Transaction.id)).scalar(),
+    })
+    results['revenue'], results['orders']
+
+Callables must not touch `request` - parse query parameters before fanning out.
+The request's own session ends its (read-only) transaction before fanning
+out, so its connection goes back to the pool for the tasks instead of sitting
+idle while they wait for one.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app, g
+
+from app import db
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Per-request state on `g` that fanned-out queries inherit from the request
+PROPAGATED_G_KEYS = ('statement_timeout_ms', 'query_tally')
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a fanned-out query does not finish within its timeout."""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"Query '{name}' did not complete within {timeout:.1f}s")
+        self.name = name
+        self.timeout = timeout
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Return the process-wide executor, creating it on first use.
+
+    Created lazily so that no threads exist before a pre-forking server
+    (gunicorn --preload) forks its workers.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix='query-fanout',
+                )
+    return _executor
+
+
+def _run_in_app_context(app, inherited, fn):
+    with app.app_context():
+        for key, value in inherited.items():
+            setattr(g, key, value)
+        return fn()
+
+
+def _release_request_connection():
+    """Return the request session's connection to the pool unless it has writes pending."""
+    session = db.session()
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        session.commit()
+
+
+def run_parallel(tasks: dict, timeout: float = None) -> dict:
+    """
+    Run independent query callables concurrently and gather their results.
+
+    Args:
+        tasks: Mapping of result name to zero-argument callable.
+        timeout: Per-query timeout in seconds. Defaults to QUERY_FANOUT_TIMEOUT.
+                 Each query gets the full timeout measured from submission, so
+                 the whole call is bounded by the slowest query, not the sum.
+
+    Returns:
+        Mapping of result name to the value returned by its callable.
+
+    Raises:
+        QueryTimeoutError: If any query exceeds its timeout.
+        Exception: Any exception raised by a callable is re-raised as-is.
+    """
+    app = current_app._get_current_object()
+    if timeout is None:
+        timeout = app.config.get('QUERY_FANOUT_TIMEOUT', 10.0)
+
+    # Fan-out disabled (or a single task, or a request that must stay on one
+    # thread, e.g. ?profile=1) - run inline on the request session
+    if not app.config.get('QUERY_FANOUT_ENABLED', True) or len(tasks) <= 1 or g.get('fanout_inline'):
+        return {name: fn() for name, fn in tasks.items()}
+
+    _release_request_connection()
+    executor = _get_executor(app.config.get('QUERY_FANOUT_WORKERS', 4))
+    inherited = {key: g.get(key) for key in PROPAGATED_G_KEYS if key in g}
+    submitted = time.monotonic()
+    futures = {
+        name: executor.submit(_run_in_app_context, app, inherited, fn)
+        for name, fn in tasks.items()
+    }
+
+    results = {}
+    try:
+        for name, future in futures.items():
+            remaining = max(0.0, timeout - (time.monotonic() - submitted))
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                raise QueryTimeoutError(name, timeout) from None
+    finally:
+        # Don't leave queued work behind when one query failed or timed out
+        for future in futures.values():
+            future.cancel()
+
+    return results
@@ -0,0 +1,207 @@
+"""
+Connection Pool Governor
+
+Keeps database connection usage bounded and observable when many dashboards
+refresh at once:
+
+- Pool sizing: each process gets enough connections for its request threads
+  plus the query fan-out pool (app/parallel.py), with overflow capped so that
+  all workers on a host stay within DB_MAX_CONNECTIONS. When that budget is
+  too small for both, startup logs a warning - fanned-out queries would
+  otherwise wait for connections under load. A request releases its own
+  connection before fanning out (see run_parallel()).
+- Statement timeouts: every transaction opened while serving a request runs
+  `SET LOCAL statement_timeout`, using the per-endpoint value from
+  STATEMENT_TIMEOUTS (or STATEMENT_TIMEOUT_MS). SET LOCAL is scoped to the
+  transaction, so no session state leaks between pooled connections.
+- PgBouncer mode: never relies on session state, and disables server-side
+  prepared statements for drivers that use them (psycopg 3).
+- Checkout metrics: TimedQueuePool records how long each request waited for
+  a connection, exposed via /api/admin/pool.
+
+Statement timeouts and pool sizing only apply to PostgreSQL; SQLite (testing)
+keeps Flask-SQLAlchemy's defaults.
+"""
+
+import threading
+import time
+from collections import deque
+
+from flask import g, has_app_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Thread-safe accumulator for connection checkout wait times."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent.append(wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts = self.checkouts
+            attempts = checkouts + self.timeouts
+            return {
+                'checkouts': checkouts,
+                'timeouts': self.timeouts,
+                'avgWaitMs': round(self.total_wait / attempts * 1000, 3) if attempts else 0,
+                'maxWaitMs': round(self.max_wait * 1000, 3),
+                'p95WaitMs': round(recent[int(len(recent) * 0.95) - 1] * 1000, 3) if recent else 0,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return conn
+
+
+def connections_needed(config) -> int:
+    """Connections a single process can use at once: one per request thread, plus one per fan-out thread."""
+    needed = config['GUNICORN_THREADS']
+    if config.get('QUERY_FANOUT_ENABLED', True):
+        needed += config['QUERY_FANOUT_WORKERS']
+    return needed
+
+
+def per_worker_connections(config) -> int:
+    """Each worker's share of DB_MAX_CONNECTIONS."""
+    return max(1, config['DB_MAX_CONNECTIONS'] // max(1, config['WEB_CONCURRENCY']))
+
+
+def build_engine_options(config) -> dict:
+    """
+    Derive SQLAlchemy engine options from worker/thread counts.
+
+    Args:
+        config: Flask config mapping (after from_object).
+
+    Returns:
+        Engine options dict for SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if not uri.startswith('postgresql'):
+        return options
+
+    # Never let all workers together exceed the host's connection budget
+    needed, per_worker_budget = connections_needed(config), per_worker_connections(config)
+    pool_size = min(needed, per_worker_budget)
+
+    options.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': per_worker_budget - pool_size,
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+    })
+
+    if config.get('PGBOUNCER_MODE'):
+        # Transaction-pooled connections may be reused by other clients between
+        # transactions, so server-side prepared statements can't be relied on
+        connect_args = dict(options.get('connect_args') or {})
+        if config.get('PGBOUNCER_DISABLE_PREPARED') and uri.startswith('postgresql+psycopg:'):
+            connect_args['prepare_threshold'] = None
+        options['connect_args'] = connect_args
+
+    return options
+
+
+def _statement_timeout_for(app, endpoint):
+    timeouts = app.config.get('STATEMENT_TIMEOUTS') or {}
+    return timeouts.get(endpoint, app.config.get('STATEMENT_TIMEOUT_MS'))
+
+
+def _apply_statement_timeout(session, transaction, connection):
+    """Session after_begin hook: scope the request's statement timeout to this transaction."""
+    if not has_app_context() or connection.dialect.name != 'postgresql':
+        return
+    timeout_ms = g.get('statement_timeout_ms')
+    if timeout_ms:
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout_ms)}')
+
+
+def init_app(app):
+    """Register statement timeout hooks and pool-related error handlers."""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    needed, budget = connections_needed(app.config), per_worker_connections(app.config)
+    if uri.startswith('postgresql') and needed > budget:
+        app.logger.warning(
+            'Connection pool capped at %s per worker (DB_MAX_CONNECTIONS=%s over %s workers) but %s '
+            'request threads and %s fan-out threads can use %s; lower GUNICORN_THREADS or '
+            'QUERY_FANOUT_WORKERS, or raise DB_MAX_CONNECTIONS',
+            budget, app.config['DB_MAX_CONNECTIONS'], app.config['WEB_CONCURRENCY'],
+            app.config['GUNICORN_THREADS'],
+            app.config['QUERY_FANOUT_WORKERS'] if app.config.get('QUERY_FANOUT_ENABLED', True) else 0,
+            needed,
+        )
+
+    @app.before_request
+    def set_statement_timeout():
+        g.statement_timeout_ms = _statement_timeout_for(app, request.endpoint)
+
+    @app.errorhandler(exc.TimeoutError)
+    def handle_pool_timeout(e):
+        # Every connection is busy - ask the client to back off briefly
+        return (
+            {'status': 'error', 'message': 'Database connection pool exhausted'},
+            503,
+            {'Retry-After': '1'},
+        )
+
+    @app.errorhandler(exc.OperationalError)
+    def handle_statement_timeout(e):
+        # 57014 = query_canceled, raised when statement_timeout is exceeded
+        if getattr(e.orig, 'pgcode', None) != '57014':
+            raise e
+        return {'status': 'error', 'message': 'Query exceeded its statement timeout'}, 504
+
+    if not event.contains(Session, 'after_begin', _apply_statement_timeout):
+        event.listen(Session, 'after_begin', _apply_statement_timeout)
+
+
+def pool_status(engine) -> dict:
+    """Current pool occupancy plus accumulated checkout wait statistics."""
+    pool = engine.pool
+    status = {'poolClass': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checkedOut': pool.checkedout(),
+            'checkedIn': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'maxOverflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status['saturation'] = round(pool.checkedout() / capacity, 3) if capacity else 0
+    status['checkoutWait'] = pool_stats.snapshot()
+    return status
@@ -0,0 +1,187 @@
+"""
+Profiling
+
+Two ways to see where Python time goes in a worker (ORM hydration, to_dict,
+Decimal conversion, JSON encoding), neither needing an external profiler:
+
+Sampling profiler (admin, safe in production)
+    POST /api/admin/profile?seconds=10&hz=100 starts sampling every thread of
+    the answering worker with sys._current_frames() on a background thread;
+    GET /api/admin/profile returns the result in collapsed-stack format
+    ("frame;frame;frame count" per line, root first), which flamegraph.pl,
+    speedscope and inferno read directly. Sampling runs in the background
+    because a worker with one request thread could otherwise only ever
+    sample the profiling request itself. Threads parked in a known wait
+    (idle executor threads, the server's accept loop) are skipped unless
+    `idle=1`.
+
+Per-request cProfile (PROFILE_REQUESTS, off in production)
+    Adding `?profile=1` to any API request runs it under cProfile - view,
+    queries and JSON encoding - and replaces the response with the pstats
+    report (`profile_sort=tottime` etc. to change the order). The request
+    bypasses the result cache so the view really runs, and its run_parallel()
+    queries run inline because cProfile only sees the request's own thread.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import Response, g, request
+
+# (module, function) leaf frames of threads that are waiting, not working
+IDLE_LEAVES = {
+    ('threading', 'wait'),
+    ('threading', '_wait_for_tstate_lock'),
+    ('queue', 'get'),
+    ('selectors', 'select'),
+    ('socket', 'accept'),
+    ('concurrent.futures.thread', '_worker'),
+    ('gunicorn.workers.sync', 'wait'),
+    ('gunicorn.workers.gthread', 'wait_for_and_dispatch_events'),
+}
+
+PSTATS_SORT_KEYS = ('cumulative', 'tottime', 'calls', 'ncalls', 'time')
+
+
+def _frame_label(frame) -> str:
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{frame.f_code.co_name}'
+
+
+def sample_stacks(duration: float, hz: float, include_idle: bool = False):
+    """
+    Sample every other thread's Python stack `hz` times a second for `duration` seconds.
+
+    Returns:
+        (Counter of collapsed stack -> samples, number of sampling passes)
+    """
+    own = threading.get_ident()
+    interval = 1.0 / hz
+    stacks = Counter()
+    passes = 0
+    deadline = time.monotonic() + duration
+
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            leaf = (frame.f_globals.get('__name__'), frame.f_code.co_name)
+            if not include_idle and leaf in IDLE_LEAVES:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f'thread-{ident}'))
+            stacks[';'.join(reversed(labels))] += 1
+        passes += 1
+        time.sleep(interval)
+
+    return stacks, passes
+
+
+def collapsed(stacks: Counter) -> str:
+    """Render stacks in the collapsed format flamegraph tools read."""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """Runs one sampling session at a time in the background and keeps the last result."""
+
+    def __init__(self, max_seconds: float = 60, max_hz: float = 1000):
+        self.max_seconds = max_seconds
+        self.max_hz = max_hz
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last = None
+
+    def start(self, seconds: float, hz: float, include_idle: bool = False) -> dict:
+        """Start sampling; raises ValueError on bad limits, RuntimeError if already running."""
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f'seconds must be between 0 and {self.max_seconds:g}')
+        if not 0 < hz <= self.max_hz:
+            raise ValueError(f'hz must be between 0 and {self.max_hz:g}')
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise RuntimeError('A profile is already being recorded')
+            self.last = {
+                'status': 'running',
+                'pid': os.getpid(),
+                'startedAt': datetime.utcnow().isoformat(),
+                'seconds': seconds,
+                'hz': hz,
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds, hz, include_idle), name='sampling-profiler', daemon=True
+            )
+            self._thread.start()
+            return dict(self.last)
+
+    def _run(self, seconds, hz, include_idle):
+        started = time.perf_counter()
+        stacks, passes = sample_stacks(seconds, hz, include_idle)
+        with self._lock:
+            self.last.update({
+                'status': 'complete',
+                'durationS': round(time.perf_counter() - started, 2),
+                'passes': passes,
+                'samples': sum(stacks.values()),
+                'collapsed': collapsed(stacks),
+            })
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.last) if self.last else None
+
+
+def init_app(app):
+    """Create the sampling profiler and, when PROFILE_REQUESTS is on, the ?profile=1 mode."""
+    app.extensions['sampling_profiler'] = SamplingProfiler(
+        max_seconds=app.config['PROFILER_MAX_SECONDS'],
+        max_hz=app.config['PROFILER_MAX_HZ'],
+    )
+
+    if not app.config.get('PROFILE_REQUESTS'):
+        return
+
+    @app.before_request
+    def start_request_profile():
+        if request.args.get('profile') != '1' or not request.path.startswith('/api/'):
+            return
+        g.cache_bypass = True
+        g.fanout_inline = True
+        g.request_profiler = cProfile.Profile()
+        g.request_profiler.enable()
+
+    @app.after_request
+    def report_request_profile(response):
+        profiler = g.pop('request_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+
+        sort = request.args.get('profile_sort', 'cumulative')
+        if sort not in PSTATS_SORT_KEYS:
+            sort = 'cumulative'
+        limit = request.args.get('profile_limit', 60, type=int)
+
+        out = io.StringIO()
+        out.write(f'{request.method} {request.full_path} -> {response.status}\n')
+        pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return Response(out.getvalue(), mimetype='text/plain')
+
+    @app.teardown_request
+    def stop_request_profile(exc):
+        # A view that raised skips after_request - never leave the thread profiled
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            profiler.disable()
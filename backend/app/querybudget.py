@@ -0,0 +1,228 @@
+"""
+Query Budgets
+
+Routes tend to grow N+1 patterns and per-bucket query loops quietly: the
+response is still correct, it just costs six round trips instead of one.
+Each API endpoint therefore has a declared budget - the most SQL statements
+it may execute and the most rows it may fetch per request - in
+QUERY_BUDGETS (app/config.py), with QUERY_BUDGET_DEFAULT for the rest.
+
+Counting wraps the view itself (innermost, beneath single-flight and the
+result cache), so only the view's own queries count - including queries it
+fans out to other threads with run_parallel(), which share the request's
+tally via `g`. Rows are the cursor rowcount of each statement that returns
+rows; sqlite3 doesn't report one for SELECT, so on SQLite a connection
+row_factory counts rows as they are fetched.
+
+QUERY_BUDGET_MODE:
+- off: no counting (production default)
+- warn: every API response carries X-Query-Count and X-Query-Rows, and a
+  warning is logged when a request exceeds its endpoint's budget
+  (development and testing)
+
+`flask --app run check-query-budgets` loads the synthetic dataset into a
+throwaway in-memory database, requests every API GET route with the date
+presets, and fails when any route goes over budget - run it in CI.
+"""
+
+import sqlite3
+import threading
+from functools import wraps
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.singleflight import is_exempt
+
+
+class QueryTally:
+    """Statements and rows counted for one request (shared with fan-out threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.rows = 0
+
+    def add(self, statements: int = 0, rows: int = 0):
+        with self._lock:
+            self.statements += statements
+            self.rows += rows
+
+
+def _current_tally():
+    return g.get('query_tally') if has_app_context() else None
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    tally = _current_tally()
+    if tally is not None:
+        tally.add(statements=1)
+
+
+def _count_rows(conn, cursor, statement, parameters, context, executemany):
+    tally = _current_tally()
+    if tally is None or cursor.description is None:
+        return
+    if conn.dialect.name != 'sqlite' and cursor.rowcount >= 0:
+        tally.add(rows=cursor.rowcount)
+
+
+def _counting_row_factory(cursor, row):
+    tally = _current_tally()
+    if tally is not None:
+        tally.add(rows=1)
+    return row
+
+
+def _install_row_counter(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.row_factory = _counting_row_factory
+
+
+def budget_for(config, endpoint: str) -> dict:
+    """The {'statements', 'rows'} budget that applies to an endpoint."""
+    return {**config['QUERY_BUDGET_DEFAULT'], **(config['QUERY_BUDGETS'].get(endpoint) or {})}
+
+
+def over_budget(budget: dict, statements: int, rows: int) -> list:
+    """Human-readable descriptions of each limit the counts exceed."""
+    problems = []
+    if statements > budget['statements']:
+        problems.append(f"{statements} statements (budget {budget['statements']})")
+    if rows > budget['rows']:
+        problems.append(f"{rows} rows (budget {budget['rows']})")
+    return problems
+
+
+def counted(view):
+    """Wrap a view so its queries are tallied on `g.query_tally`."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.query_tally = QueryTally()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def init_app(app):
+    """Count queries per API view and warn on budget overruns (call before single-flight)."""
+    if app.config.get('QUERY_BUDGET_MODE', 'off') == 'off':
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _count_statement):
+        event.listen(Engine, 'before_cursor_execute', _count_statement)
+        event.listen(Engine, 'after_cursor_execute', _count_rows)
+        event.listen(Pool, 'connect', _install_row_counter)
+
+    exempt = set(app.config['QUERY_BUDGET_EXEMPT'])
+    wrapped = set()
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/') or 'GET' not in rule.methods:
+            continue
+        if rule.endpoint in wrapped or is_exempt(rule.endpoint, exempt):
+            continue
+        app.view_functions[rule.endpoint] = counted(app.view_functions[rule.endpoint])
+        wrapped.add(rule.endpoint)
+
+    @app.after_request
+    def report_query_count(response):
+        tally = g.pop('query_tally', None)
+        if tally is None:
+            return response
+        response.headers['X-Query-Count'] = str(tally.statements)
+        response.headers['X-Query-Rows'] = str(tally.rows)
+
+        problems = over_budget(budget_for(app.config, request.endpoint), tally.statements, tally.rows)
+        if problems:
+            app.logger.warning(
+                'Query budget exceeded by %s: %s', request.endpoint, ', '.join(problems)
+            )
+        return response
+
+
+# Date ranges each route is checked with, on top of a request with no parameters
+CHECK_PRESETS = ('last7d', 'last30d', 'last90d', 'lastYear')
+
+# Dimension filters each route is also checked with (over CHECK_FILTER_PRESET),
+# one dimension each - filters take other paths than plain date ranges
+CHECK_FILTERS = ({'segment': 'enterprise'}, {'category': 'Data Analytics'}, {'region': 'Europe'})
+CHECK_FILTER_PRESET = 'lastYear'
+
+
+def check_budgets(config_name: str = 'testing') -> list:
+    """
+    Measure every API GET route on a freshly generated dataset.
+
+    The dataset is loaded into a temporary SQLite file; caching, coalescing
+    and admission control are off so every request runs its view.
+
+    Returns:
+        One {'endpoint', 'statements', 'rows', 'budget', 'problems'} dict per
+        route, with the worst counts seen across the checked date ranges. A
+        response other than 200 is a problem too - an error returned before
+        the view's queries ran would otherwise look within budget.
+    """
+    import os
+    import tempfile
+
+    from app import create_app, db
+    from app.dataload import replace_dataset
+    from app.warmer import preset_range
+    from data.seed_data import generate_dataset
+
+    fd, path = tempfile.mkstemp(prefix='query-budgets-', suffix='.sqlite3')
+    os.close(fd)
+    try:
+        app = create_app(config_name, overrides={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+            'QUERY_BUDGET_MODE': 'warn',
+            'CACHE_ENABLED': False,
+            'WARMER_ENABLED': False,
+            'SINGLEFLIGHT_ENABLED': False,
+            'ADMISSION_CONTROL_ENABLED': False,
+        })
+        with app.app_context():
+            db.create_all()
+            replace_dataset(db.engine, generate_dataset(), source='budget-check')
+
+            exempt = set(app.config['QUERY_BUDGET_EXEMPT'])
+            endpoints = sorted({
+                (rule.endpoint, rule.rule) for rule in app.url_map.iter_rules()
+                if rule.rule.startswith('/api/') and 'GET' in rule.methods
+                and not rule.arguments and not is_exempt(rule.endpoint, exempt)
+            })
+            param_sets = [{}]
+            for preset in CHECK_PRESETS:
+                start_date, end_date = preset_range(preset)
+                param_sets.append({'start_date': start_date, 'end_date': end_date})
+            start_date, end_date = preset_range(CHECK_FILTER_PRESET)
+            for dimension_filter in CHECK_FILTERS:
+                param_sets.append({'start_date': start_date, 'end_date': end_date, **dimension_filter})
+
+            client = app.test_client()
+            report = []
+            for endpoint, path_rule in endpoints:
+                statements = rows = 0
+                statuses = set()
+                for params in param_sets:
+                    response = client.get(path_rule, query_string=params)
+                    if response.status_code != 200:
+                        statuses.add(response.status_code)
+                    statements = max(statements, int(response.headers.get('X-Query-Count', 0)))
+                    rows = max(rows, int(response.headers.get('X-Query-Rows', 0)))
+                budget = budget_for(app.config, endpoint)
+                report.append({
+                    'endpoint': endpoint,
+                    'statements': statements,
+                    'rows': rows,
+                    'budget': budget,
+                    'problems': [f'returned status {status}' for status in sorted(statuses)]
+                    + over_budget(budget, statements, rows),
+                })
+            db.engine.dispose()
+        return report
+    finally:
+        os.unlink(path)
@@ -1,3 +1,3 @@
-from . import dashboard, revenue, customers, operations, forecasting
+from . import dashboard, revenue, customers, operations, forecasting, admin, ingest, stream
 
-__all__ = ['dashboard', 'revenue', 'customers', 'operations', 'forecasting']
+__all__ = ['dashboard', 'revenue', 'customers', 'operations', 'forecasting', 'admin', 'ingest', 'stream']
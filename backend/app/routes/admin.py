@@ -0,0 +1,138 @@
+"""
+Admin API Routes
+
+Operational endpoints for inspecting a running worker. Not used by the
+frontend; every endpoint requires the `X-Admin-Token` header to match the
+ADMIN_TOKEN setting (when ADMIN_TOKEN is unset, only debug and testing
+instances answer).
+
+Endpoints:
+- /api/admin/pool: Connection pool occupancy and checkout wait times
+- /api/admin/admission: Admission control state per cost class
+- /api/admin/singleflight: Request coalescing counters
+- /api/admin/cache: Result cache statistics and the last warm-up run
+  (DELETE clears the cache; POST /api/admin/cache/warm starts a warm-up)
+- /api/admin/profile: Sampling profiler - POST starts a run, GET returns the
+  collapsed stacks for flamegraph tools (see app/profiling.py)
+- /api/admin/memory: Peak and retained bytes and top allocation sites per
+  route when MEMORY_PROFILE is on (DELETE resets; see app/memprofile.py)
+- /api/admin/streams: Open KPI streams, filter groups and updates sent (see app/streams.py)
+"""
+
+import hmac
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, request
+from app import db
+from app.pool import pool_status
+
+bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+
+def require_admin(view):
+    """Reject requests that don't carry the configured admin token."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('ADMIN_TOKEN')
+        if token:
+            supplied = request.headers.get('X-Admin-Token', '')
+            if not hmac.compare_digest(supplied, token):
+                return {'status': 'error', 'message': 'Forbidden'}, 403
+        elif not (current_app.debug or current_app.testing):
+            return {'status': 'error', 'message': 'Admin endpoints are disabled'}, 403
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@bp.route('/pool')
+@require_admin
+def get_pool():
+    """Get connection pool saturation and checkout wait-time metrics for this worker."""
+    return pool_status(db.engine)
+
+
+@bp.route('/admission')
+@require_admin
+def get_admission():
+    """Get active, queued, admitted and shed request counts per cost class for this worker."""
+    return current_app.extensions['admission'].snapshot()
+
+
+@bp.route('/singleflight')
+@require_admin
+def get_singleflight():
+    """Get in-flight, shared and timed-out coalesced computations for this worker."""
+    return current_app.extensions['singleflight'].snapshot()
+
+
+@bp.route('/cache', methods=['GET', 'DELETE'])
+@require_admin
+def get_cache():
+    """Get result cache statistics and the last warm-up report, or clear the cache."""
+    cache = current_app.extensions['result_cache']
+    if request.method == 'DELETE':
+        return {'status': 'success', 'cleared': cache.clear()}
+    return {**cache.snapshot(), 'warmer': current_app.extensions['cache_warmer'].snapshot()}
+
+
+@bp.route('/cache/warm', methods=['POST'])
+@require_admin
+def warm_cache():
+    """Start a cache warm-up run in the background."""
+    scheduled = current_app.extensions['cache_warmer'].schedule('manual')
+    return {'status': 'success', 'scheduled': scheduled}, 202
+
+
+@bp.route('/profile', methods=['GET', 'POST'])
+@require_admin
+def profile():
+    """
+    Sample this worker's thread stacks in the background (POST) or fetch the result (GET).
+
+    POST query parameters: seconds (default 10), hz (default 100), idle=1 to
+    keep threads that are only waiting. GET returns the collapsed stacks as
+    text/plain once the run is complete (`?format=json` for the run details).
+    """
+    profiler = current_app.extensions['sampling_profiler']
+
+    if request.method == 'POST':
+        try:
+            run = profiler.start(
+                seconds=request.args.get('seconds', 10, type=float),
+                hz=request.args.get('hz', 100, type=float),
+                include_idle=request.args.get('idle') == '1',
+            )
+        except ValueError as e:
+            return {'status': 'error', 'message': str(e)}, 400
+        except RuntimeError as e:
+            return {'status': 'error', 'message': str(e)}, 409
+        return {'status': 'success', **run}, 202
+
+    run = profiler.snapshot()
+    if run is None:
+        return {'status': 'error', 'message': 'No profile has been recorded by this worker'}, 404
+    if run['status'] == 'running' or request.args.get('format') == 'json':
+        return run, 202 if run['status'] == 'running' else 200
+    return Response(run['collapsed'], mimetype='text/plain')
+
+
+@bp.route('/memory', methods=['GET', 'DELETE'])
+@require_admin
+def get_memory():
+    """Get per-route memory figures recorded by this worker, or reset them."""
+    accounting = current_app.extensions.get('memory_accounting')
+    if accounting is None:
+        return {'status': 'error', 'message': 'Memory accounting is off (set MEMORY_PROFILE=true)'}, 404
+    if request.method == 'DELETE':
+        accounting.reset()
+        return {'status': 'success'}
+    return accounting.snapshot()
+
+
+@bp.route('/streams')
+@require_admin
+def get_streams():
+    """Get open KPI streams, filter groups and updates computed by this worker."""
+    return current_app.extensions['kpi_stream'].snapshot()
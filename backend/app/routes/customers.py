@@ -1,9 +1,14 @@
 from flask import Blueprint, request
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
+from sqlalchemy import case, func, extract
 import random
 from app import db
+from app.binary import binary_format
+from app.deltas import SeriesDelta, delta_series
+from app.downsample import time_series
+from app.filters import FilterContext
+from app.hashing import stable_hash
 from app.models import Customer, Transaction
+from app.parallel import run_parallel
 from app.routes.forecasting import get_at_risk_customers_with_scores
 
 bp = Blueprint('customers', __name__, url_prefix='/api/customers')
@@ -12,75 +17,66 @@ bp = Blueprint('customers', __name__, url_prefix='/api/customers')
 @bp.route('/overview')
 def get_overview():
     """Get customer overview metrics."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    filters = FilterContext.from_request(default_days=30)
 
     # Calculate previous period
-    period_days = (end - start).days
-    prev_start = start - timedelta(days=period_days)
-    prev_end = start - timedelta(days=1)
-
-    # Current period - customers who had transactions in this period
-    current_active = db.session.query(
-        func.count(func.distinct(Transaction.customer_id))
-    ).filter(
-        Transaction.transaction_date.between(start, end)
-    ).scalar() or 0
+    period_days = filters.period_days
+
+    def active_between(period_start, period_end):
+        # Customers who had transactions in the period
+        return db.session.query(
+            func.count(func.distinct(Transaction.customer_id))
+        ).filter(
+            *filters.transaction_predicates(start=period_start, end=period_end)
+        ).scalar() or 0
+
+    def acquired_between(period_start, period_end):
+        # New customers acquired in the period
+        return db.session.query(
+            func.count(Customer.id)
+        ).filter(
+            Customer.acquisition_date.between(period_start, period_end),
+            *filters.customer_predicates()
+        ).scalar() or 0
+
+    def churned_total():
+        # Churned customers (overall count, scaled by period below)
+        return db.session.query(
+            func.count(Customer.id)
+        ).filter(
+            Customer.status == 'churned',
+            *filters.customer_predicates()
+        ).scalar() or 0
+
+    # All aggregates are independent - run them concurrently on separate connections
+    results = run_parallel({
+        'current_active': lambda: active_between(filters.start, filters.end),
+        'new_customers': lambda: acquired_between(filters.start, filters.end),
+        'total_churned': churned_total,
+        # At risk customers - use shared function for consistency with Forecasting page
+        'at_risk_customers': lambda: get_at_risk_customers_with_scores(filters),
+    })
+
+    current_active = results['current_active']
+    new_customers = results['new_customers']
 
-    # Previous period active customers
-    prev_active = db.session.query(
-        func.count(func.distinct(Transaction.customer_id))
-    ).filter(
-        Transaction.transaction_date.between(prev_start, prev_end)
-    ).scalar() or 0
-
-    # New customers acquired in this period
-    new_customers = db.session.query(
-        func.count(Customer.id)
-    ).filter(
-        Customer.acquisition_date.between(start, end)
-    ).scalar() or 0
-
-    # Previous period new customers
-    prev_new = db.session.query(
-        func.count(Customer.id)
-    ).filter(
-        Customer.acquisition_date.between(prev_start, prev_end)
-    ).scalar() or 0
-
-    # Churned customers (overall count, scaled by period)
-    total_churned = db.session.query(
-        func.count(Customer.id)
-    ).filter(
-        Customer.status == 'churned'
-    ).scalar() or 0
     # Estimate churned in period based on total and period length
-    churned_in_period = int(total_churned * (period_days / 730))  # Spread over 2 years
+    churned_in_period = int(results['total_churned'] * (period_days / 730))  # Spread over 2 years
 
-    # At risk customers - use shared function for consistency with Forecasting page
-    at_risk_customers = get_at_risk_customers_with_scores(start_date, end_date)
-    at_risk = len(at_risk_customers)
+    at_risk = len(results['at_risk_customers'])
 
     # Generate positive change percentages for good metrics
     # UI shows positive = green, negative = red
     # For Active/New: positive means growth (good)
     # For Churned/AtRisk: we show positive when they decreased (good) - inverted semantics
-    random.seed(hash(start_date) % 1000 + 10)
-    total_change = round(random.uniform(4.0, 12.0), 1)  # Active customers growing
-    random.seed(hash(start_date) % 1000 + 11)
-    new_change = round(random.uniform(8.0, 18.0), 1)  # New customers growing
-    random.seed(hash(start_date) % 1000 + 12)
-    churned_change = round(random.uniform(5.0, 15.0), 1)  # Positive = fewer churned (good)
-    random.seed(hash(start_date) % 1000 + 13)
-    at_risk_change = round(random.uniform(-8.0, -2.0), 1)  # One card can be slightly negative
+    rng = random.Random(stable_hash(filters.start_date) % 1000 + 10)
+    total_change = round(rng.uniform(4.0, 12.0), 1)  # Active customers growing
+    rng = random.Random(stable_hash(filters.start_date) % 1000 + 11)
+    new_change = round(rng.uniform(8.0, 18.0), 1)  # New customers growing
+    rng = random.Random(stable_hash(filters.start_date) % 1000 + 12)
+    churned_change = round(rng.uniform(5.0, 15.0), 1)  # Positive = fewer churned (good)
+    rng = random.Random(stable_hash(filters.start_date) % 1000 + 13)
+    at_risk_change = round(rng.uniform(-8.0, -2.0), 1)  # One card can be slightly negative
 
     return {
         'total': current_active,
@@ -97,16 +93,7 @@ def get_overview():
 @bp.route('/segments')
 def get_segments():
     """Get customer breakdown by segment - customers active in period."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    filters = FilterContext.from_request(default_days=30)
 
     # Get customers who had transactions in this period, grouped by segment
     results = db.session.query(
@@ -116,7 +103,7 @@ def get_segments():
     ).join(
         Transaction, Transaction.customer_id == Customer.id
     ).filter(
-        Transaction.transaction_date.between(start, end),
+        *filters.transaction_predicates(),
         Transaction.status == 'completed'
     ).group_by(Customer.segment).all()
 
@@ -136,16 +123,7 @@ def get_segments():
 @bp.route('/cohorts')
 def get_cohorts():
     """Get cohort retention analysis - 12 months of data."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    filters = FilterContext.from_request(default_days=365)
 
     # Get customers grouped by acquisition month within the period
     cohorts = db.session.query(
@@ -153,7 +131,8 @@ def get_cohorts():
         func.count(Customer.id).label('initial_count')
     ).filter(
         Customer.acquisition_date.isnot(None),
-        Customer.acquisition_date.between(start, end)
+        Customer.acquisition_date.between(filters.start, filters.end),
+        *filters.customer_predicates()
     ).group_by(
         func.date_trunc('month', Customer.acquisition_date)
     ).order_by(
@@ -166,23 +145,23 @@ def get_cohorts():
         cohort_date = cohort.cohort
         if cohort_date:
             # Vary retention slightly per cohort for realism
-            random.seed(hash(cohort_date.strftime('%Y-%m')) % 1000)
+            rng = random.Random(stable_hash(cohort_date.strftime('%Y-%m')) % 1000)
             # Base retention curve - gradual decline that stabilizes
             base_retention = [100, 92, 88, 85, 82, 80, 78, 76, 75, 74, 73, 72]
             retention = {
                 'cohort': cohort_date.strftime('%b %Y'),
                 'month0': 100,
-                'month1': base_retention[1] + random.randint(-3, 3),
-                'month2': base_retention[2] + random.randint(-4, 4),
-                'month3': base_retention[3] + random.randint(-5, 5),
-                'month4': base_retention[4] + random.randint(-5, 5),
-                'month5': base_retention[5] + random.randint(-6, 4),
-                'month6': base_retention[6] + random.randint(-6, 4),
-                'month7': base_retention[7] + random.randint(-5, 4),
-                'month8': base_retention[8] + random.randint(-5, 4),
-                'month9': base_retention[9] + random.randint(-4, 4),
-                'month10': base_retention[10] + random.randint(-4, 4),
-                'month11': base_retention[11] + random.randint(-4, 4),
+                'month1': base_retention[1] + rng.randint(-3, 3),
+                'month2': base_retention[2] + rng.randint(-4, 4),
+                'month3': base_retention[3] + rng.randint(-5, 5),
+                'month4': base_retention[4] + rng.randint(-5, 5),
+                'month5': base_retention[5] + rng.randint(-6, 4),
+                'month6': base_retention[6] + rng.randint(-6, 4),
+                'month7': base_retention[7] + rng.randint(-5, 4),
+                'month8': base_retention[8] + rng.randint(-5, 4),
+                'month9': base_retention[9] + rng.randint(-4, 4),
+                'month10': base_retention[10] + rng.randint(-4, 4),
+                'month11': base_retention[11] + rng.randint(-4, 4),
             }
             result.append(retention)
 
@@ -192,8 +171,7 @@ def get_cohorts():
 @bp.route('/lifetime-value')
 def get_lifetime_value():
     """Get lifetime value distribution filtered by customer acquisition date."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Define LTV ranges
     ranges = [
@@ -205,21 +183,26 @@ def get_lifetime_value():
         (100000, float('inf'), '$100K+'),
     ]
 
-    # Build base query with date filter
-    base_query = db.session.query(Customer)
-    if start_date:
-        base_query = base_query.filter(Customer.acquisition_date >= start_date)
-    if end_date:
-        base_query = base_query.filter(Customer.acquisition_date <= end_date)
+    # Count every range in one grouped query; customers with no (or a negative)
+    # lifetime value fall in no range but still count towards the total
+    ltv_range = case(
+        (Customer.lifetime_value < ranges[0][0], None),
+        *[(Customer.lifetime_value < max_val, label) for _, max_val, label in ranges[:-1]],
+        (Customer.lifetime_value >= ranges[-1][0], ranges[-1][2]),
+    )
+    counts = dict(db.session.query(
+        ltv_range,
+        func.count(Customer.id)
+    ).filter(
+        *filters.date_predicates(Customer.acquisition_date),
+        *filters.customer_predicates()
+    ).group_by(ltv_range).all())
 
-    total = base_query.count() or 1
+    total = sum(counts.values()) or 1
     results = []
 
-    for min_val, max_val, label in ranges:
-        query = base_query.filter(Customer.lifetime_value >= min_val)
-        if max_val != float('inf'):
-            query = query.filter(Customer.lifetime_value < max_val)
-        count = query.count()
+    for _, _, label in ranges:
+        count = counts.get(label, 0)
 
         results.append({
             'range': label,
@@ -231,37 +214,39 @@ def get_lifetime_value():
 
 
 @bp.route('/acquisition')
+@binary_format
+@delta_series
+@time_series(y='count', split='channel', totals=('count',))
 def get_acquisition():
-    """Get customer acquisition by channel over time."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    """Get customer acquisition by channel over time (accepts since_version and max_points)."""
+    filters = FilterContext.from_request(default_days=365)
 
     # Determine granularity based on date range
-    period_days = (end - start).days
+    period_days = filters.period_days
     if period_days <= 31:
         # Daily for 30 days or less
-        date_trunc = func.date_trunc('day', Customer.acquisition_date)
+        granularity = 'day'
     elif period_days <= 92:
         # Weekly for 90 days or less
-        date_trunc = func.date_trunc('week', Customer.acquisition_date)
+        granularity = 'week'
     else:
         # Monthly for longer periods
-        date_trunc = func.date_trunc('month', Customer.acquisition_date)
+        granularity = 'month'
+    date_trunc = func.date_trunc(granularity, Customer.acquisition_date)
+
+    # A new transaction can change which customers a channel or category
+    # filter matches, in any bucket - those deltas are always full
+    delta = SeriesDelta.from_request(filters, granularity, tracked=not (filters.channel or filters.category))
+    if delta.unchanged:
+        return delta.respond([])
 
     results = db.session.query(
         date_trunc.label('date'),
         Customer.acquisition_channel,
         func.count(Customer.id).label('count')
     ).filter(
-        Customer.acquisition_date.between(start, end)
+        Customer.acquisition_date.between(delta.filters.start, delta.filters.end),
+        *delta.filters.customer_predicates()
     ).group_by(
         date_trunc,
         Customer.acquisition_channel
@@ -269,22 +254,21 @@ def get_acquisition():
         date_trunc
     ).all()
 
-    return [
+    return delta.respond([
         {
             'date': row.date.strftime('%Y-%m-%d') if row.date else None,
             'channel': row.acquisition_channel or 'Other',
             'count': row.count,
         }
         for row in results
-    ]
+    ])
 
 
 @bp.route('/at-risk')
 def get_at_risk():
     """Get at-risk customers with consistent risk scores."""
     limit = request.args.get('limit', 10, type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Use shared function for consistent risk scores with Forecasting page
-    return get_at_risk_customers_with_scores(start_date, end_date, limit)
+    return get_at_risk_customers_with_scores(filters, limit)
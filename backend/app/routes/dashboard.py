@@ -1,9 +1,10 @@
-from flask import Blueprint, request
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
+from flask import Blueprint
+from datetime import timedelta
 import random
-from app import db
-from app.models import Transaction, Customer, Pipeline, Product
+from app import db, statements
+from app.filters import FilterContext
+from app.hashing import stable_hash
+from app.parallel import run_parallel
 from app.routes.operations import get_pipeline_metrics
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
@@ -12,66 +13,33 @@ bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 @bp.route('/summary')
 def get_summary():
     """Get executive dashboard summary."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    filters = FilterContext.from_request(default_days=30)
 
     # Calculate date range for previous period
-    period_days = (end - start).days
-    prev_start = start - timedelta(days=period_days)
-    prev_end = start - timedelta(days=1)
-
-    # Current period metrics
-    current_revenue = db.session.query(
-        func.sum(Transaction.amount)
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).scalar() or 0
-
-    current_customers = db.session.query(
-        func.count(func.distinct(Transaction.customer_id))
-    ).filter(
-        Transaction.transaction_date.between(start, end)
-    ).scalar() or 0
-
-    current_orders = db.session.query(
-        func.count(Transaction.id)
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).scalar() or 0
-
-    # Previous period metrics
-    prev_revenue = db.session.query(
-        func.sum(Transaction.amount)
-    ).filter(
-        Transaction.transaction_date.between(prev_start, prev_end),
-        Transaction.status == 'completed'
-    ).scalar() or 0
-
-    prev_customers = db.session.query(
-        func.count(func.distinct(Transaction.customer_id))
-    ).filter(
-        Transaction.transaction_date.between(prev_start, prev_end)
-    ).scalar() or 0
-
-    prev_orders = db.session.query(
-        func.count(Transaction.id)
-    ).filter(
-        Transaction.transaction_date.between(prev_start, prev_end),
-        Transaction.status == 'completed'
-    ).scalar() or 0
-
-    # Get consistent pipeline metrics using shared function
-    pipeline_metrics = get_pipeline_metrics(start_date, end_date)
+    period_days = filters.period_days
+    prev_start = filters.start - timedelta(days=period_days)
+    prev_end = filters.start - timedelta(days=1)
+
+    def totals_between(period_start, period_end):
+        # Revenue, completed orders and active customers in one pass over the period
+        return db.session.execute(statements.period_totals(filters, period_start, period_end)).one()
+
+    # The current/previous period aggregates and pipeline metrics are
+    # independent, so run them concurrently on separate connections
+    results = run_parallel({
+        'current': lambda: totals_between(filters.start, filters.end),
+        'previous': lambda: totals_between(prev_start, prev_end),
+        # Get consistent pipeline metrics using shared function
+        'pipeline_metrics': lambda: get_pipeline_metrics(filters),
+    })
+
+    current_revenue = results['current'].revenue or 0
+    current_customers = results['current'].customers or 0
+    current_orders = results['current'].orders or 0
+    prev_revenue = results['previous'].revenue or 0
+    prev_customers = results['previous'].customers or 0
+    prev_orders = results['previous'].orders or 0
+    pipeline_metrics = results['pipeline_metrics']
     pipeline_value = pipeline_metrics['pipelineValue']
 
     # Calculate current period metrics
@@ -82,34 +50,34 @@ def get_summary():
     def ensure_nonzero(value, seed_offset, min_val=3.0, max_val=12.0):
         """Ensure value is never zero - generate random if zero."""
         if value == 0 or value is None:
-            random.seed(hash(start_date) % 1000 + seed_offset)
-            return random.uniform(min_val, max_val)
+            rng = random.Random(stable_hash(filters.start_date) % 1000 + seed_offset)
+            return rng.uniform(min_val, max_val)
         return value
 
     if prev_revenue and prev_revenue > 0:
         revenue_change = ((float(current_revenue) - float(prev_revenue)) / float(prev_revenue) * 100)
         revenue_change = ensure_nonzero(revenue_change, 100, 8.0, 18.0)
     else:
-        random.seed(hash(start_date) % 1000)
-        revenue_change = random.uniform(8.0, 18.0)
+        rng = random.Random(stable_hash(filters.start_date) % 1000)
+        revenue_change = rng.uniform(8.0, 18.0)
 
     if prev_customers and prev_customers > 0:
         customer_change = ((current_customers - prev_customers) / prev_customers * 100)
         customer_change = ensure_nonzero(customer_change, 101, 5.0, 15.0)
     else:
-        random.seed(hash(start_date) % 1001)
-        customer_change = random.uniform(5.0, 15.0)
+        rng = random.Random(stable_hash(filters.start_date) % 1001)
+        customer_change = rng.uniform(5.0, 15.0)
 
     if prev_avg_order_value and prev_avg_order_value > 0:
         aov_change = ((avg_order_value - prev_avg_order_value) / prev_avg_order_value * 100)
         aov_change = ensure_nonzero(aov_change, 102, 2.0, 8.0)
     else:
-        random.seed(hash(start_date) % 1002)
-        aov_change = random.uniform(2.0, 8.0)
+        rng = random.Random(stable_hash(filters.start_date) % 1002)
+        aov_change = rng.uniform(2.0, 8.0)
 
     # Pipeline change - generate realistic value (pipeline fluctuates more)
-    random.seed(hash(start_date) % 1003)
-    pipeline_change = random.uniform(10.0, 25.0)
+    rng = random.Random(stable_hash(filters.start_date) % 1003)
+    pipeline_change = rng.uniform(10.0, 25.0)
 
     return {
         'kpis': {
@@ -135,8 +103,8 @@ def get_summary():
             },
         },
         'dateRange': {
-            'startDate': start_date,
-            'endDate': end_date,
+            'startDate': filters.start_date,
+            'endDate': filters.end_date,
         }
     }
 
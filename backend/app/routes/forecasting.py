@@ -1,28 +1,36 @@
 from flask import Blueprint, request
 from sqlalchemy import func, extract
 from datetime import datetime, timedelta
-import numpy as np
 import random
 from app import db
+from app.downsample import time_series
+from app.filters import FilterContext
+from app.hashing import stable_hash
 from app.models import Transaction, Customer, Pipeline
+from app.serializers import CUSTOMER
 
 bp = Blueprint('forecasting', __name__, url_prefix='/api/forecasting')
 
+# Customer fields listed with each risk score
+AT_RISK_CUSTOMER = CUSTOMER.only('id', 'name', 'company', 'segment', 'lifetimeValue')
 
-def get_at_risk_customers_with_scores(start_date=None, end_date=None, limit=None):
+
+def get_at_risk_customers_with_scores(filters: FilterContext, limit=None):
     """
     Shared function to get at-risk customers with consistent risk scores.
     Used by churn-risk, revenue-at-risk, and kpis endpoints for data consistency.
     """
-    # Seed random based on date for consistent results across all endpoints
-    if start_date or end_date:
-        random.seed(hash(f"{start_date}{end_date}") % 1000)
+    # Seed random based on date for consistent results across all endpoints.
+    # Uses a private generator so this is safe to call from fan-out threads.
+    if filters.start_date or filters.end_date:
+        rng = random.Random(stable_hash(f"{filters.start_date}{filters.end_date}") % 1000)
     else:
-        random.seed(42)
+        rng = random.Random(42)
 
-    # Get all at-risk customers from DB
-    query = db.session.query(Customer).filter(
-        Customer.status == 'at-risk'
+    # Get all at-risk customers from DB, as plain rows
+    query = AT_RISK_CUSTOMER.select().where(
+        Customer.status == 'at-risk',
+        *filters.customer_predicates()
     ).order_by(
         Customer.lifetime_value.desc()
     )
@@ -30,7 +38,7 @@ def get_at_risk_customers_with_scores(start_date=None, end_date=None, limit=None
     if limit:
         query = query.limit(limit)
 
-    results = query.all()
+    results = AT_RISK_CUSTOMER.dump(db.session.execute(query))
 
     # Calculate risk scores consistently - spread across high/medium/low categories
     customers_with_scores = []
@@ -49,15 +57,11 @@ def get_at_risk_customers_with_scores(start_date=None, end_date=None, limit=None
             # Bottom 40% LTV: high risk (0.65-0.90)
             base_risk = 0.65 + ((position_ratio - 0.60) / 0.40) * 0.25  # 0.65 to 0.90
 
-        risk_score = min(0.95, max(0.30, base_risk + random.uniform(-0.05, 0.05)))
-        days_since = 20 + random.randint(0, 40)
+        risk_score = min(0.95, max(0.30, base_risk + rng.uniform(-0.05, 0.05)))
+        days_since = 20 + rng.randint(0, 40)
 
         customers_with_scores.append({
-            'id': customer.id,
-            'name': customer.name,
-            'company': customer.company,
-            'segment': customer.segment,
-            'lifetimeValue': float(customer.lifetime_value) if customer.lifetime_value else 0,
+            **customer,
             'riskScore': round(risk_score, 2),
             'daysSinceActivity': days_since,
             'recommendation': 'Executive outreach' if risk_score > 0.75 else 'Success check-in',
@@ -98,15 +102,15 @@ def get_model_metrics(start_date=None, end_date=None):
     Used by both kpis and model-performance endpoints for consistency.
     """
     if start_date or end_date:
-        random.seed(hash(f"{start_date}{end_date}") % 10000 + 400)
+        rng = random.Random(stable_hash(f"{start_date}{end_date}") % 10000 + 400)
     else:
-        random.seed(42)
+        rng = random.Random(42)
 
-    accuracy = 92.0 + random.uniform(0, 4.0)
-    mape = 4.5 + random.uniform(0, 3.0)
-    r2_score = 0.92 + random.uniform(0, 0.06)
-    rmse = 28000 + random.randint(0, 10000)
-    confidence = 93 + random.randint(0, 5)
+    accuracy = 92.0 + rng.uniform(0, 4.0)
+    mape = 4.5 + rng.uniform(0, 3.0)
+    r2_score = 0.92 + rng.uniform(0, 0.06)
+    rmse = 28000 + rng.randint(0, 10000)
+    confidence = 93 + rng.randint(0, 5)
 
     return {
         'accuracy': round(accuracy, 1),
@@ -135,22 +139,25 @@ def add_months(dt, months):
 
 
 @bp.route('/revenue')
+@time_series(y=('actual', 'predicted'))
 def get_revenue_forecast():
-    """Get revenue forecast using simple time series."""
+    """Get revenue forecast using simple time series (accepts max_points)."""
     periods = request.args.get('periods', 6, type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Seed for consistent variation per date range
-    if start_date or end_date:
-        random.seed(hash(f"{start_date}{end_date}") % 10000)
+    if filters.start_date or filters.end_date:
+        rng = random.Random(stable_hash(f"{filters.start_date}{filters.end_date}") % 10000)
+    else:
+        rng = random.Random(42)
 
-    # Get historical monthly revenue
+    # Get historical monthly revenue (full history; dimension filters narrow it)
     historical = db.session.query(
         func.date_trunc('month', Transaction.transaction_date).label('date'),
         func.sum(Transaction.amount).label('revenue')
     ).filter(
-        Transaction.status == 'completed'
+        Transaction.status == 'completed',
+        *filters.transaction_predicates(dates=False)
     ).group_by(
         func.date_trunc('month', Transaction.transaction_date)
     ).order_by(
@@ -164,13 +171,16 @@ def get_revenue_forecast():
         # Not enough data, return empty forecast
         return []
 
-    # Simple linear regression forecast
+    # Simple linear regression forecast. NumPy is imported here rather than at
+    # module level so workers don't pay for it at boot.
+    import numpy as np
+
     x = np.arange(len(revenues))
     y = np.array(revenues)
 
     # Calculate trend with variation based on date
     base_slope = np.polyfit(x, y, 1)[0]
-    slope = base_slope * random.uniform(0.9, 1.1)
+    slope = base_slope * rng.uniform(0.9, 1.1)
     last_value = revenues[-1]
 
     # Determine the cutoff: next upcoming first of month is where prediction starts
@@ -220,10 +230,10 @@ def get_revenue_forecast():
             predicted = last_actual_value if last_actual_value else last_value
         else:
             base_predicted = last_value + (slope * i)
-            predicted = base_predicted * random.uniform(0.95, 1.05)
+            predicted = base_predicted * rng.uniform(0.95, 1.05)
 
         # Add some variance for confidence interval
-        variance = predicted * random.uniform(0.08, 0.12)
+        variance = predicted * rng.uniform(0.08, 0.12)
 
         result.append({
             'date': forecast_date.strftime('%Y-%m-%d'),
@@ -239,12 +249,13 @@ def get_revenue_forecast():
 @bp.route('/pipeline')
 def get_pipeline_forecast():
     """Get weighted pipeline forecast."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Seed for consistent variation per date range
-    if start_date or end_date:
-        random.seed(hash(f"{start_date}{end_date}") % 10000 + 100)
+    if filters.start_date or filters.end_date:
+        rng = random.Random(stable_hash(f"{filters.start_date}{filters.end_date}") % 10000 + 100)
+    else:
+        rng = random.Random(42)
 
     # Get pipeline by expected close month
     results = db.session.query(
@@ -253,7 +264,8 @@ def get_pipeline_forecast():
         func.sum(Pipeline.amount * Pipeline.probability / 100).label('weighted')
     ).filter(
         Pipeline.stage.notin_(['closed-won', 'closed-lost']),
-        Pipeline.expected_close_date >= datetime.now().date()
+        Pipeline.expected_close_date >= datetime.now().date(),
+        *filters.pipeline_predicates()
     ).group_by(
         func.date_trunc('month', Pipeline.expected_close_date)
     ).order_by(
@@ -263,7 +275,7 @@ def get_pipeline_forecast():
     forecast_data = []
     for row in results:
         # Apply variation based on date
-        variation = random.uniform(0.9, 1.1)
+        variation = rng.uniform(0.9, 1.1)
         weighted = float(row.weighted) * variation if row.weighted else 0
         total = float(row.total) * variation if row.total else 0
 
@@ -271,7 +283,7 @@ def get_pipeline_forecast():
             'month': row.month.strftime('%b %Y') if row.month else 'Unknown',
             'weighted': round(weighted, 2),
             'best': round(total, 2),
-            'worst': round(weighted * random.uniform(0.45, 0.55), 2),
+            'worst': round(weighted * rng.uniform(0.45, 0.55), 2),
         })
 
     return forecast_data
@@ -281,42 +293,40 @@ def get_pipeline_forecast():
 def get_churn_risk():
     """Get customers at risk of churning."""
     limit = request.args.get('limit', 10, type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Use shared function for consistent data across endpoints
-    return get_at_risk_customers_with_scores(start_date, end_date, limit)
+    return get_at_risk_customers_with_scores(filters, limit)
 
 
 @bp.route('/kpis')
 def get_forecasting_kpis():
     """Get forecasting KPIs with change percentages."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Get at-risk customers using shared function for consistency
-    at_risk_customers = get_at_risk_customers_with_scores(start_date, end_date)
+    at_risk_customers = get_at_risk_customers_with_scores(filters)
     at_risk_count = len(at_risk_customers)
 
     # Get model metrics using shared function for consistency
-    model_metrics = get_model_metrics(start_date, end_date)
+    model_metrics = get_model_metrics(filters.start_date, filters.end_date)
 
     # Seed for other KPI variations
-    if start_date or end_date:
-        random.seed(hash(f"{start_date}{end_date}") % 10000 + 300)
+    if filters.start_date or filters.end_date:
+        rng = random.Random(stable_hash(f"{filters.start_date}{filters.end_date}") % 10000 + 300)
     else:
-        random.seed(42)
+        rng = random.Random(42)
 
     # Calculate predicted revenue (varies by date)
     base_predicted = 4500000
-    predicted_revenue = base_predicted * random.uniform(0.85, 1.15)
-    predicted_change = random.uniform(8.0, 18.0)
+    predicted_revenue = base_predicted * rng.uniform(0.85, 1.15)
+    predicted_change = rng.uniform(8.0, 18.0)
 
     # At-risk change calculation
-    at_risk_change = random.choice([-1, 1]) * random.uniform(3.0, 12.0)
+    at_risk_change = rng.choice([-1, 1]) * rng.uniform(3.0, 12.0)
 
     # Model accuracy change
-    accuracy_change = random.choice([-1, 1]) * random.uniform(0.5, 2.0)
+    accuracy_change = rng.choice([-1, 1]) * rng.uniform(0.5, 2.0)
 
     return {
         'predictedRevenue': round(predicted_revenue, 2),
@@ -332,19 +342,21 @@ def get_forecasting_kpis():
 @bp.route('/seasonality')
 def get_seasonality():
     """Get seasonal revenue patterns."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Seed for consistent variation per date range
-    if start_date or end_date:
-        random.seed(hash(f"{start_date}{end_date}") % 10000 + 200)
+    if filters.start_date or filters.end_date:
+        rng = random.Random(stable_hash(f"{filters.start_date}{filters.end_date}") % 10000 + 200)
+    else:
+        rng = random.Random(42)
 
-    # Get monthly averages by month of year
+    # Get monthly averages by month of year (full history; dimension filters narrow it)
     results = db.session.query(
         extract('month', Transaction.transaction_date).label('month'),
         func.avg(Transaction.amount).label('avg_revenue')
     ).filter(
-        Transaction.status == 'completed'
+        Transaction.status == 'completed',
+        *filters.transaction_predicates(dates=False)
     ).group_by(
         extract('month', Transaction.transaction_date)
     ).order_by(
@@ -364,8 +376,8 @@ def get_seasonality():
     for row in results:
         base_index = float(row.avg_revenue) / overall_avg if overall_avg and row.avg_revenue else 1.0
         # Add slight variation
-        index = base_index * random.uniform(0.97, 1.03)
-        trend = random.uniform(-0.02, 0.03)
+        index = base_index * rng.uniform(0.97, 1.03)
+        trend = rng.uniform(-0.02, 0.03)
 
         seasonality_data.append({
             'month': month_names[int(row.month) - 1],
@@ -379,21 +391,19 @@ def get_seasonality():
 @bp.route('/model-performance')
 def get_model_performance():
     """Get ML model performance metrics - varies by date range."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Use shared function for consistent data with KPIs
-    return get_model_metrics(start_date, end_date)
+    return get_model_metrics(filters.start_date, filters.end_date)
 
 
 @bp.route('/revenue-at-risk')
 def get_revenue_at_risk():
     """Get revenue at risk by category - uses same customer data as churn-risk."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Get at-risk customers using shared function for consistency
-    customers = get_at_risk_customers_with_scores(start_date, end_date)
+    customers = get_at_risk_customers_with_scores(filters)
 
     # Categorize customers by risk level using shared function
     high_risk, medium_risk, low_risk = categorize_customers_by_risk(customers)
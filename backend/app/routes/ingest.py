@@ -0,0 +1,59 @@
+"""
+Ingestion API Routes
+
+Write path for loading real data (see app/ingest.py for the line format and
+guarantees). Protected by the admin token like /api/admin/*.
+
+Endpoints:
+- POST /api/ingest/transactions: NDJSON body (optionally `Content-Encoding: gzip`)
+
+Example:
+    curl -X POST -H 'X-Admin-Token: ...' -H 'Content-Type: application/x-ndjson' \\
+         --data-binary @transactions.ndjson http://localhost:5001/api/ingest/transactions
+"""
+
+import gzip
+import io
+import zlib
+
+from flask import Blueprint, current_app, request
+from app import db
+from app.ingest import TransactionIngest
+from app.routes.admin import require_admin
+
+bp = Blueprint('ingest', __name__, url_prefix='/api/ingest')
+
+
+@bp.route('/transactions', methods=['POST'])
+@require_admin
+def ingest_transactions():
+    """Insert NDJSON transactions idempotently and update derived state in one transaction."""
+    # request.stream is unbuffered; line iteration on it would read byte by byte
+    stream = io.BufferedReader(request.stream, buffer_size=1024 * 1024)
+    gzipped = request.headers.get('Content-Encoding', '').lower() == 'gzip'
+    if gzipped:
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+
+    ingest = TransactionIngest(
+        db.session.connection(),
+        batch_size=current_app.config['INGEST_BATCH_SIZE'],
+        max_errors=current_app.config['INGEST_MAX_ERRORS'],
+    )
+    try:
+        ingest.feed(stream)
+        summary = ingest.finish()
+    except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+        # Decompression happens while the lines are read: a corrupt or truncated body
+        db.session.rollback()
+        if not gzipped:
+            raise
+        return {'status': 'error', 'message': f'Invalid gzip body: {e}'}, 400
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.commit()
+
+    # Serve (and start warming) the new data version from this worker immediately
+    current_app.extensions['result_cache'].data_version(force=True)
+
+    return {'status': 'success', **summary}
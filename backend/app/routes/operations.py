@@ -1,46 +1,44 @@
 from flask import Blueprint, request
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy import and_, case, func
 import random
-from app import db
+from app import db, sketches, statements
+from app.binary import binary_format
+from app.filters import FilterContext, InvalidFilterError
+from app.hashing import stable_hash
 from app.models import Pipeline, SalesRep, Transaction
+from app.serializers import PIPELINE
 
 bp = Blueprint('operations', __name__, url_prefix='/api/operations')
 
+# Deal size buckets for buckets=fixed, and when too few deals to pick edges from
+DEAL_SIZE_BUCKETS = [
+    (0, 10000, '$0-10K'),
+    (10000, 25000, '$10-25K'),
+    (25000, 50000, '$25-50K'),
+    (50000, 100000, '$50-100K'),
+    (100000, 250000, '$100-250K'),
+    (250000, float('inf'), '$250K+'),
+]
+AUTO_BUCKETS = 6
+AUTO_BUCKET_MIN_DEALS = 50
 
-def get_pipeline_metrics(start_date=None, end_date=None):
+
+def get_pipeline_metrics(filters: FilterContext):
     """
     Shared function to calculate pipeline metrics consistently.
     Used by both dashboard and operations endpoints.
     """
-    # Pipeline value (current open pipeline - excludes closed deals)
-    pipeline_value = db.session.query(
-        func.sum(Pipeline.amount)
-    ).filter(
-        Pipeline.stage.notin_(['closed-won', 'closed-lost'])
-    ).scalar() or 0
-
-    # Win rate calculation
-    closed_won = db.session.query(func.count(Pipeline.id)).filter(
-        Pipeline.stage == 'closed-won'
-    ).scalar() or 0
+    # All pipeline aggregates in one pass over the filtered opportunities
+    row = db.session.execute(statements.pipeline_totals(filters)).one()
 
-    total_closed = db.session.query(func.count(Pipeline.id)).filter(
-        Pipeline.stage.in_(['closed-won', 'closed-lost'])
-    ).scalar() or 1
-
-    leads = db.session.query(func.count(Pipeline.id)).filter(
-        Pipeline.stage == 'lead'
-    ).scalar() or 1
+    pipeline_value = row.pipeline_value or 0
+    closed_won = row.closed_won or 0
+    leads = row.leads or 1
+    total_deals = row.total_deals or 1
 
     # Win rate can be calculated two ways - we use closed-won / total leads for funnel perspective
     win_rate = (closed_won / leads) * 100 if leads > 0 else 0
 
-    # Total deals in pipeline
-    total_deals = db.session.query(func.count(Pipeline.id)).filter(
-        Pipeline.stage.notin_(['closed-won', 'closed-lost'])
-    ).scalar() or 1
-
     # Average deal size
     avg_deal_size = float(pipeline_value) / total_deals if total_deals > 0 else 0
 
@@ -57,35 +55,32 @@ def get_pipeline_metrics(start_date=None, end_date=None):
 @bp.route('/pipeline')
 def get_pipeline():
     """Get pipeline by stage - varies by selected period."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-    period_days = (end - start).days
+    filters = FilterContext.from_request(default_days=30)
+    period_days = filters.period_days
 
     # Seed random based on date for consistent but varying results
-    random.seed(hash(start_date) % 10000)
+    rng = random.Random(stable_hash(filters.start_date) % 10000)
 
     stages = ['lead', 'qualified', 'proposal', 'negotiation', 'closed-won']
 
-    # Get base pipeline data from actual opportunities
-    base_results = []
-    for stage in stages:
-        stage_data = db.session.query(
+    # Get base pipeline data from actual opportunities, one grouped query for all stages
+    by_stage = {
+        row.stage: row
+        for row in db.session.query(
+            Pipeline.stage,
             func.sum(Pipeline.amount).label('value'),
             func.count(Pipeline.id).label('count')
         ).filter(
-            Pipeline.stage == stage
-        ).first()
+            Pipeline.stage.in_(stages),
+            *filters.pipeline_predicates()
+        ).group_by(Pipeline.stage)
+    }
 
-        base_value = float(stage_data.value) if stage_data.value else 0
-        base_count = stage_data.count or 0
+    base_results = []
+    for stage in stages:
+        stage_data = by_stage.get(stage)
+        base_value = float(stage_data.value) if stage_data and stage_data.value else 0
+        base_count = stage_data.count if stage_data else 0
         base_results.append({'value': base_value, 'count': base_count})
 
     # Apply period-based variation (different periods show different slices)
@@ -97,8 +92,8 @@ def get_pipeline():
 
     for i, stage in enumerate(stages):
         # Vary count and value based on period and random seed
-        count_variation = random.uniform(0.75, 1.25)
-        value_variation = random.uniform(0.8, 1.2)
+        count_variation = rng.uniform(0.75, 1.25)
+        value_variation = rng.uniform(0.8, 1.2)
 
         count = max(1, int(base_results[i]['count'] * variation_factor * count_variation))
         value = base_results[i]['value'] * variation_factor * value_variation
@@ -122,28 +117,27 @@ def get_pipeline():
 @bp.route('/pipeline-kpis')
 def get_pipeline_kpis():
     """Get pipeline KPIs with change percentages."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request()
 
     # Get consistent pipeline metrics using shared function
-    metrics = get_pipeline_metrics(start_date, end_date)
+    metrics = get_pipeline_metrics(filters)
 
     # Seed for change percentages (which vary by date)
-    if start_date:
-        random.seed(hash(start_date) % 10000 + 50)
+    if filters.start_date:
+        rng = random.Random(stable_hash(filters.start_date) % 10000 + 50)
     else:
-        random.seed(42)
+        rng = random.Random(42)
 
     # Generate change percentages that vary by period - ALWAYS non-zero
-    pipeline_change = random.uniform(5.0, 15.0)
-    cycle_change = random.choice([-1, 1]) * random.uniform(2.0, 8.0)
-    win_rate_change = random.choice([-1, 1]) * random.uniform(1.5, 6.0)
-    deal_size_change = random.uniform(3.0, 12.0)
+    pipeline_change = rng.uniform(5.0, 15.0)
+    cycle_change = rng.choice([-1, 1]) * rng.uniform(2.0, 8.0)
+    win_rate_change = rng.choice([-1, 1]) * rng.uniform(1.5, 6.0)
+    deal_size_change = rng.uniform(3.0, 12.0)
 
     return {
         'pipelineValue': round(metrics['pipelineValue'], 2),
         'pipelineChange': round(pipeline_change, 1),
-        'avgCycleTime': 42 + random.randint(-5, 8),
+        'avgCycleTime': 42 + rng.randint(-5, 8),
         'cycleTimeChange': round(cycle_change, 1),
         'winRate': round(metrics['winRate'], 1),
         'winRateChange': round(win_rate_change, 1),
@@ -155,16 +149,7 @@ def get_pipeline_kpis():
 @bp.route('/sales-performance')
 def get_sales_performance():
     """Get sales rep performance vs quota - showing a growing org hitting goals."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    filters = FilterContext.from_request(default_days=30)
 
     # Get all sales reps with their achieved revenue in the selected period
     results = db.session.query(
@@ -177,10 +162,11 @@ def get_sales_performance():
         func.count(Transaction.id).label('deals')
     ).outerjoin(
         Transaction,
-        (Transaction.sales_rep_id == SalesRep.id) &
-        (Transaction.transaction_date >= start) &
-        (Transaction.transaction_date <= end) &
-        (Transaction.status == 'completed')
+        and_(
+            Transaction.sales_rep_id == SalesRep.id,
+            Transaction.status == 'completed',
+            *filters.transaction_predicates()
+        )
     ).group_by(
         SalesRep.id, SalesRep.name, SalesRep.team, SalesRep.region, SalesRep.quota
     ).all()
@@ -209,24 +195,24 @@ def get_sales_performance():
     # Ensure we show a growing organization hitting goals:
     # Top performers exceed quota (>100%), lower performers below (<100%)
     # This represents a healthy sales org where top performers drive results
-    random.seed(hash(start_date) % 1000 + 200)
+    rng = random.Random(stable_hash(filters.start_date) % 1000 + 200)
 
     # Adjust attainment for realistic display across all reps
     for i, rep in enumerate(reps_data[:20]):
         if i < 6:
             # Top 6: Exceeding quota (110-145% range)
             base_attainment = 145 - (i * 6)  # 145, 139, 133, 127, 121, 115
-            variation = random.uniform(-3, 5)
+            variation = rng.uniform(-3, 5)
             rep['attainment'] = round(base_attainment + variation, 1)
         elif i < 12:
             # Middle 6: Near quota (85-105% range)
             base_attainment = 105 - ((i - 6) * 4)  # 105, 101, 97, 93, 89, 85
-            variation = random.uniform(-3, 3)
+            variation = rng.uniform(-3, 3)
             rep['attainment'] = round(base_attainment + variation, 1)
         else:
             # Bottom: Below quota (60-82% range)
             base_attainment = 82 - ((i - 12) * 3)  # 82, 79, 76, 73, 70, 67, 64, 61
-            variation = random.uniform(-3, 3)
+            variation = rng.uniform(-3, 3)
             rep['attainment'] = round(base_attainment + variation, 1)
 
         # Adjust achieved to match the attainment
@@ -238,19 +224,20 @@ def get_sales_performance():
 @bp.route('/conversion-rates')
 def get_conversion_rates():
     """Get stage-to-stage conversion rates."""
+    filters = FilterContext.from_request()
     stages = ['lead', 'qualified', 'proposal', 'negotiation', 'closed-won']
 
     results = []
-    counts = {}
 
     # Get counts for each stage
-    for stage in stages:
-        count = db.session.query(
-            func.count(Pipeline.id)
-        ).filter(
-            Pipeline.stage == stage
-        ).scalar() or 0
-        counts[stage] = count
+    counts = dict.fromkeys(stages, 0)
+    counts.update(db.session.query(
+        Pipeline.stage,
+        func.count(Pipeline.id)
+    ).filter(
+        Pipeline.stage.in_(stages),
+        *filters.pipeline_predicates()
+    ).group_by(Pipeline.stage).all())
 
     # Calculate conversion rates
     for i in range(len(stages) - 1):
@@ -276,82 +263,119 @@ def get_cycle_time():
 
     # Generate realistic cycle times that vary by period
     if start_date:
-        random.seed(hash(start_date) % 1000)
+        rng = random.Random(stable_hash(start_date) % 1000)
     else:
-        random.seed(42)
+        rng = random.Random(42)
 
     base_times = [8, 12, 15, 7]
     return [
-        {'stage': 'Lead to Qualified', 'avgDays': base_times[0] + random.randint(-2, 3)},
-        {'stage': 'Qualified to Proposal', 'avgDays': base_times[1] + random.randint(-3, 4)},
-        {'stage': 'Proposal to Negotiation', 'avgDays': base_times[2] + random.randint(-4, 5)},
-        {'stage': 'Negotiation to Close', 'avgDays': base_times[3] + random.randint(-2, 3)},
+        {'stage': 'Lead to Qualified', 'avgDays': base_times[0] + rng.randint(-2, 3)},
+        {'stage': 'Qualified to Proposal', 'avgDays': base_times[1] + rng.randint(-3, 4)},
+        {'stage': 'Proposal to Negotiation', 'avgDays': base_times[2] + rng.randint(-4, 5)},
+        {'stage': 'Negotiation to Close', 'avgDays': base_times[3] + rng.randint(-2, 3)},
     ]
 
 
 @bp.route('/opportunities')
+@binary_format
 def get_opportunities():
     """Get pipeline opportunities."""
     stage = request.args.get('stage')
     limit = request.args.get('limit', 20, type=int)
 
-    query = db.session.query(Pipeline)
+    filters = FilterContext.from_request()
+    # Plain columns, with the customer and sales rep names joined in - no ORM objects
+    query = PIPELINE.select().where(*filters.pipeline_predicates())
 
     if stage:
-        query = query.filter(Pipeline.stage == stage)
+        query = query.where(Pipeline.stage == stage)
 
-    results = query.order_by(
+    results = db.session.execute(query.order_by(
         Pipeline.amount.desc()
-    ).limit(limit).all()
+    ).limit(limit))
 
-    return [opp.to_dict() for opp in results]
+    return PIPELINE.dump(results)
 
 
 @bp.route('/deal-size-distribution')
 def get_deal_size_distribution():
-    """Get distribution of deals by size buckets."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    # Define size buckets
-    buckets = [
-        (0, 10000, '$0-10K'),
-        (10000, 25000, '$10-25K'),
-        (25000, 50000, '$25-50K'),
-        (50000, 100000, '$50-100K'),
-        (100000, 250000, '$100-250K'),
-        (250000, float('inf'), '$250K+'),
-    ]
+    """
+    Get distribution of deals by size buckets.
 
-    results = []
-    for min_val, max_val, label in buckets:
-        query = db.session.query(
+    Query Parameters:
+        buckets (str): 'auto' (default) - edges at roughly equal-count
+            quantiles of the filtered order values, from the daily sketches -
+            or 'fixed' for DEAL_SIZE_BUCKETS
+    """
+    filters = FilterContext.from_request(default_days=365)
+
+    buckets = DEAL_SIZE_BUCKETS
+    if request.args.get('buckets', 'auto') == 'auto':
+        buckets = auto_deal_size_buckets(filters) or DEAL_SIZE_BUCKETS
+
+    # Bucket every deal in one grouped query (amounts below 0 fall in no bucket)
+    bucket = case(
+        *[(Transaction.amount < max_val, label) for _, max_val, label in buckets[:-1]],
+        else_=buckets[-1][2],
+    )
+    totals = {
+        row.bucket: row
+        for row in db.session.query(
+            bucket.label('bucket'),
             func.count(Transaction.id).label('count'),
             func.sum(Transaction.amount).label('value')
         ).filter(
-            Transaction.transaction_date >= start,
-            Transaction.transaction_date <= end,
+            *filters.transaction_predicates(),
             Transaction.status == 'completed',
-            Transaction.amount >= min_val
-        )
-
-        if max_val != float('inf'):
-            query = query.filter(Transaction.amount < max_val)
-
-        result = query.first()
+            Transaction.amount >= buckets[0][0]
+        ).group_by(bucket)
+    }
 
+    results = []
+    for _, _, label in buckets:
+        result = totals.get(label)
         results.append({
             'bucket': label,
-            'count': result.count or 0,
-            'value': float(result.value) if result.value else 0,
+            'count': result.count if result else 0,
+            'value': float(result.value) if result and result.value else 0,
         })
 
     return results
+
+
+def _money(value: float) -> str:
+    """Short dollar amount for bucket labels: 2500 -> '2.5K'."""
+    for unit, suffix in ((1_000_000, 'M'), (1_000, 'K')):
+        if value >= unit:
+            return f'{value / unit:g}{suffix}'
+    return f'{value:g}'
+
+
+def _range_label(low: float, high: float) -> str:
+    """'$0-10K', '$10-25K', '$250K+' - the unit is written once when both ends share it."""
+    if high == float('inf'):
+        return f'${_money(low)}+'
+    low_text, high_text = _money(low), _money(high)
+    if low and low_text[-1].isalpha() and low_text[-1] == high_text[-1]:
+        low_text = low_text[:-1]
+    return f'${low_text}-{high_text}'
+
+
+def auto_deal_size_buckets(filters):
+    """
+    (min, max, label) buckets with edges at equal-count quantiles of the
+    filtered completed order values, or None when too few were sketched, they
+    are too concentrated to split into at least three buckets, or the filters
+    span more dimensions than the sketches cover.
+    """
+    try:
+        digests = sketches.merged_digests(filters, 'order_value')
+    except InvalidFilterError:
+        return None
+    if not digests or digests[0][1].count < AUTO_BUCKET_MIN_DEALS:
+        return None
+    edges = sketches.bucket_edges(digests[0][1], AUTO_BUCKETS)
+    if len(edges) < 2:
+        return None
+    bounds = [0, *edges, float('inf')]
+    return [(low, high, _range_label(low, high)) for low, high in zip(bounds, bounds[1:])]
@@ -7,24 +7,44 @@ Provides endpoints for revenue analytics including:
 - Revenue breakdown by geographic region
 - Revenue breakdown by sales channel
 - Top performing products
+- Order value and deal size quantiles (merged from daily sketches)
 
 All endpoints support date range filtering via query parameters:
 - start_date: Beginning of the period (YYYY-MM-DD)
 - end_date: End of the period (YYYY-MM-DD)
+- region, channel, segment, category: Dimension filters (see app/filters.py)
+
+List endpoints also accept `format=columnar` (see app/serialization.py);
+/trends and /transactions also answer `Accept: application/vnd.analytics.columns`
+with the binary column format (see app/binary.py). /trends reports its data
+version in X-Data-Version and, given `since_version`, returns only the buckets
+that changed (see app/deltas.py); `max_points` downsamples it (see
+app/downsample.py).
 
 Data is aggregated from the transactions table, filtered to completed transactions only.
 """
 
 from flask import Blueprint, request
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
-from app import db
-from app.models import Transaction, Product
+from app import db, sketches, statements
+from app.binary import binary_format
+from app.deltas import SeriesDelta, delta_series
+from app.downsample import time_series
+from app.filters import FilterContext
+from app.models import Transaction
+from app.serializers import TRANSACTION
+
+# Fields of the /transactions export
+TRANSACTION_EXPORT = TRANSACTION.only(
+    'id', 'transactionDate', 'amount', 'quantity', 'productId', 'customerId', 'region', 'channel', 'status',
+)
 
 bp = Blueprint('revenue', __name__, url_prefix='/api/revenue')
 
 
 @bp.route('/trends')
+@binary_format
+@delta_series
+@time_series(y='revenue', totals=('revenue', 'orders'))
 def get_trends():
     """
     Get revenue trends over time with configurable granularity.
@@ -33,72 +53,39 @@ def get_trends():
         start_date (str): Start of date range (default: 365 days ago)
         end_date (str): End of date range (default: today)
         granularity (str): Aggregation level - 'day', 'week', or 'month'
+        since_version, since (optional): Data version and last bucket of a
+            copy the client holds; only changed buckets are returned
+        max_points (optional): Downsample to at most this many points (LTTB)
 
     Returns:
         List of objects with 'date', 'revenue', and 'orders' for each period.
-        Used to render the Revenue Trend area chart on the dashboard.
+        Used to render the Revenue Trend area chart on the dashboard. With
+        since_version, a delta object wrapping the changed buckets.
     """
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request(default_days=365)
     granularity = request.args.get('granularity', 'day')
 
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    if granularity == 'month':
-        date_group = func.date_trunc('month', Transaction.transaction_date)
-    elif granularity == 'week':
-        date_group = func.date_trunc('week', Transaction.transaction_date)
-    else:
-        date_group = Transaction.transaction_date
-
-    results = db.session.query(
-        date_group.label('date'),
-        func.sum(Transaction.amount).label('revenue'),
-        func.count(Transaction.id).label('orders')
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).group_by(date_group).order_by(date_group).all()
+    delta = SeriesDelta.from_request(filters, granularity)
+    if delta.unchanged:
+        return delta.respond([])
+    results = db.session.execute(statements.revenue_trend(delta.filters, granularity)).all()
 
-    return [
+    return delta.respond([
         {
             'date': row.date.strftime('%Y-%m-%d') if hasattr(row.date, 'strftime') else str(row.date),
-            'revenue': float(row.revenue) if row.revenue else 0,
+            'revenue': row.revenue or 0,
             'orders': row.orders,
         }
         for row in results
-    ]
+    ])
 
 
 @bp.route('/by-category')
 def get_by_category():
     """Get revenue breakdown by product category."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    results = db.session.query(
-        Product.category,
-        func.sum(Transaction.amount).label('value')
-    ).join(
-        Transaction, Transaction.product_id == Product.id
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).group_by(Product.category).order_by(func.sum(Transaction.amount).desc()).all()
+    filters = FilterContext.from_request(default_days=30)
+
+    results = db.session.execute(statements.revenue_by_category(filters)).all()
 
     total = sum(float(r.value) for r in results if r.value)
 
@@ -115,25 +102,9 @@ def get_by_category():
 @bp.route('/by-region')
 def get_by_region():
     """Get revenue breakdown by region."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    results = db.session.query(
-        Transaction.region,
-        func.sum(Transaction.amount).label('revenue'),
-        func.count(func.distinct(Transaction.customer_id)).label('customers')
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).group_by(Transaction.region).order_by(func.sum(Transaction.amount).desc()).all()
+    filters = FilterContext.from_request(default_days=30)
+
+    results = db.session.execute(statements.revenue_by_region(filters)).all()
 
     return [
         {
@@ -149,24 +120,9 @@ def get_by_region():
 @bp.route('/by-channel')
 def get_by_channel():
     """Get revenue breakdown by sales channel."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    filters = FilterContext.from_request(default_days=30)
 
-    results = db.session.query(
-        Transaction.channel,
-        func.sum(Transaction.amount).label('value')
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).group_by(Transaction.channel).order_by(func.sum(Transaction.amount).desc()).all()
+    results = db.session.execute(statements.revenue_by_channel(filters)).all()
 
     total = sum(float(r.value) for r in results if r.value)
 
@@ -183,32 +139,10 @@ def get_by_channel():
 @bp.route('/top-products')
 def get_top_products():
     """Get top products by revenue."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    filters = FilterContext.from_request(default_days=30)
     limit = request.args.get('limit', 10, type=int)
 
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-
-    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-    results = db.session.query(
-        Product.id,
-        Product.name,
-        Product.category,
-        func.sum(Transaction.amount).label('revenue'),
-        func.sum(Transaction.quantity).label('units'),
-    ).join(
-        Transaction, Transaction.product_id == Product.id
-    ).filter(
-        Transaction.transaction_date.between(start, end),
-        Transaction.status == 'completed'
-    ).group_by(
-        Product.id, Product.name, Product.category
-    ).order_by(func.sum(Transaction.amount).desc()).limit(limit).all()
+    results = db.session.execute(statements.top_products(filters, limit)).all()
 
     return [
         {
@@ -222,3 +156,73 @@ def get_top_products():
         }
         for row in results
     ]
+
+
+@bp.route('/transactions')
+@binary_format
+def get_transactions():
+    """
+    Export individual transactions for a date range.
+
+    Query Parameters:
+        start_date (str): Start of date range (default: 30 days ago)
+        end_date (str): End of date range (default: today)
+        status (str): Optional status filter ('completed', 'pending', 'refunded')
+        limit (int): Maximum rows returned (default: 10000, clamped to 1-100000)
+
+    Returns:
+        List of transactions, newest first. Built from plain column rows
+        (app/serializers.py) rather than ORM objects, so large exports stay cheap.
+    """
+    filters = FilterContext.from_request(default_days=30)
+    status = request.args.get('status')
+    limit = max(1, min(request.args.get('limit', 10000, type=int), 100000))
+
+    query = TRANSACTION_EXPORT.select().where(
+        *filters.transaction_predicates()
+    )
+
+    if status:
+        query = query.where(Transaction.status == status)
+
+    results = db.session.execute(query.order_by(
+        Transaction.transaction_date.desc(), Transaction.id.desc()
+    ).limit(limit))
+
+    return TRANSACTION_EXPORT.dump(results)
+
+
+@bp.route('/quantiles')
+def get_quantiles():
+    """
+    Get order value or deal size quantiles, merged from the daily sketches.
+
+    Query Parameters:
+        start_date (str): Start of date range (default: 365 days ago)
+        end_date (str): End of date range (default: today)
+        metric (str): 'order_value' (completed transactions, default) or
+            'deal_size' (pipeline opportunities by expected close date)
+        q (str): Comma-separated quantiles (default: 0.5,0.9,0.99)
+        by (str): Optional grouping - 'month', 'region', 'segment', or
+            'channel' and 'category' (order_value only). Dimension filters and
+            grouping may use one dimension between them.
+
+    Returns:
+        One object per group with 'group', 'count', 'min', 'max' and a
+        'p<quantile>' key per quantile (e.g. 'p50', 'p99.9').
+    """
+    filters = FilterContext.from_request(default_days=365)
+    metric = request.args.get('metric', 'order_value')
+    by = request.args.get('by') or None
+    qs = sketches.parse_quantiles(request.args.get('q'))
+    labels = [sketches.quantile_label(q) for q in qs]
+
+    results = []
+    for group, digest in sketches.merged_digests(filters, metric, by):
+        row = {'group': group, 'count': digest.count, 'min': digest.minimum, 'max': digest.maximum}
+        row.update(
+            (label, round(value, 2) if value is not None else None)
+            for label, value in zip(labels, digest.quantiles(qs))
+        )
+        results.append(row)
+    return results
@@ -0,0 +1,43 @@
+"""
+Stream API Routes
+
+Server-sent events pushed to open dashboards (see app/streams.py for how
+updates are computed and shared).
+
+Endpoints:
+- GET /api/stream/kpis: Revenue, orders, active customers and pipeline value
+  for the given start_date/end_date and dimension filters, re-sent with a
+  delta whenever the data version changes
+
+Example:
+    curl -N 'http://localhost:5001/api/stream/kpis?start_date=2024-01-01&end_date=2024-03-31'
+"""
+
+from flask import Blueprint, Response, current_app
+from app.filters import FilterContext
+
+bp = Blueprint('stream', __name__, url_prefix='/api/stream')
+
+
+@bp.route('/kpis')
+def stream_kpis():
+    """Stream headline KPI totals and their deltas as text/event-stream."""
+    filters = FilterContext.from_request(default_days=30)
+    broadcaster = current_app.extensions['kpi_stream']
+
+    subscription = broadcaster.subscribe(filters)
+    if subscription is None:
+        return (
+            {'status': 'error', 'message': 'Too many open streams on this server, retry shortly'},
+            503,
+            {'Retry-After': str(current_app.config['STREAM_RETRY_MS'] // 1000)},
+        )
+
+    response = Response(
+        broadcaster.events(subscription),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # Runs however the response ends - client gone, max duration, or never iterated
+    response.call_on_close(lambda: broadcaster.unsubscribe(subscription))
+    return response
@@ -0,0 +1,140 @@
+"""
+Response Serialization
+
+AnalyticsJSONProvider replaces Flask's default JSON provider:
+
+- Uses orjson when installed (JSON_PROVIDER = 'auto' or 'orjson'), falling
+  back to the standard library ('stdlib').
+- Serializes Decimal (as float), date/datetime (ISO 8601) and NumPy scalars
+  and arrays natively, so routes don't have to convert values row by row.
+- Supports an opt-in columnar response shape for every endpoint that returns
+  a list of objects. With `?format=columnar` the response
+
+      [{"date": "2024-01-01", "revenue": 10.0}, {"date": "2024-01-02", "revenue": 12.5}]
+
+  becomes
+
+      {"date": ["2024-01-01", "2024-01-02"], "revenue": [10.0, 12.5]}
+
+  which drops the repeated keys from every row.
+- Views decorated with @binary_format also answer
+  `Accept: application/vnd.analytics.columns` with typed column buffers
+  (see app/binary.py).
+- Rows of views decorated with @time_series are downsampled to `max_points`
+  before any of the above (see app/downsample.py).
+"""
+
+import datetime
+import decimal
+
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from . import binary, downsample
+
+try:
+    import orjson
+except ImportError:  # optional - stdlib json fallback
+    orjson = None
+
+
+def _default(o):
+    """Serialize types the JSON encoders don't handle themselves."""
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, (datetime.date, datetime.datetime)):
+        return o.isoformat()
+    # NumPy scalars and arrays, detected without importing NumPy
+    if type(o).__module__ == 'numpy' and hasattr(o, 'tolist'):
+        return o.tolist()
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def wants_columnar() -> bool:
+    return has_request_context() and request.args.get('format') == 'columnar'
+
+
+def binary_view() -> bool:
+    """True when the current endpoint is marked @binary_format."""
+    if not has_request_context() or request.endpoint is None:
+        return False
+    return getattr(current_app.view_functions.get(request.endpoint), 'binary_format', False)
+
+
+def _is_rows(obj) -> bool:
+    return isinstance(obj, list) and all(isinstance(row, dict) for row in obj)
+
+
+def to_columnar(rows):
+    """Convert a list of dicts to a dict of equal-length column lists; other values pass through."""
+    if not _is_rows(rows):
+        return rows
+
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return {key: [row.get(key) for row in rows] for key in columns}
+
+
+class AnalyticsJSONProvider(DefaultJSONProvider):
+    """JSON provider with fast encoding, extra native types and columnar output."""
+
+    def __init__(self, app, backend: str = 'auto'):
+        super().__init__(app)
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+        self.use_orjson = orjson is not None and backend in ('auto', 'orjson')
+
+    def _orjson_option(self, indent=None, sort_keys=None):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        if self.use_orjson:
+            option = self._orjson_option(kwargs.get('indent'), kwargs.get('sort_keys'))
+            return orjson.dumps(obj, default=_default, option=option).decode()
+        kwargs.setdefault('default', _default)
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        series_headers = {}
+        if _is_rows(obj):
+            obj, series_headers = downsample.apply(obj)
+
+        negotiable = binary_view()
+        if negotiable and _is_rows(obj) and binary.prefers_binary(request):
+            rows = self.loads(self.dumps(obj)) if not self._plain(obj) else obj
+            response = self._app.response_class(
+                binary.encode_rows(rows, default=_default), mimetype=binary.MIMETYPE,
+            )
+            response.headers.update(series_headers)
+            response.vary.add('Accept')
+            return response
+
+        if wants_columnar():
+            obj = to_columnar(obj)
+
+        if not self.use_orjson:
+            response = super().response(obj)
+        else:
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            body = orjson.dumps(obj, default=_default, option=self._orjson_option(indent))
+            response = self._app.response_class(body + b'\n', mimetype=self.mimetype)
+        response.headers.update(series_headers)
+        if negotiable:
+            response.vary.add('Accept')
+        return response
+
+    @staticmethod
+    def _plain(rows) -> bool:
+        """True when every value is already a JSON primitive the binary encoder can type."""
+        return all(
+            value is None or type(value) in (str, int, float, bool)
+            for row in rows for value in row.values()
+        )
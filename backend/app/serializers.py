@@ -0,0 +1,173 @@
+"""
+Entity Serializers
+
+List endpoints used to load full ORM instances and call Model.to_dict() on
+each one: identity-map bookkeeping, attribute instrumentation and, for
+opportunities, relationship loads, only to copy a handful of columns into a
+dict. A Serializer declares the exported fields of an entity once. It selects
+exactly those columns - outer-joining related tables for display names - and
+builds the dicts straight from result rows, so listing 10k entities allocates
+a tuple and a dict per row and no ORM objects.
+
+Each Field maps an output key to a column, with an optional converter for the
+value and, for a column of another table, the join that reaches it and the
+attribute path to read from a loaded object:
+
+    Field('customerName', Customer.company,
+          join=(Customer, Pipeline.customer_id == Customer.id),
+          attribute='customer.company')
+
+Usage Example:
+    serializer = PIPELINE.only('id', 'opportunityName', 'amount')
+    stmt = serializer.select().where(Pipeline.stage == 'proposal').limit(20)
+    opportunities = serializer.dump(db.session.execute(stmt))
+
+Model.to_dict() is built from the same declarations (Serializer.from_object),
+so one loaded object and a listed row serialize identically.
+"""
+
+from sqlalchemy import select
+
+from app.models import Customer, DailyMetric, Pipeline, Product, SalesRep, Transaction
+
+
+def money(value):
+    """Numeric amount as float, with NULL (and zero) reported as 0."""
+    return float(value) if value else 0
+
+
+def isodate(value):
+    return value.isoformat() if value else None
+
+
+class Field:
+    """One exported key of an entity."""
+
+    def __init__(self, key: str, column, convert=None, join=None, attribute: str = None):
+        self.key = key
+        self.column = column
+        self.convert = convert
+        self.join = join
+        self.attribute = attribute or column.key
+
+    def read(self, obj):
+        """The field's value on a loaded object (None when a relationship on the path is unset)."""
+        value = obj
+        for name in self.attribute.split('.'):
+            if value is None:
+                return None
+            value = getattr(value, name)
+        return self.convert(value) if self.convert else value
+
+
+class Serializer:
+    """Declared export fields of one model, selected as plain columns."""
+
+    def __init__(self, model, fields: list):
+        self.model = model
+        self.fields = list(fields)
+        self.keys = tuple(field.key for field in self.fields)
+        # (position, converter) for the only values that need work per row
+        self._converters = [(i, field.convert) for i, field in enumerate(self.fields) if field.convert]
+
+    def only(self, *keys) -> 'Serializer':
+        """A serializer exporting just `keys`, in that order."""
+        by_key = {field.key: field for field in self.fields}
+        return Serializer(self.model, [by_key[key] for key in keys])
+
+    def select(self):
+        """SELECT of the exported columns, with outer joins for related tables."""
+        stmt = select(*(field.column for field in self.fields)).select_from(self.model)
+        joined = set()
+        for field in self.fields:
+            if field.join is not None and field.join[0] not in joined:
+                stmt = stmt.outerjoin(*field.join)
+                joined.add(field.join[0])
+        return stmt
+
+    def dump(self, rows) -> list:
+        """Dicts for rows of select(), in row order."""
+        keys = self.keys
+        if not self._converters:
+            return [dict(zip(keys, row)) for row in rows]
+        converters = self._converters
+        dumped = []
+        for row in rows:
+            values = list(row)
+            for i, convert in converters:
+                values[i] = convert(values[i])
+            dumped.append(dict(zip(keys, values)))
+        return dumped
+
+    def from_object(self, obj) -> dict:
+        """The same dict for an already loaded instance."""
+        return {field.key: field.read(obj) for field in self.fields}
+
+
+CUSTOMER = Serializer(Customer, [
+    Field('id', Customer.id),
+    Field('name', Customer.name),
+    Field('company', Customer.company),
+    Field('industry', Customer.industry),
+    Field('segment', Customer.segment),
+    Field('acquisitionDate', Customer.acquisition_date, isodate),
+    Field('acquisitionChannel', Customer.acquisition_channel),
+    Field('lifetimeValue', Customer.lifetime_value, money),
+    Field('status', Customer.status),
+    Field('region', Customer.region),
+])
+
+PIPELINE = Serializer(Pipeline, [
+    Field('id', Pipeline.id),
+    Field('opportunityName', Pipeline.opportunity_name),
+    Field('customerId', Pipeline.customer_id),
+    Field('customerName', Customer.company,
+          join=(Customer, Pipeline.customer_id == Customer.id), attribute='customer.company'),
+    Field('salesRepId', Pipeline.sales_rep_id),
+    Field('salesRepName', SalesRep.name,
+          join=(SalesRep, Pipeline.sales_rep_id == SalesRep.id), attribute='sales_rep.name'),
+    Field('stage', Pipeline.stage),
+    Field('amount', Pipeline.amount, money),
+    Field('probability', Pipeline.probability),
+    Field('expectedCloseDate', Pipeline.expected_close_date, isodate),
+])
+
+TRANSACTION = Serializer(Transaction, [
+    Field('id', Transaction.id),
+    Field('transactionDate', Transaction.transaction_date, isodate),
+    Field('amount', Transaction.amount, money),
+    Field('quantity', Transaction.quantity),
+    Field('productId', Transaction.product_id),
+    Field('customerId', Transaction.customer_id),
+    Field('salesRepId', Transaction.sales_rep_id),
+    Field('region', Transaction.region),
+    Field('channel', Transaction.channel),
+    Field('status', Transaction.status),
+    Field('externalId', Transaction.external_id),
+])
+
+PRODUCT = Serializer(Product, [
+    Field('id', Product.id),
+    Field('name', Product.name),
+    Field('category', Product.category),
+    Field('unitPrice', Product.unit_price, money),
+    Field('cost', Product.cost, money),
+    Field('isActive', Product.is_active),
+])
+
+SALES_REP = Serializer(SalesRep, [
+    Field('id', SalesRep.id),
+    Field('name', SalesRep.name),
+    Field('team', SalesRep.team),
+    Field('region', SalesRep.region),
+    Field('quota', SalesRep.quota, money),
+    Field('hireDate', SalesRep.hire_date, isodate),
+])
+
+DAILY_METRIC = Serializer(DailyMetric, [
+    Field('id', DailyMetric.id),
+    Field('metricDate', DailyMetric.metric_date, isodate),
+    Field('metricName', DailyMetric.metric_name),
+    Field('metricValue', DailyMetric.metric_value, money),
+    Field('dimension', DailyMetric.dimension),
+])
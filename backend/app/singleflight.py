@@ -0,0 +1,306 @@
+"""
+Request Coalescing (Single-Flight)
+
+When a dashboard link is shared, dozens of browsers request the same URL
+within the same second and each would run the full query set. The
+single-flight layer lets exactly one request per key compute the view while
+identical concurrent requests wait for it and share its return value.
+
+Key: endpoint plus the canonical query string (parameters and repeated values
+sorted, comma-separated dimension values split; presentation-only parameters
+such as `format` and `max_points` dropped). Only the
+view's return value is shared - every request still serializes, negotiates
+and compresses its own response, so JSON/columnar/binary clients can share a
+computation.
+
+Within a worker, waiters block on the leader's in-flight call. With
+SINGLEFLIGHT_LOCK_DIR set, workers on the same host also coordinate: the
+leader holds an exclusive flock() on a per-key lock file while computing and
+leaves the pickled result next to it, and a leader in another worker that
+was blocked on that lock reuses the result instead of recomputing it. Either
+way, DB load is one computation per key however many requests fan in.
+
+A result is only reused by requests that were already waiting when it was
+written, so lock and result files untouched for twice SINGLEFLIGHT_TIMEOUT
+serve no one: every worker sweeps them from the lock directory at startup and
+every SWEEP_EVERY keys it leads, which keeps the directory bounded however
+many filter combinations are requested.
+
+A waiter that gives up after SINGLEFLIGHT_TIMEOUT seconds computes the view
+itself. A leader's exception is raised in every waiter as a copy of its own
+(chained to the original), so error handlers still match its type while
+concurrent tracebacks stay separate; a leader interrupted by anything that
+isn't an Exception (SystemExit, KeyboardInterrupt) leaves waiters to compute
+the view themselves. The data version the leader's view read travels with
+its result, so waiters' responses carry the same X-Data-Version.
+
+Configuration (app/config.py): SINGLEFLIGHT_ENABLED, SINGLEFLIGHT_TIMEOUT,
+SINGLEFLIGHT_LOCK_DIR, SINGLEFLIGHT_EXEMPT.
+"""
+
+import os
+import pickle
+import threading
+import time
+from functools import wraps
+
+from flask import Response, g, request
+
+from app.filters import DIMENSIONS
+from app.hashing import stable_key
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; cross-worker coordination is unavailable
+    fcntl = None
+
+# Query parameters that only change how a result is encoded, not what it is
+PRESENTATION_PARAMS = ('format', 'max_points')
+
+
+def request_key() -> str:
+    """Canonical key for the current request: endpoint plus sorted query parameters."""
+    params = set()
+    for name, value in request.args.items(multi=True):
+        if name in PRESENTATION_PARAMS:
+            continue
+        # `region=A,B` and `region=B&region=A` select the same data
+        if name in DIMENSIONS:
+            params.update((name, part.strip()) for part in value.split(',') if part.strip())
+        else:
+            params.add((name, value))
+    params = sorted(params)
+    query = '&'.join(f'{name}={value}' for name, value in params)
+    return f'{request.endpoint}?{query}'
+
+
+class _Call:
+    """One in-flight computation and the requests waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.completed = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its result."""
+
+    SWEEP_EVERY = 256
+
+    def __init__(self, timeout: float = 30.0, lock_dir: str = None):
+        self.timeout = timeout
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+        self.shared_across_workers = 0
+        self.timeouts = 0
+        self.swept = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+            self._sweep()
+
+    def do(self, key: str, fn):
+        """
+        Return (result, shared): fn()'s result for `key`, computed at most once
+        across concurrent callers. `shared` is True when another request's
+        computation was reused.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self.timeouts += 1
+                return fn(), False
+            if call.error is not None:
+                with self._lock:
+                    self.shared += 1
+                raise _copy_error(call.error) from call.error
+            if not call.completed:
+                return fn(), False
+            with self._lock:
+                self.shared += 1
+            return call.result, True
+
+        try:
+            call.result, shared = self._lead(key, fn)
+            call.completed = True
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if self.lock_dir and self.leaders % self.SWEEP_EVERY == 0:
+                self._sweep()
+        return call.result, shared
+
+    def _lead(self, key: str, fn):
+        if not self.lock_dir:
+            return fn(), False
+
+        digest = stable_key(key)
+        lock_path = os.path.join(self.lock_dir, f'{digest}.lock')
+        result_path = os.path.join(self.lock_dir, f'{digest}.result')
+        started = time.time()
+
+        with open(lock_path, 'a+b') as lock_file:
+            if not self._flock(lock_file):
+                return fn(), False
+            try:
+                # Mark the lock in use so a sweep elsewhere leaves it alone
+                os.utime(lock_path)
+                # Another worker finished this key while we were blocked on the lock
+                shared = self._read_result(result_path, started)
+                if shared is not None:
+                    with self._lock:
+                        self.shared_across_workers += 1
+                    return shared[0], True
+
+                result = fn()
+                self._write_result(result_path, result)
+                return result, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sweep(self):
+        """Delete lock, result and temporary files no waiter can still need."""
+        cutoff = time.time() - 2 * self.timeout
+        removed = 0
+        try:
+            entries = list(os.scandir(self.lock_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except OSError:
+                continue  # already removed by another worker
+        with self._lock:
+            self.swept += removed
+
+    def _flock(self, lock_file) -> bool:
+        """Take the exclusive lock, polling so a stuck holder can't block us forever."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    with self._lock:
+                        self.timeouts += 1
+                    return False
+                time.sleep(0.01)
+
+    @staticmethod
+    def _read_result(path: str, newer_than: float):
+        try:
+            if os.path.getmtime(path) < newer_than:
+                return None
+            with open(path, 'rb') as f:
+                return (pickle.load(f),)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    @staticmethod
+    def _write_result(path: str, result):
+        if isinstance(result, Response) or (isinstance(result, tuple) and result and isinstance(result[0], Response)):
+            return
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PickleError, TypeError, AttributeError):
+            return
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'inFlight': len(self._calls),
+                'waiting': sum(call.waiters for call in self._calls.values()),
+                'leaders': self.leaders,
+                'shared': self.shared,
+                'sharedAcrossWorkers': self.shared_across_workers,
+                'timeouts': self.timeouts,
+                'swept': self.swept,
+                'crossWorker': bool(self.lock_dir),
+            }
+
+
+def _copy_error(error: Exception) -> Exception:
+    """A new instance of `error`'s type with its args and attributes, for a waiter to raise."""
+    try:
+        copy = type(error).__new__(type(error))
+        copy.args = error.args
+        copy.__dict__.update(error.__dict__)
+    except (TypeError, AttributeError):
+        return RuntimeError(f'Coalesced request failed: {error!r}')
+    return copy
+
+
+def coalesce(view, flight: SingleFlight):
+    """Wrap a view so concurrent identical GET requests share one computation."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or g.get('cache_bypass'):
+            return view(*args, **kwargs)
+
+        def compute():
+            return view(*args, **kwargs), g.get('data_version')
+
+        (result, version), shared = flight.do(request_key(), compute)
+        # Response objects are mutated by after_request hooks; never hand one
+        # to a second request
+        if shared and isinstance(result, Response):
+            return view(*args, **kwargs)
+        if shared and version is not None and 'data_version' not in g:
+            g.data_version = version
+        return result
+
+    return wrapper
+
+
+def is_exempt(endpoint: str, exempt) -> bool:
+    """True when the endpoint or its blueprint is listed in `exempt`."""
+    return endpoint in exempt or endpoint.split('.', 1)[0] in exempt
+
+
+def init_app(app):
+    """Wrap every API GET view in single-flight coalescing (call after registering blueprints)."""
+    flight = SingleFlight(
+        timeout=app.config['SINGLEFLIGHT_TIMEOUT'],
+        lock_dir=app.config['SINGLEFLIGHT_LOCK_DIR'],
+    )
+    app.extensions['singleflight'] = flight
+
+    if not app.config.get('SINGLEFLIGHT_ENABLED', True):
+        return
+
+    exempt = set(app.config['SINGLEFLIGHT_EXEMPT'])
+    wrapped = set()
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/') or 'GET' not in rule.methods:
+            continue
+        if rule.endpoint in wrapped or is_exempt(rule.endpoint, exempt):
+            continue
+        app.view_functions[rule.endpoint] = coalesce(app.view_functions[rule.endpoint], flight)
+        wrapped.add(rule.endpoint)
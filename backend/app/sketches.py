@@ -0,0 +1,357 @@
+"""
+Quantile Sketches
+
+Order value and deal size percentiles (p50/p90/p99 per region, channel or
+month) would otherwise mean reading and sorting every amount in the range on
+each request. Instead each day's values are summarized in a t-digest per
+dimension, stored in daily_sketches next to the daily_metrics rollups:
+
+    metric       values                         dated by             dimensions
+    order_value  completed transaction amounts  transaction_date     all, region, channel,
+                                                                     segment (the customer's),
+                                                                     category (the product's)
+    deal_size    pipeline opportunity amounts   expected_close_date  all, region, segment
+                                                                     (the customer's)
+
+A t-digest is a sorted list of centroids (mean, weight). Centroids are
+small near the tails and large in the middle (the k1 scale function), so
+extreme quantiles stay accurate with ~COMPRESSION / 2 centroids whatever the
+number of values. Digests merge by pooling their centroids and compressing
+again, so quantiles over any date range - a month or years - cost one read of
+the daily sketches in it and one merge; the exact count, min and max are
+kept alongside.
+
+Sketches are rebuilt with the rollups, for the same dates and on the same
+connection (reseed, incremental load, ingest). Every dimension a metric can
+be filtered by is sketched, so any filter on one dimension (any number of its
+values) is a sketch merge. Filtering or grouping by two different dimensions
+would need a sketch per combination, and answering it from the raw values
+would scan every matching row on each request, so it is rejected with 400.
+
+Usage Example:
+    for group, digest in merged_digests(filters, 'order_value', by='region'):
+        p50, p90, p99 = digest.quantiles([0.5, 0.9, 0.99])
+"""
+
+from datetime import date
+
+from sqlalchemy import insert, select
+
+from app import db
+from app.filters import InvalidFilterError
+from app.models import Customer, DailySketch, Pipeline, Product, Transaction
+
+# t-digest compression (delta): a digest keeps at most about COMPRESSION / 2 centroids
+COMPRESSION = 100
+INSERT_BATCH_SIZE = 2000
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class TDigest:
+    """Merging t-digest: centroids sorted by mean, plus the exact count, min and max."""
+
+    def __init__(self, means, weights, minimum=None, maximum=None):
+        self.means = means
+        self.weights = weights
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def count(self) -> int:
+        return int(round(float(self.weights.sum()))) if len(self.weights) else 0
+
+    @classmethod
+    def from_values(cls, values, compression: int = COMPRESSION) -> 'TDigest':
+        import numpy as np
+
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return cls(np.empty(0), np.empty(0))
+        means, weights = _compress(values, np.ones(len(values)), compression)
+        return cls(means, weights, float(values.min()), float(values.max()))
+
+    @classmethod
+    def merge(cls, digests, compression: int = COMPRESSION) -> 'TDigest':
+        import numpy as np
+
+        digests = [digest for digest in digests if len(digest.weights)]
+        if not digests:
+            return cls(np.empty(0), np.empty(0))
+        means, weights = _compress(
+            np.concatenate([digest.means for digest in digests]),
+            np.concatenate([digest.weights for digest in digests]),
+            compression,
+        )
+        return cls(
+            means, weights,
+            min(digest.minimum for digest in digests),
+            max(digest.maximum for digest in digests),
+        )
+
+    def quantiles(self, qs) -> list:
+        """Estimated value at each quantile in `qs` (None for an empty digest)."""
+        import numpy as np
+
+        if not len(self.weights):
+            return [None] * len(qs)
+        # Each centroid's mean sits at the middle of its weight; the exact min
+        # and max bound the first and last half-centroids
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate(([0.0], centers, [total]))
+        values = np.concatenate(([self.minimum], self.means, [self.maximum]))
+        return np.interp(np.asarray(qs, dtype=float) * total, positions, values).tolist()
+
+    def to_bytes(self) -> bytes:
+        import numpy as np
+
+        return np.column_stack((self.means, self.weights)).astype('<f8').tobytes()
+
+    @classmethod
+    def from_row(cls, row) -> 'TDigest':
+        """Digest of a daily_sketches row (or any row with min_value, max_value, centroids)."""
+        import numpy as np
+
+        pairs = np.frombuffer(row.centroids, dtype='<f8').reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1], row.min_value, row.max_value)
+
+
+def _compress(means, weights, compression: int):
+    """
+    Merge centroids into at most ~compression / 2, small at the tails.
+
+    Centroids are sorted by mean and grouped by the integer part of the k1
+    scale k(q) = compression / (2 pi) * asin(2q - 1) at their left edge q, so
+    each merged centroid spans at most one unit of k - a narrow slice of the
+    distribution near q = 0 and q = 1, a wide one around the median.
+    """
+    import numpy as np
+
+    order = np.argsort(means, kind='stable')
+    means, weights = means[order], weights[order]
+    left = (np.cumsum(weights) - weights) / weights.sum()
+    k = np.floor(compression / (2 * np.pi) * np.arcsin(2 * left - 1))
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return merged_means, merged_weights
+
+
+class SketchedMetric:
+    """A value sketched per day, and the dimensions (every one it can be filtered by) it is also sketched by."""
+
+    def __init__(self, model, value, date_column, dimensions: dict, where=(), joins=()):
+        self.model = model
+        self.value = value
+        self.date_column = date_column
+        self.dimensions = dimensions  # name -> column
+        self.where = list(where)
+        self.joins = list(joins)  # (model, onclause) outer-joined for dimension columns
+
+    def select(self, *columns):
+        stmt = select(self.date_column, *columns, self.value).select_from(self.model)
+        for join in self.joins:
+            stmt = stmt.outerjoin(*join)
+        return stmt.where(self.value.isnot(None), *self.where)
+
+
+SKETCHED_METRICS = {
+    'order_value': SketchedMetric(
+        Transaction, Transaction.amount, Transaction.transaction_date,
+        {
+            'region': Transaction.region,
+            'channel': Transaction.channel,
+            'segment': Customer.segment,
+            'category': Product.category,
+        },
+        where=[Transaction.status == 'completed'],
+        joins=[(Customer, Transaction.customer_id == Customer.id), (Product, Transaction.product_id == Product.id)],
+    ),
+    # Pipeline filters apply through the opportunity's customer (FilterContext.pipeline_predicates)
+    'deal_size': SketchedMetric(
+        Pipeline, Pipeline.amount, Pipeline.expected_close_date,
+        {'region': Customer.region, 'segment': Customer.segment},
+        joins=[(Customer, Pipeline.customer_id == Customer.id)],
+    ),
+}
+
+
+def _codes(labels):
+    """Integer code per label (-1 for None) and the sorted distinct labels."""
+    import numpy as np
+
+    names = sorted({label for label in labels if label is not None})
+    index = {name: i for i, name in enumerate(names)}
+    return np.fromiter((index.get(label, -1) for label in labels), dtype=np.int64, count=len(labels)), names
+
+
+def _daily_digests(days, codes, values, compression: int):
+    """(day ordinal, code, digest) for each distinct (day, code) with code >= 0."""
+    import numpy as np
+
+    keep = codes >= 0
+    days, codes, values = days[keep], codes[keep], values[keep]
+    if not len(days):
+        return
+    order = np.lexsort((codes, days))
+    days, codes, values = days[order], codes[order], values[order]
+    bounds = np.flatnonzero((np.diff(days) != 0) | (np.diff(codes) != 0)) + 1
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(days)]):
+        yield int(days[start]), int(codes[start]), TDigest.from_values(values[start:end], compression)
+
+
+def rebuild_daily_sketches(connection, start=None, end=None, dates=None, compression: int = COMPRESSION) -> int:
+    """
+    Replace the sketches for [start, end] (all of them when both are None).
+
+    Args:
+        dates: Restrict the rebuild to exactly these dates, like
+            rebuild_daily_metrics()
+
+    Returns:
+        Number of sketch rows written
+    """
+    import numpy as np
+
+    table = DailySketch.__table__
+    delete = table.delete()
+    if start:
+        delete = delete.where(table.c.sketch_date >= start)
+    if end:
+        delete = delete.where(table.c.sketch_date <= end)
+    if dates is not None:
+        delete = delete.where(table.c.sketch_date.in_(dates))
+    connection.execute(delete)
+
+    written = 0
+    for metric_name, metric in SKETCHED_METRICS.items():
+        stmt = metric.select(*metric.dimensions.values())
+        if start:
+            stmt = stmt.where(metric.date_column >= start)
+        if end:
+            stmt = stmt.where(metric.date_column <= end)
+        if dates is not None:
+            stmt = stmt.where(metric.date_column.in_(dates))
+        rows = connection.execute(stmt).all()
+        if not rows:
+            continue
+
+        days = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+        values = np.fromiter((float(row[-1]) for row in rows), dtype=float, count=len(rows))
+        groupings = [('all', np.zeros(len(rows), dtype=np.int64), ['all'])]
+        for position, name in enumerate(metric.dimensions, start=1):
+            codes, labels = _codes([row[position] for row in rows])
+            groupings.append((name, codes, [f'{name}:{label}' for label in labels]))
+
+        sketch_rows = []
+        for _, codes, labels in groupings:
+            for day, code, digest in _daily_digests(days, codes, values, compression):
+                sketch_rows.append({
+                    'sketch_date': date.fromordinal(day),
+                    'metric': metric_name,
+                    'dimension': labels[code],
+                    'count': digest.count,
+                    'min_value': digest.minimum,
+                    'max_value': digest.maximum,
+                    'centroids': digest.to_bytes(),
+                })
+        for i in range(0, len(sketch_rows), INSERT_BATCH_SIZE):
+            connection.execute(insert(table), sketch_rows[i:i + INSERT_BATCH_SIZE])
+        written += len(sketch_rows)
+    return written
+
+
+def parse_quantiles(raw: str = None) -> tuple:
+    """Quantiles from a comma-separated `q` parameter, each strictly between 0 and 1."""
+    if not raw:
+        return DEFAULT_QUANTILES
+    try:
+        qs = tuple(float(part) for part in raw.split(',') if part.strip())
+    except ValueError:
+        qs = ()
+    if not qs or not all(0 < q < 1 for q in qs):
+        raise InvalidFilterError(f"Invalid q '{raw}', expected comma-separated quantiles between 0 and 1")
+    return qs
+
+
+def quantile_label(q: float) -> str:
+    """Response key for a quantile: 0.5 -> 'p50', 0.999 -> 'p99.9'."""
+    return f'p{round(q * 100, 6):g}'
+
+
+def _sketch_dimension(metric_name, metric, filters, by):
+    """Sketch dimension to read: 'all', or the one dimension filtered and/or grouped by."""
+    names = {name for name in metric.dimensions if filters.dimensions[name]}
+    if by in metric.dimensions:
+        names.add(by)
+    if len(names) > 1:
+        raise InvalidFilterError(
+            f"{metric_name} quantiles can be filtered or grouped by one dimension at a time, "
+            f"got {', '.join(sorted(names))}"
+        )
+    return names.pop() if names else 'all'
+
+
+def _group_key(by, day, label):
+    if by == 'month':
+        return day.strftime('%Y-%m')
+    return label if by else 'all'
+
+
+def merged_digests(filters, metric_name: str = 'order_value', by: str = None) -> list:
+    """
+    Digest of `metric_name` over the filters' date range, per group.
+
+    Args:
+        filters: FilterContext with a start and end date
+        by: None (one group, 'all'), 'month', or a dimension the metric is
+            sketched by
+
+    Returns:
+        [(group, TDigest)] sorted by group
+
+    Raises:
+        InvalidFilterError: For an unknown metric or grouping, or filters
+            and grouping on more than one dimension
+    """
+    metric = SKETCHED_METRICS.get(metric_name)
+    if metric is None:
+        raise InvalidFilterError(f"Invalid metric '{metric_name}', expected one of {', '.join(SKETCHED_METRICS)}")
+    if by not in (None, 'month', *metric.dimensions):
+        allowed = ', '.join(('month', *metric.dimensions))
+        raise InvalidFilterError(f"Invalid by '{by}' for {metric_name}, expected one of {allowed}")
+
+    dimension = _sketch_dimension(metric_name, metric, filters, by)
+    groups = {}
+    stmt = select(
+        DailySketch.sketch_date, DailySketch.dimension,
+        DailySketch.min_value, DailySketch.max_value, DailySketch.centroids,
+    ).where(
+        DailySketch.metric == metric_name,
+        DailySketch.sketch_date.between(filters.start, filters.end),
+    )
+    if dimension == 'all':
+        stmt = stmt.where(DailySketch.dimension == 'all')
+    elif filters.dimensions[dimension]:
+        stmt = stmt.where(DailySketch.dimension.in_([f'{dimension}:{v}' for v in filters.dimensions[dimension]]))
+    else:
+        stmt = stmt.where(DailySketch.dimension.like(f'{dimension}:%'))
+    for row in db.session.execute(stmt):
+        label = row.dimension.split(':', 1)[-1]
+        groups.setdefault(_group_key(by, row.sketch_date, label), []).append(TDigest.from_row(row))
+    return sorted((group, TDigest.merge(digests)) for group, digests in groups.items())
+
+
+def bucket_edges(digest, buckets: int) -> list:
+    """
+    Up to buckets - 1 increasing, two-significant-digit edges that split the
+    digest's values into roughly equal-count buckets.
+    """
+    edges = []
+    for value in digest.quantiles([i / buckets for i in range(1, buckets)]):
+        if value is None or value <= 0:
+            continue
+        edge = float(f'{value:.2g}')
+        if not edges or edge > edges[-1]:
+            edges.append(edge)
+    return edges
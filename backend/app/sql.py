@@ -0,0 +1,68 @@
+"""
+Portable SQL Functions
+
+Routes are written against PostgreSQL, but a SQLite database is a useful
+stand-in for local load testing and smoke checks (see loadtest.py). Functions
+registered here keep their PostgreSQL rendering and get an equivalent SQLite
+compilation, so `func.<name>(...)` in route code works on both.
+
+Registering a GenericFunction under a name makes every `func.<name>` call
+build it, so route code needs no import changes beyond importing this module
+once (app/__init__.py does).
+
+- date_trunc(unit, value): day, week (ISO, Monday), month, quarter and year.
+  Typed as DateTime so rows hold datetimes on both backends. The unit is
+  rendered inline rather than bound: the SQLite rendering depends on it, so
+  it has to be part of the statement cache key.
+"""
+
+import re
+
+from sqlalchemy import DateTime, literal_column
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+
+# SQLite datetime() modifiers that truncate to each unit
+_SQLITE_TRUNCATE = {
+    'day': ("'start of day'",),
+    # 'weekday 0' moves forward to Sunday (or stays), then back to its Monday
+    'week': ("'start of day'", "'weekday 0'", "'-6 days'"),
+    'month': ("'start of month'",),
+    'year': ("'start of year'",),
+}
+
+
+class date_trunc(GenericFunction):
+    """date_trunc(unit, value) truncated to the start of the unit."""
+
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, unit, value, **kwargs):
+        if isinstance(unit, str):
+            if not re.fullmatch(r'[a-z]+', unit):
+                raise ValueError(f'Invalid date_trunc unit {unit!r}')
+            unit = literal_column(f"'{unit}'")
+        super().__init__(unit, value, **kwargs)
+
+
+def _unit(element) -> str:
+    unit = list(element.clauses)[0]
+    text = getattr(unit, 'name', None) if getattr(unit, 'is_literal', False) else None
+    if text is None or not re.fullmatch(r"'[a-z]+'", text):
+        raise CompileError('date_trunc() needs a literal unit on SQLite')
+    return text.strip("'")
+
+
+@compiles(date_trunc, 'sqlite')
+def _date_trunc_sqlite(element, compiler, **kw):
+    unit = _unit(element)
+    value = compiler.process(list(element.clauses)[1], **kw)
+
+    if unit == 'quarter':
+        month = f"(((CAST(strftime('%m', {value}) AS INTEGER) - 1) / 3) * 3)"
+        return f"datetime({value}, 'start of year', '+' || {month} || ' months')"
+    if unit not in _SQLITE_TRUNCATE:
+        raise CompileError(f'date_trunc({unit!r}) is not supported on SQLite')
+    return f"datetime({value}, {', '.join(_SQLITE_TRUNCATE[unit])})"
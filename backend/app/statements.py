@@ -0,0 +1,212 @@
+"""
+Cached Statements
+
+The hot aggregate queries behind the dashboard and revenue pages are built as
+lambda statements (sqlalchemy.lambda_stmt). SQLAlchemy 2.0 already caches
+compiled SQL per statement shape, but a statement written with
+db.session.query() or select() is still constructed from scratch and walked in
+full to generate its cache key on every request before that cache can be
+consulted. A lambda statement is keyed by its lambdas' code locations: after
+the first call the expression is neither rebuilt nor traversed - the closure
+variables (dates, dimension values, limits) are read off as bound parameters
+and the compiled SQL is found directly.
+
+Optional filters are added as separate steps (`stmt += lambda s: s.where(...)`,
+see FilterContext.add_transaction_criteria), so each combination of filters
+present is one cached shape and the values are always bound parameters.
+
+Rules for the lambdas:
+- closure variables must be plain values or SQL expressions; copy attributes
+  such as `filters.region` to a local instead of reading them in the lambda
+- anything that changes the SQL text rather than a value (e.g. the
+  date_trunc unit) is decided outside the lambda
+
+CACHED_STATEMENTS=false builds the same statements as plain expressions.
+`flask --app run benchmark-statements` measures, per statement, what each
+call costs both ways and what one compilation costs.
+
+Usage Example:
+    row = db.session.execute(statements.period_totals(filters, start, end)).one()
+"""
+
+import time
+
+from flask import current_app
+from sqlalchemy import Float, case, cast, func, lambda_stmt, select
+
+from app.models import Pipeline, Product, Transaction
+
+
+class ExpressionSteps:
+    """Uncached stand-in for a lambda statement: each step is applied immediately."""
+
+    def __init__(self, statement):
+        self.statement = statement
+
+    def __add__(self, step):
+        return ExpressionSteps(step(self.statement))
+
+
+def statement(fn, cached: bool = None):
+    """Start a statement from `fn`, a zero-argument lambda returning select(...)."""
+    if cached is None:
+        cached = current_app.config.get('CACHED_STATEMENTS', True)
+    return lambda_stmt(fn) if cached else ExpressionSteps(fn())
+
+
+def executable(stmt):
+    """The object to pass to session.execute()."""
+    return stmt.statement if isinstance(stmt, ExpressionSteps) else stmt
+
+
+def period_totals(filters, start, end, cached: bool = None):
+    """Completed revenue, active customers and completed orders in one period."""
+    stmt = statement(lambda: select(
+        func.sum(case((Transaction.status == 'completed', Transaction.amount))).label('revenue'),
+        func.count(func.distinct(Transaction.customer_id)).label('customers'),
+        func.count(case((Transaction.status == 'completed', Transaction.id))).label('orders'),
+    ), cached)
+    return executable(filters.add_transaction_criteria(stmt, start=start, end=end))
+
+
+def pipeline_totals(filters, cached: bool = None):
+    """Open pipeline value and deal counts for the filtered opportunities."""
+    stmt = statement(lambda: select(
+        func.sum(case((~Pipeline.stage.in_(['closed-won', 'closed-lost']), Pipeline.amount))).label('pipeline_value'),
+        func.count(case((Pipeline.stage == 'closed-won', Pipeline.id))).label('closed_won'),
+        func.count(case((Pipeline.stage == 'lead', Pipeline.id))).label('leads'),
+        func.count(case((~Pipeline.stage.in_(['closed-won', 'closed-lost']), Pipeline.id))).label('total_deals'),
+    ), cached)
+    return executable(filters.add_pipeline_criteria(stmt))
+
+
+def revenue_trend(filters, granularity: str = 'day', cached: bool = None):
+    """Completed revenue (as float) and orders per day, week or month."""
+    # The bucket expression changes the SQL text, so it is chosen out here
+    if granularity == 'month':
+        date_group = func.date_trunc('month', Transaction.transaction_date)
+    elif granularity == 'week':
+        date_group = func.date_trunc('week', Transaction.transaction_date)
+    else:
+        date_group = Transaction.transaction_date
+
+    # Summed as float in SQL so rows don't have to be converted from Decimal one by one
+    stmt = statement(lambda: select(
+        date_group.label('date'),
+        cast(func.sum(Transaction.amount), Float).label('revenue'),
+        func.count(Transaction.id).label('orders'),
+    ), cached)
+    stmt = filters.add_transaction_criteria(stmt)
+    stmt += lambda s: s.where(Transaction.status == 'completed').group_by(date_group).order_by(date_group)
+    return executable(stmt)
+
+
+def revenue_by_category(filters, cached: bool = None):
+    """Completed revenue per product category, largest first."""
+    stmt = statement(lambda: select(
+        Product.category,
+        func.sum(Transaction.amount).label('value'),
+    ).join(Transaction, Transaction.product_id == Product.id), cached)
+    stmt = filters.add_transaction_criteria(stmt)
+    stmt += lambda s: s.where(Transaction.status == 'completed').group_by(
+        Product.category
+    ).order_by(func.sum(Transaction.amount).desc())
+    return executable(stmt)
+
+
+def revenue_by_region(filters, cached: bool = None):
+    """Completed revenue and distinct customers per region, largest first."""
+    stmt = statement(lambda: select(
+        Transaction.region,
+        func.sum(Transaction.amount).label('revenue'),
+        func.count(func.distinct(Transaction.customer_id)).label('customers'),
+    ), cached)
+    stmt = filters.add_transaction_criteria(stmt)
+    stmt += lambda s: s.where(Transaction.status == 'completed').group_by(
+        Transaction.region
+    ).order_by(func.sum(Transaction.amount).desc())
+    return executable(stmt)
+
+
+def revenue_by_channel(filters, cached: bool = None):
+    """Completed revenue per sales channel, largest first."""
+    stmt = statement(lambda: select(
+        Transaction.channel,
+        func.sum(Transaction.amount).label('value'),
+    ), cached)
+    stmt = filters.add_transaction_criteria(stmt)
+    stmt += lambda s: s.where(Transaction.status == 'completed').group_by(
+        Transaction.channel
+    ).order_by(func.sum(Transaction.amount).desc())
+    return executable(stmt)
+
+
+def top_products(filters, limit: int, cached: bool = None):
+    """The `limit` products with the most completed revenue."""
+    stmt = statement(lambda: select(
+        Product.id,
+        Product.name,
+        Product.category,
+        func.sum(Transaction.amount).label('revenue'),
+        func.sum(Transaction.quantity).label('units'),
+    ).join(Transaction, Transaction.product_id == Product.id), cached)
+    stmt = filters.add_transaction_criteria(stmt)
+    stmt += lambda s: s.where(Transaction.status == 'completed').group_by(
+        Product.id, Product.name, Product.category
+    ).order_by(func.sum(Transaction.amount).desc()).limit(limit)
+    return executable(stmt)
+
+
+# name -> builder(filters, cached) measured by `flask benchmark-statements`
+HOT_STATEMENTS = {
+    'period_totals': lambda filters, cached: period_totals(filters, filters.start, filters.end, cached),
+    'pipeline_totals': pipeline_totals,
+    'revenue_trend': lambda filters, cached: revenue_trend(filters, 'month', cached),
+    'revenue_by_category': revenue_by_category,
+    'revenue_by_region': revenue_by_region,
+    'revenue_by_channel': revenue_by_channel,
+    'top_products': lambda filters, cached: top_products(filters, 10, cached),
+}
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def benchmark(dialect, filters, iterations: int = 2000) -> list:
+    """
+    Time each hot statement's per-call preparation as an expression and as a lambda statement.
+
+    Per-call cost is building the statement plus generating its cache key -
+    the work done on every execution before the compiled cache is consulted.
+    Compile cost is one full compilation for `dialect`, paid on every cache
+    miss (and on every call if statements weren't cached at all).
+
+    Returns:
+        One {'statement', 'expressionUs', 'lambdaUs', 'savedUs', 'compileUs'}
+        dict per statement, in microseconds
+    """
+    report = []
+    for name, build in HOT_STATEMENTS.items():
+        def prepare_expression():
+            return build(filters, False)._generate_cache_key()
+
+        def prepare_lambda():
+            return build(filters, True)._generate_cache_key()
+
+        # First lambda call analyses the lambdas; measure the steady state
+        prepare_lambda()
+        expression_us = _per_call_us(prepare_expression, iterations)
+        lambda_us = _per_call_us(prepare_lambda, iterations)
+        compile_us = _per_call_us(lambda: build(filters, False).compile(dialect=dialect), max(1, iterations // 20))
+        report.append({
+            'statement': name,
+            'expressionUs': round(expression_us, 1),
+            'lambdaUs': round(lambda_us, 1),
+            'savedUs': round(expression_us - lambda_us, 1),
+            'compileUs': round(compile_us, 1),
+        })
+    return report
@@ -0,0 +1,330 @@
+"""
+Live KPI Stream
+
+GET /api/stream/kpis is a server-sent events stream of the dashboard's
+headline totals - completed revenue, completed orders, active customers and
+open pipeline value - for one set of filters (the same start_date, end_date
+and dimension parameters as /api/dashboard/summary). The first event carries
+the current totals; after that an event is pushed whenever the data changes
+(ingest, reseed or incremental load), with the new totals and the delta from
+the previous event:
+
+    id: 42
+    event: kpis
+    data: {"version": 42, "source": "ingest", "totals": {...}, "delta": {...}}
+
+Open dashboards don't multiply the work:
+
+- each worker runs one watcher thread (started with its first stream, ended
+  with its last) that polls data_versions every STREAM_POLL_INTERVAL seconds,
+  and is woken at once when the worker itself observes a new version
+- streams are grouped by their filters; a group's update is computed once and
+  the encoded event is put on every stream's queue
+- the workers on a host share each update through the result cache store
+  (serialized by the single-flight locks when SINGLEFLIGHT_LOCK_DIR is set),
+  keyed by data version and filters
+
+An ingest only adds transactions, each stamped with the version that added
+it (transactions.data_version, see app/ingest.py), so its update is computed
+from those rows alone: their completed revenue and orders, and how many of
+their customers had no earlier transaction in the period. Ingests don't touch
+the pipeline. Any other change - a reseed or incremental load, or a version
+that committed after a newer one (seen as the number of versions growing by
+more than the versions above the newest) - recomputes the group's totals,
+counting ingested rows only up to the newest version seen so an ingest
+committing meanwhile is never counted twice.
+
+Each stream holds a request thread for its whole life, so streams need
+threaded workers (GUNICORN_THREADS > 1 selects gunicorn's gthread worker).
+STREAM_MAX_CLIENTS caps open streams per worker - by default half its
+threads, at least one - and further requests get 503. A stream ends after
+STREAM_MAX_SECONDS and the browser's EventSource reconnects by itself.
+"""
+
+import json
+import queue
+import threading
+import time
+
+from sqlalchemy import case, func, or_, select
+
+from app import db, statements
+from app.hashing import stable_key
+from app.models import DataVersion, Transaction
+
+# Events queued per stream; every event carries absolute totals, so a stream
+# too slow to drain its queue only loses intermediate deltas
+QUEUE_SIZE = 16
+
+
+def versions_seen(session) -> tuple:
+    """(newest version, number of versions) - the count reveals versions that committed late."""
+    newest, count = session.execute(
+        select(func.max(DataVersion.version), func.count(DataVersion.version))
+    ).one()
+    return newest or 0, count
+
+
+def kpi_totals(filters, version: int) -> dict:
+    """The filters' totals, counting ingested transactions up to `version` only."""
+    row = db.session.execute(select(
+        func.sum(case((Transaction.status == 'completed', Transaction.amount))).label('revenue'),
+        func.count(case((Transaction.status == 'completed', Transaction.id))).label('orders'),
+        func.count(func.distinct(Transaction.customer_id)).label('customers'),
+    ).where(
+        *filters.transaction_predicates(),
+        or_(Transaction.data_version.is_(None), Transaction.data_version <= version),
+    )).one()
+    pipeline = db.session.execute(statements.pipeline_totals(filters)).one()
+    return {
+        'revenue': float(row.revenue or 0),
+        'orders': row.orders,
+        'activeCustomers': row.customers,
+        'pipelineValue': float(pipeline.pipeline_value or 0),
+    }
+
+
+def ingest_delta(filters, version: int) -> dict:
+    """What ingest `version` added to the filters' totals, aggregated from its own rows."""
+    predicates = filters.transaction_predicates()
+    earlier_customers = select(Transaction.customer_id).correlate(None).where(
+        *predicates,
+        Transaction.customer_id.is_not(None),
+        or_(Transaction.data_version.is_(None), Transaction.data_version < version),
+    )
+    row = db.session.execute(select(
+        func.sum(case((Transaction.status == 'completed', Transaction.amount))).label('revenue'),
+        func.count(case((Transaction.status == 'completed', Transaction.id))).label('orders'),
+        func.count(func.distinct(case(
+            (~Transaction.customer_id.in_(earlier_customers), Transaction.customer_id)
+        ))).label('new_customers'),
+    ).where(*predicates, Transaction.data_version == version)).one()
+    return {
+        'revenue': float(row.revenue or 0),
+        'orders': row.orders,
+        'activeCustomers': row.new_customers,
+        'pipelineValue': 0.0,
+    }
+
+
+def _difference(new: dict, old: dict) -> dict:
+    return {key: round(new[key] - old[key], 2) for key in new}
+
+
+def _encode(version: int, data: dict) -> str:
+    return f'id: {version}\nevent: kpis\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+class KpiGroup:
+    """Streams with identical filters, and the totals last sent to them."""
+
+    def __init__(self, filters):
+        self.filters = filters
+        self.lock = threading.Lock()
+        self.streams = set()
+        self.members = 0  # streams registered, including ones still being primed
+        self.seen = None  # versions_seen() the totals correspond to
+        self.totals = None
+        self.event = None
+
+
+class Subscription:
+    def __init__(self, group):
+        self.group = group
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.closed = False
+
+
+class KpiBroadcaster:
+    """Per-worker fan-out of KPI updates to open streams."""
+
+    def __init__(self, app, store, flight, max_clients: int, poll_interval: float = 2,
+                 heartbeat: float = 15, max_seconds: float = 600, retry_ms: int = 3000, ttl: float = 3600):
+        self.app = app
+        self.store = store
+        self.flight = flight
+        self.max_clients = max_clients
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.max_seconds = max_seconds
+        self.retry_ms = retry_ms
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._groups = {}  # filters.cache_key() -> KpiGroup
+        self._clients = 0
+        self._thread = None
+        self._wake = threading.Event()
+        self.updates = 0
+        self.computations = 0
+
+    def subscribe(self, filters):
+        """Register a stream and queue its first event; returns None when the worker is at its limit."""
+        key = filters.cache_key()
+        with self._lock:
+            if self._clients >= self.max_clients:
+                return None
+            self._clients += 1
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = KpiGroup(filters)
+            group.members += 1
+        subscription = Subscription(group)
+
+        try:
+            with group.lock:
+                if group.event is None:
+                    seen = versions_seen(db.session)
+                    self._publish(group, seen, 'snapshot', self._shared(
+                        group, seen, lambda: kpi_totals(group.filters, seen[0])
+                    ))
+                subscription.queue.put_nowait(group.event)
+                group.streams.add(subscription)
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+
+        self._start_watcher()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Drop a stream (safe to call more than once)."""
+        if subscription.closed:
+            return
+        subscription.closed = True
+        group = subscription.group
+        with group.lock:
+            group.streams.discard(subscription)
+        with self._lock:
+            self._clients -= 1
+            group.members -= 1
+            if group.members == 0:
+                self._groups.pop(group.filters.cache_key(), None)
+
+    def events(self, subscription):
+        """SSE body for one stream: its queued events, with keepalives, until max_seconds."""
+        deadline = time.monotonic() + self.max_seconds
+        yield f'retry: {self.retry_ms}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                yield subscription.queue.get(timeout=min(self.heartbeat, remaining))
+            except queue.Empty:
+                yield ': keepalive\n\n'
+
+    def wake(self):
+        """Check for new data now rather than at the next poll."""
+        self._wake.set()
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name='kpi-stream', daemon=True)
+                self._thread.start()
+
+    def _watch(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._groups:
+                    self._thread = None
+                    return
+                groups = list(self._groups.values())
+            try:
+                with self.app.app_context():
+                    self._poll(groups)
+            except Exception:
+                self.app.logger.exception('KPI stream update failed')
+
+    def _poll(self, groups):
+        seen = versions_seen(db.session)
+        for group in groups:
+            with group.lock:
+                if group.event is None or group.seen == seen:
+                    continue
+                added = db.session.execute(
+                    select(DataVersion.version, DataVersion.source)
+                    .where(DataVersion.version > group.seen[0])
+                    .order_by(DataVersion.version)
+                ).all()
+                # Only new ingest versions, all above the last one seen: apply their rows
+                incremental = (
+                    added
+                    and group.seen[1] + len(added) == seen[1]
+                    and all(source == 'ingest' for _, source in added)
+                )
+                if incremental:
+                    def compute(group=group, added=added):
+                        totals = dict(group.totals)
+                        for version, _ in added:
+                            for key, value in ingest_delta(group.filters, version).items():
+                                totals[key] += value
+                        return totals
+                else:
+                    def compute(group=group):
+                        return kpi_totals(group.filters, seen[0])
+                source = added[-1].source if added else 'resync'
+                self._publish(group, seen, source, self._shared(group, seen, compute))
+                self.updates += 1
+
+    def _shared(self, group, seen, compute) -> dict:
+        """Totals for (version, filters), computed once on this host."""
+        key = f'kpi-stream:{seen[0]}:{seen[1]}:{group.filters.cache_key()}'
+
+        def load():
+            entry = self.store.get(stable_key(key))
+            if entry is not None:
+                return entry[1]
+            self.computations += 1
+            totals = compute()
+            self.store.set(stable_key(key), totals, self.ttl)
+            return totals
+
+        return self.flight.do(key, load)[0]
+
+    def _publish(self, group, seen, source, totals):
+        """Record the group's new totals and queue the event for its streams (group.lock held)."""
+        delta = _difference(totals, group.totals) if group.totals is not None else None
+        group.seen, group.totals = seen, totals
+        group.event = _encode(seen[0], {
+            'version': seen[0],
+            'source': source,
+            'totals': totals,
+            'delta': delta,
+        })
+        for subscription in group.streams:
+            try:
+                subscription.queue.put_nowait(group.event)
+            except queue.Full:
+                pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'clients': self._clients,
+                'maxClients': self.max_clients,
+                'groups': len(self._groups),
+                'watching': self._thread is not None,
+                'updates': self.updates,
+                'computations': self.computations,
+            }
+
+
+def init_app(app):
+    """Create the worker's KPI broadcaster (call after the result cache and single-flight)."""
+    cache = app.extensions['result_cache']
+    broadcaster = KpiBroadcaster(
+        app,
+        store=cache.store,
+        flight=app.extensions['singleflight'],
+        max_clients=app.config['STREAM_MAX_CLIENTS'],
+        poll_interval=app.config['STREAM_POLL_INTERVAL'],
+        heartbeat=app.config['STREAM_HEARTBEAT'],
+        max_seconds=app.config['STREAM_MAX_SECONDS'],
+        retry_ms=app.config['STREAM_RETRY_MS'],
+        ttl=app.config['CACHE_TTL'],
+    )
+    app.extensions['kpi_stream'] = broadcaster
+    cache.on_version_change(lambda old, new: broadcaster.wake())
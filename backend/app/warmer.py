@@ -0,0 +1,259 @@
+"""
+Cache Warmer
+
+The frontend's date presets account for almost all traffic, so after a
+deploy or a data change the first visitor would otherwise pay the cold-query
+latency on every widget. The warmer requests every endpoint the pages use,
+for every preset, with the exact parameters the frontend sends (see
+frontend/src/hooks/useFilters.tsx and services/api.ts), which populates the
+result cache (app/cache.py) under the same keys real requests will use.
+
+Runs are triggered:
+- on worker start (gunicorn post_worker_init)
+- when the cache observes a new data version (reseed, incremental load,
+  ingest - from any process)
+- manually with POST /api/admin/cache/warm
+
+Warming runs on a single background thread, one request at a time, through
+the normal request pipeline. It stays out of the way of real users: before
+each request it waits while any admission class has queued requests, and it
+pauses WARMER_PAUSE seconds between requests. A trigger that arrives while a
+run is in progress schedules one follow-up run rather than queueing many.
+
+With the shared cache backend every worker would otherwise warm the same
+entries at once on startup or a version change; a run first takes a
+non-blocking flock() next to CACHE_PATH, and workers that don't get it skip
+the run (the holder's results land in the shared store for them too).
+
+Each run logs its duration and is kept (with the keys it populated, the keys
+that were already warm and any failures) for /api/admin/cache.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from app.singleflight import request_key
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; every worker warms its own runs
+    fcntl = None
+
+# Date presets offered by the frontend's date picker
+PRESETS = ('last7d', 'last30d', 'last90d', 'ytd', 'lastYear')
+
+# Trend granularity the pages pick for each preset
+PRESET_GRANULARITY = {
+    'last7d': 'day',
+    'last30d': 'day',
+    'last90d': 'week',
+    'ytd': 'month',
+    'lastYear': 'month',
+}
+
+# (path, extra parameters, date parameters sent: 'range', 'start' or None)
+WARM_ENDPOINTS = [
+    ('/api/dashboard/summary', {}, 'range'),
+    ('/api/revenue/trends', {'granularity': None}, 'range'),
+    ('/api/revenue/by-category', {}, 'range'),
+    ('/api/revenue/by-region', {}, 'range'),
+    ('/api/revenue/top-products', {'limit': 8}, 'range'),
+    ('/api/revenue/top-products', {'limit': 18}, 'range'),
+    ('/api/customers/overview', {}, 'range'),
+    ('/api/customers/segments', {}, 'range'),
+    ('/api/customers/cohorts', {}, 'range'),
+    ('/api/customers/lifetime-value', {}, 'range'),
+    ('/api/customers/acquisition', {}, 'range'),
+    ('/api/customers/at-risk', {'limit': 10}, 'range'),
+    ('/api/operations/pipeline', {}, 'range'),
+    ('/api/operations/pipeline-kpis', {}, 'range'),
+    ('/api/operations/sales-performance', {}, 'range'),
+    ('/api/operations/deal-size-distribution', {}, 'range'),
+    ('/api/operations/cycle-time', {}, 'start'),
+    ('/api/operations/conversion-rates', {}, None),
+    ('/api/forecasting/revenue', {'periods': 6}, 'range'),
+    ('/api/forecasting/churn-risk', {'limit': 17}, 'range'),
+    ('/api/forecasting/seasonality', {}, 'range'),
+    ('/api/forecasting/kpis', {}, 'range'),
+    ('/api/forecasting/model-performance', {}, 'range'),
+    ('/api/forecasting/revenue-at-risk', {}, 'range'),
+]
+
+
+def preset_range(preset: str, today: date = None):
+    """(start_date, end_date) strings for a preset, computed like the frontend does."""
+    today = today or datetime.now().date()
+    if preset == 'last7d':
+        start = today - timedelta(days=7)
+    elif preset == 'last30d':
+        start = today - timedelta(days=30)
+    elif preset == 'last90d':
+        start = today - timedelta(days=90)
+    elif preset == 'ytd':
+        start = today.replace(month=1, day=1)
+    elif preset == 'lastYear':
+        # date-fns subMonths(today, 12) clamps Feb 29 to Feb 28
+        try:
+            start = today.replace(year=today.year - 1)
+        except ValueError:
+            start = today.replace(year=today.year - 1, day=28)
+    else:
+        raise ValueError(f'Unknown preset {preset!r}')
+    return start.isoformat(), today.isoformat()
+
+
+def warm_requests(presets=PRESETS, today: date = None) -> list:
+    """Every (path, query parameters) pair the pages request for the given presets."""
+    requests = []
+    seen = set()
+    for preset in presets:
+        start_date, end_date = preset_range(preset, today)
+        for path, extra, dates in WARM_ENDPOINTS:
+            params = {
+                name: PRESET_GRANULARITY[preset] if value is None else value
+                for name, value in extra.items()
+            }
+            if dates in ('range', 'start'):
+                params['start_date'] = start_date
+            if dates == 'range':
+                params['end_date'] = end_date
+
+            identity = (path, tuple(sorted(params.items())))
+            if identity not in seen:
+                seen.add(identity)
+                requests.append((path, params))
+    return requests
+
+
+class CacheWarmer:
+    """Runs warm-up passes on one background thread."""
+
+    def __init__(self, app, presets=PRESETS, pause: float = 0.05, lock_path: str = None):
+        self.app = app
+        self.presets = presets
+        self.pause = pause
+        self.lock_path = lock_path if fcntl is not None else None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-warmer')
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = None
+        self.last_run = None
+
+    def schedule(self, reason: str) -> bool:
+        """Start a run in the background; returns False if one was already queued."""
+        with self._lock:
+            if self._running:
+                queued = self._pending is None
+                self._pending = self._pending or reason
+                return queued
+            self._running = True
+        self._executor.submit(self._run_loop, reason)
+        return True
+
+    def _run_loop(self, reason):
+        while True:
+            try:
+                self.run(reason)
+            except Exception:
+                self.app.logger.exception('Cache warm-up (%s) failed', reason)
+            with self._lock:
+                reason, self._pending = self._pending, None
+                if reason is None:
+                    self._running = False
+                    return
+
+    def _wait_for_idle(self):
+        """Yield to user traffic: wait (bounded) while any admission class has a queue."""
+        admission = self.app.extensions.get('admission')
+        if admission is None:
+            return
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if not any(state['waiting'] for state in admission.snapshot().values()):
+                return
+            time.sleep(0.25)
+
+    def run(self, reason: str = 'manual') -> dict:
+        """Warm every preset request synchronously and return the run report."""
+        if not self.lock_path:
+            return self._warm(reason)
+
+        with open(self.lock_path, 'a+b') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.last_run = {
+                    'reason': reason,
+                    'startedAt': datetime.utcnow().isoformat(),
+                    'skipped': 'another worker is warming the shared cache',
+                }
+                self.app.logger.info('Cache warm-up (%s) skipped: another worker holds the lock', reason)
+                return self.last_run
+            try:
+                return self._warm(reason)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _warm(self, reason: str) -> dict:
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        populated, already_warm, failed = [], [], []
+
+        client = self.app.test_client()
+        for path, params in warm_requests(self.presets):
+            self._wait_for_idle()
+            with self.app.test_request_context(path, query_string=params):
+                key = request_key()
+            try:
+                response = client.get(path, query_string=params)
+            except Exception as e:  # propagated when TESTING/PROPAGATE_EXCEPTIONS is on
+                failed.append({'key': key, 'error': repr(e)})
+                continue
+            if response.status_code != 200:
+                failed.append({'key': key, 'status': response.status_code})
+            elif response.headers.get('X-Cache') == 'HIT':
+                already_warm.append(key)
+            else:
+                populated.append(key)
+            if self.pause:
+                time.sleep(self.pause)
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.last_run = {
+            'reason': reason,
+            'startedAt': started_at.isoformat(),
+            'durationMs': duration_ms,
+            'populated': populated,
+            'alreadyWarm': already_warm,
+            'failed': failed,
+        }
+        self.app.logger.info(
+            'Cache warm-up (%s) took %.1fms: %d populated, %d already warm, %d failed',
+            reason, duration_ms, len(populated), len(already_warm), len(failed),
+        )
+        return self.last_run
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            running, pending = self._running, self._pending
+        return {'running': running, 'pending': pending, 'lastRun': self.last_run}
+
+
+def init_app(app):
+    """Create the warmer and re-warm whenever the cache sees a new data version."""
+    store = app.extensions['result_cache'].store
+    lock_path = f'{store.path}.warm.lock' if hasattr(store, 'path') else None
+    warmer = CacheWarmer(
+        app,
+        presets=app.config['WARMER_PRESETS'],
+        pause=app.config['WARMER_PAUSE'],
+        lock_path=lock_path,
+    )
+    app.extensions['cache_warmer'] = warmer
+
+    if app.config.get('WARMER_ENABLED', True) and app.config.get('CACHE_ENABLED', True):
+        app.extensions['result_cache'].on_version_change(
+            lambda old, new: warmer.schedule(f'data version {old} -> {new}')
+        )
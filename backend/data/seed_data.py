@@ -32,6 +32,7 @@ NUM_CUSTOMERS = 2000
 NUM_SALES_REPS = 31
 NUM_TRANSACTIONS = 55000
 NUM_PIPELINE = 500
+WINDOW_DAYS = 730  # Rolling window of transaction history (2 years)
 START_DATE = None
 END_DATE = None
 
@@ -58,6 +59,13 @@ ACQUISITION_CHANNELS = ['Direct Sales', 'Referral', 'Organic Search', 'Paid Ads'
 PIPELINE_STAGES = ['lead', 'qualified', 'proposal', 'negotiation', 'closed-won', 'closed-lost']
 TEAMS = ['Enterprise', 'Mid-Market', 'SMB']
 
+# Apply seasonality pattern (higher in Q4, lower in summer)
+SEASONALITY = {
+    1: 0.92, 2: 0.88, 3: 0.95, 4: 0.90,
+    5: 0.98, 6: 1.02, 7: 0.95, 8: 1.05,
+    9: 1.12, 10: 1.08, 11: 1.18, 12: 1.15,
+}
+
 
 def generate_products():
     """Generate product catalog."""
@@ -161,79 +169,91 @@ def generate_customers():
     return customers
 
 
-def generate_transactions(products, customers, sales_reps):
-    """Generate transaction history."""
+def generate_day_transactions(day, products, customers, sales_reps, window_start, limit=None):
+    """
+    Generate one day's transactions (without ids).
+
+    Volume follows the seasonality, weekday and growth model; growth is
+    measured from window_start so a day appended later by an incremental
+    load looks the same as it would in a full regeneration.
+    """
     transactions = []
+    daily_base = NUM_TRANSACTIONS / WINDOW_DAYS  # Average daily transactions
 
-    # Apply seasonality pattern (higher in Q4, lower in summer)
-    seasonality = {
-        1: 0.92, 2: 0.88, 3: 0.95, 4: 0.90,
-        5: 0.98, 6: 1.02, 7: 0.95, 8: 1.05,
-        9: 1.12, 10: 1.08, 11: 1.18, 12: 1.15,
-    }
+    month = day.month
+    seasonal_factor = SEASONALITY.get(month, 1.0)
 
-    # Generate transactions with realistic patterns
-    current_date = START_DATE
-    transaction_id = 1
-    daily_base = NUM_TRANSACTIONS / 730  # Average daily transactions
+    # Add some weekly pattern (less on weekends)
+    day_of_week = day.weekday()
+    if day_of_week >= 5:
+        daily_factor = 0.3
+    else:
+        daily_factor = 1.0
+
+    # Growth trend (10% YoY)
+    days_from_start = (day - window_start).days
+    growth_factor = 1 + (days_from_start / 365) * 0.1
+
+    num_daily_transactions = int(daily_base * seasonal_factor * daily_factor * growth_factor)
+    num_daily_transactions = max(1, num_daily_transactions + random.randint(-10, 10))
+
+    for _ in range(num_daily_transactions):
+        if limit is not None and len(transactions) >= limit:
+            break
+
+        product = random.choice(products)
+        customer = random.choice(customers)
+        sales_rep = random.choice(sales_reps)
 
-    while current_date <= END_DATE and transaction_id <= NUM_TRANSACTIONS:
-        month = current_date.month
-        seasonal_factor = seasonality.get(month, 1.0)
+        # Quantity varies by product category
+        if product['category'] in ['Enterprise Software', 'Professional Services']:
+            quantity = 1
+        else:
+            quantity = random.randint(1, 10)
+
+        amount = product['unit_price'] * quantity
 
-        # Add some weekly pattern (less on weekends)
-        day_of_week = current_date.weekday()
-        if day_of_week >= 5:
-            daily_factor = 0.3
+        # Most transactions are completed
+        status_roll = random.random()
+        if status_roll < 0.92:
+            status = 'completed'
+        elif status_roll < 0.97:
+            status = 'pending'
         else:
-            daily_factor = 1.0
+            status = 'refunded'
 
-        # Growth trend (10% YoY)
-        days_from_start = (current_date - START_DATE).days
-        growth_factor = 1 + (days_from_start / 365) * 0.1
+        transactions.append({
+            'transaction_date': day,
+            'amount': round(amount, 2),
+            'quantity': quantity,
+            'product_id': product['id'],
+            'customer_id': customer['id'],
+            'sales_rep_id': sales_rep['id'],
+            'region': customer['region'],
+            'channel': random.choice(CHANNELS),
+            'status': status,
+        })
 
-        num_daily_transactions = int(daily_base * seasonal_factor * daily_factor * growth_factor)
-        num_daily_transactions = max(1, num_daily_transactions + random.randint(-10, 10))
+    return transactions
 
-        for _ in range(num_daily_transactions):
-            if transaction_id > NUM_TRANSACTIONS:
-                break
 
-            product = random.choice(products)
-            customer = random.choice(customers)
-            sales_rep = random.choice(sales_reps)
-
-            # Quantity varies by product category
-            if product['category'] in ['Enterprise Software', 'Professional Services']:
-                quantity = 1
-            else:
-                quantity = random.randint(1, 10)
-
-            amount = product['unit_price'] * quantity
-
-            # Most transactions are completed
-            status_roll = random.random()
-            if status_roll < 0.92:
-                status = 'completed'
-            elif status_roll < 0.97:
-                status = 'pending'
-            else:
-                status = 'refunded'
-
-            transactions.append({
-                'id': transaction_id,
-                'transaction_date': current_date.date(),
-                'amount': round(amount, 2),
-                'quantity': quantity,
-                'product_id': product['id'],
-                'customer_id': customer['id'],
-                'sales_rep_id': sales_rep['id'],
-                'region': customer['region'],
-                'channel': random.choice(CHANNELS),
-                'status': status,
-            })
+def generate_transactions(products, customers, sales_reps):
+    """Generate transaction history."""
+    transactions = []
 
+    # Generate transactions with realistic patterns
+    current_date = START_DATE.date()
+    transaction_id = 1
+
+    while current_date <= END_DATE.date() and transaction_id <= NUM_TRANSACTIONS:
+        daily = generate_day_transactions(
+            current_date, products, customers, sales_reps, START_DATE.date(),
+            limit=NUM_TRANSACTIONS - transaction_id + 1,
+        )
+        for t in daily:
+            t['id'] = transaction_id
             transaction_id += 1
+        transactions.extend(daily)
 
         current_date += timedelta(days=1)
 
@@ -300,13 +320,38 @@ def generate_pipeline(customers, sales_reps):
     return pipeline
 
 
-def seed_database():
-    """Seed the database with generated data."""
+def generate_dataset():
+    """
+    Generate a full WINDOW_DAYS dataset ending today.
+
+    Returns:
+        Rows keyed by table name, ready for app.dataload.replace_dataset()
+    """
     global START_DATE, END_DATE
-    START_DATE = datetime.now() - timedelta(days=730)  # 2 years ago
+    START_DATE = datetime.now() - timedelta(days=WINDOW_DAYS)  # 2 years ago
     END_DATE = datetime.now()
 
+    from app.models import Product, Customer, SalesRep, Transaction, Pipeline
+
+    products_data = generate_products()
+    sales_reps_data = generate_sales_reps()
+    customers_data = generate_customers()
+    transactions_data = generate_transactions(products_data, customers_data, sales_reps_data)
+    pipeline_data = generate_pipeline(customers_data, sales_reps_data)
+
+    return {
+        Product.__tablename__: products_data,
+        SalesRep.__tablename__: sales_reps_data,
+        Customer.__tablename__: customers_data,
+        Transaction.__tablename__: transactions_data,
+        Pipeline.__tablename__: pipeline_data,
+    }
+
+
+def seed_database():
+    """Seed the database with generated data."""
     from app import create_app, db
+    from app.dataload import replace_dataset
     from app.models import Product, Customer, SalesRep, Transaction, Pipeline
 
     app = create_app('development')
@@ -315,63 +360,129 @@ def seed_database():
         print("Generating synthetic data...")
 
         # Generate data
-        products_data = generate_products()
-        sales_reps_data = generate_sales_reps()
-        customers_data = generate_customers()
-        transactions_data = generate_transactions(products_data, customers_data, sales_reps_data)
-        pipeline_data = generate_pipeline(customers_data, sales_reps_data)
-
-        print(f"Generated {len(products_data)} products")
-        print(f"Generated {len(sales_reps_data)} sales reps")
-        print(f"Generated {len(customers_data)} customers")
-        print(f"Generated {len(transactions_data)} transactions")
-        print(f"Generated {len(pipeline_data)} pipeline opportunities")
-
-        # Clear existing data
-        print("\nClearing existing data...")
-        db.session.execute(db.text('TRUNCATE TABLE transactions, pipeline, customers, sales_reps, products RESTART IDENTITY CASCADE'))
-        db.session.commit()
-
-        # Insert products
-        print("Inserting products...")
-        for p in products_data:
-            product = Product(**p)
-            db.session.add(product)
-        db.session.commit()
-
-        # Insert sales reps
-        print("Inserting sales reps...")
-        for s in sales_reps_data:
-            rep = SalesRep(**s)
-            db.session.add(rep)
-        db.session.commit()
-
-        # Insert customers
-        print("Inserting customers...")
-        for c in customers_data:
-            customer = Customer(**c)
-            db.session.add(customer)
-        db.session.commit()
-
-        # Insert transactions in batches
-        print("Inserting transactions...")
-        batch_size = 1000
-        for i in range(0, len(transactions_data), batch_size):
-            batch = transactions_data[i:i + batch_size]
-            for t in batch:
-                transaction = Transaction(**t)
-                db.session.add(transaction)
-            db.session.commit()
-            print(f"  Inserted {min(i + batch_size, len(transactions_data))} / {len(transactions_data)}")
-
-        # Insert pipeline
-        print("Inserting pipeline...")
-        for p in pipeline_data:
-            opp = Pipeline(**p)
-            db.session.add(opp)
-        db.session.commit()
-
-        print("\nDatabase seeding complete!")
+        rows_by_table = generate_dataset()
+
+        print(f"Generated {len(rows_by_table[Product.__tablename__])} products")
+        print(f"Generated {len(rows_by_table[SalesRep.__tablename__])} sales reps")
+        print(f"Generated {len(rows_by_table[Customer.__tablename__])} customers")
+        print(f"Generated {len(rows_by_table[Transaction.__tablename__])} transactions")
+        print(f"Generated {len(rows_by_table[Pipeline.__tablename__])} pipeline opportunities")
+
+        # Make sure the schema (including data_versions) exists on a fresh database
+        db.create_all()
+
+        # Build the new generation off to the side and swap it in atomically,
+        # so dashboards never see empty or partially loaded tables
+        print("\nLoading new dataset generation...")
+        version = replace_dataset(
+            db.engine, rows_by_table,
+            source='reseed', changed_from=START_DATE.date(), changed_to=END_DATE.date(),
+        )
+
+        print(f"\nDatabase seeding complete! (data version {version})")
+
+
+def incremental_update():
+    """
+    Roll the transaction window forward instead of regenerating it.
+
+    Appends transactions for each day since the latest one on record (same
+    seasonality/growth model as a full seed), expires transactions older than
+    WINDOW_DAYS, adds the new completed revenue to the affected customers'
+    lifetime_value and rebuilds only the rollups and sketches for changed
+    dates - all in one transaction, recorded as a new data version with the
+    appended dates and the expiry cutoff kept apart. Nothing to append or
+    expire records no version, so cached results stay valid. Falls back to a
+    full seed when the database is empty.
+    """
+    from collections import defaultdict
+
+    from sqlalchemy import func, select
+
+    from app import create_app, db
+    from app.dataload import add_lifetime_value, bulk_insert, record_version
+    from app.models import Product, Customer, SalesRep, Transaction, DailyMetric, DailySketch
+    from app.rollups import rebuild_daily_metrics
+    from app.sketches import rebuild_daily_sketches
+
+    app = create_app('development')
+
+    with app.app_context():
+        last_date = db.session.query(func.max(Transaction.transaction_date)).scalar()
+        if last_date is None:
+            print("No existing data - running a full seed instead.")
+            db.session.remove()
+            return seed_database()
+
+        today = datetime.now().date()
+        window_start = today - timedelta(days=WINDOW_DAYS)
+        first_new_date = last_date + timedelta(days=1)
+
+        with db.engine.begin() as connection:
+            products = [row._asdict() for row in connection.execute(
+                select(Product.id, Product.category, Product.unit_price)
+            )]
+            customers = [row._asdict() for row in connection.execute(
+                select(Customer.id, Customer.region)
+            )]
+            sales_reps = [row._asdict() for row in connection.execute(select(SalesRep.id))]
+
+            # Append the missing days
+            new_transactions = []
+            current_date = first_new_date
+            while current_date <= today:
+                new_transactions.extend(generate_day_transactions(
+                    current_date, products, customers, sales_reps, window_start
+                ))
+                current_date += timedelta(days=1)
+            bulk_insert(connection, Transaction.__table__, new_transactions)
+
+            # Expire everything that fell out of the window
+            expired = connection.execute(
+                Transaction.__table__.delete().where(Transaction.transaction_date < window_start)
+            ).rowcount
+            connection.execute(
+                DailyMetric.__table__.delete().where(DailyMetric.metric_date < window_start)
+            )
+            connection.execute(
+                DailySketch.__table__.delete().where(DailySketch.sketch_date < window_start)
+            )
+
+            # Lifetime value is cumulative, so only new completed revenue changes it
+            amounts = defaultdict(int)
+            for t in new_transactions:
+                if t['status'] == 'completed':
+                    amounts[t['customer_id']] += t['amount']
+            customers_updated = add_lifetime_value(connection, amounts)
+
+            rollups = sketches = 0
+            if new_transactions:
+                rollups = rebuild_daily_metrics(connection, start=first_new_date, end=today)
+                sketches = rebuild_daily_sketches(connection, start=first_new_date, end=today)
+
+            version = None
+            if new_transactions or expired:
+                version = record_version(
+                    connection, 'incremental',
+                    changed_from=first_new_date if new_transactions else None,
+                    changed_to=today if new_transactions else None,
+                    expired_before=window_start if expired else None,
+                    delta={
+                        'transactions_added': len(new_transactions),
+                        'transactions_expired': expired,
+                        'customers_updated': customers_updated,
+                        'daily_metrics': rollups,
+                        'daily_sketches': sketches,
+                    },
+                )
+
+        if version is None:
+            print(f"Nothing to append or expire ({last_date} is the latest day on record)")
+            return
+
+        print(f"Appended {len(new_transactions)} transactions "
+              f"({first_new_date} to {today}), expired {expired}, "
+              f"updated {customers_updated} customers (data version {version})")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration.
+
+Loaded automatically when gunicorn is started from the backend directory.
+The app is preloaded in the master so workers fork with modules already
+imported; create_app() opens no database connections, and post_fork()
+discards any pool state inherited from the master just in case.
+"""
+
+import os
+
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# More than one thread selects the gthread worker; live KPI streams each hold a thread
+threads = int(os.getenv('GUNICORN_THREADS', '6'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+
+    from app import db
+    from run import app
+
+    # Connections must never be shared across processes
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    timings = worker.wsgi.extensions.get('startup_timings', {})
+    worker.log.info(
+        'Worker %s ready (app created in %sms: %s)',
+        worker.pid,
+        timings.get('total'),
+        ', '.join(f'{phase}={ms}ms' for phase, ms in timings.items() if phase != 'total'),
+    )
+
+    # Precompute the date presets so the first visitor doesn't pay cold queries
+    app = worker.wsgi
+    if app.config.get('WARMER_ENABLED') and app.config.get('CACHE_ENABLED'):
+        app.extensions['cache_warmer'].schedule('startup')
@@ -0,0 +1,422 @@
+"""Load-test a running backend by replaying frontend page loads.
+
+Each virtual user repeatedly opens a page - weighted by --pages - with a date
+preset drawn from --presets, fires that page's burst of API requests the way
+the browser does (every React Query hook on the page at once, at most six
+connections per user), then waits an exponentially distributed think time.
+
+The per-page bursts mirror frontend/src/pages/*.tsx and hooks/useApi.ts; the
+preset date ranges and trend granularities mirror hooks/useFilters.tsx.
+
+    python loadtest.py --url http://localhost:8000 --users 200 --duration 60
+    python loadtest.py --pages dashboard=1 --presets last30d=1 --think 0
+    python loadtest.py --admin-token $ADMIN_TOKEN --json results.json
+
+Reports throughput, page-load and per-route p50/p95/p99 latency, error and
+503 (shed) rates, the X-Cache hit ratio and - when the admin endpoints answer
+(debug instances, or --admin-token) - DB pool saturation and checkout waits
+sampled once a second. Pool figures are per worker: with several gunicorn
+workers each sample comes from whichever worker answered.
+
+Standard library only, so it runs from any checkout without the app's
+dependencies.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+# Browsers open at most six HTTP/1.1 connections per origin
+BROWSER_CONNECTIONS = 6
+
+# Page -> requests fired on load: (path, extra parameters, date parameters sent).
+# A None parameter value is filled with the preset's trend granularity.
+PAGES = {
+    'dashboard': [
+        ('/api/dashboard/summary', {}, 'range'),
+        ('/api/revenue/trends', {'granularity': None}, 'range'),
+        ('/api/revenue/by-category', {}, 'range'),
+        ('/api/operations/pipeline', {}, 'range'),
+        ('/api/revenue/top-products', {'limit': 8}, 'range'),
+    ],
+    'revenue': [
+        ('/api/dashboard/summary', {}, 'range'),
+        ('/api/revenue/trends', {'granularity': None}, 'range'),
+        ('/api/revenue/by-category', {}, 'range'),
+        ('/api/revenue/by-region', {}, 'range'),
+        ('/api/revenue/top-products', {'limit': 18}, 'range'),
+    ],
+    'customers': [
+        ('/api/customers/overview', {}, 'range'),
+        ('/api/customers/segments', {}, 'range'),
+        ('/api/customers/cohorts', {}, 'range'),
+        ('/api/customers/at-risk', {'limit': 10}, 'range'),
+        ('/api/customers/lifetime-value', {}, 'range'),
+        ('/api/customers/acquisition', {}, 'range'),
+    ],
+    'operations': [
+        ('/api/operations/pipeline', {}, 'range'),
+        ('/api/operations/pipeline-kpis', {}, 'range'),
+        ('/api/operations/sales-performance', {}, 'range'),
+        ('/api/operations/cycle-time', {}, 'start'),
+        ('/api/operations/deal-size-distribution', {}, 'range'),
+    ],
+    'forecasting': [
+        ('/api/forecasting/revenue', {'periods': 6}, 'range'),
+        ('/api/forecasting/churn-risk', {'limit': 17}, 'range'),
+        ('/api/forecasting/seasonality', {}, 'range'),
+        ('/api/forecasting/kpis', {}, 'range'),
+        ('/api/forecasting/model-performance', {}, 'range'),
+        ('/api/forecasting/revenue-at-risk', {}, 'range'),
+    ],
+}
+
+PRESET_GRANULARITY = {
+    'last7d': 'day',
+    'last30d': 'day',
+    'last90d': 'week',
+    'ytd': 'month',
+    'lastYear': 'month',
+}
+
+DEFAULT_PAGES = 'dashboard=40,revenue=20,customers=15,operations=15,forecasting=10'
+DEFAULT_PRESETS = 'last30d=60,last7d=15,last90d=15,ytd=5,lastYear=5'
+
+
+def preset_range(preset: str, today: date):
+    """(start_date, end_date) for a date preset, as the frontend computes it."""
+    if preset == 'ytd':
+        start = today.replace(month=1, day=1)
+    elif preset == 'lastYear':
+        try:
+            start = today.replace(year=today.year - 1)
+        except ValueError:
+            start = today.replace(year=today.year - 1, day=28)
+    else:
+        start = today - timedelta(days={'last7d': 7, 'last30d': 30, 'last90d': 90}[preset])
+    return start.isoformat(), today.isoformat()
+
+
+def page_requests(page: str, preset: str, today: date) -> list:
+    """Request targets ('/path?query') one load of `page` fires for `preset`."""
+    start_date, end_date = preset_range(preset, today)
+    targets = []
+    for path, extra, dates in PAGES[page]:
+        params = {
+            name: PRESET_GRANULARITY[preset] if value is None else value
+            for name, value in extra.items()
+        }
+        if dates in ('range', 'start'):
+            params['start_date'] = start_date
+        if dates == 'range':
+            params['end_date'] = end_date
+        targets.append((path, f'{path}?{urlencode(params)}'))
+    return targets
+
+
+def parse_weights(spec: str, allowed) -> dict:
+    """'a=3,b=1' -> {'a': 3.0, 'b': 1.0}, rejecting names not in `allowed`."""
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in allowed:
+            raise argparse.ArgumentTypeError(f"unknown name {name!r} (choose from {', '.join(allowed)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: list, pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Results:
+    """Thread-safe collection of request and page timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)  # route -> [ms]
+        self.statuses = defaultdict(lambda: defaultdict(int))  # route -> status -> count
+        self.cache_hits = defaultdict(int)
+        self.page_loads = defaultdict(list)  # page -> [ms]
+
+    def record(self, route, status, elapsed_ms, cache_status):
+        with self._lock:
+            self.latencies[route].append(elapsed_ms)
+            self.statuses[route][status] += 1
+            if cache_status == 'HIT':
+                self.cache_hits[route] += 1
+
+    def record_page(self, page, elapsed_ms):
+        with self._lock:
+            self.page_loads[page].append(elapsed_ms)
+
+
+class VirtualUser:
+    """One browser: keeps up to six keep-alive connections and loads pages in a loop."""
+
+    def __init__(self, url, results, headers, timeout):
+        parts = urlsplit(url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.results = results
+        self.headers = headers
+        self.timeout = timeout
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+        return connection
+
+    def fetch(self, route, target):
+        started = time.perf_counter()
+        status, cache_status = 'error', None
+        try:
+            connection = self._connection()
+            connection.request('GET', self.prefix + target, headers=self.headers)
+            response = connection.getresponse()
+            response.read()
+            status, cache_status = response.status, response.getheader('X-Cache')
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                self._local.connection = None
+        except (OSError, http.client.HTTPException):
+            self._local.connection = None
+        self.results.record(route, status, (time.perf_counter() - started) * 1000, cache_status)
+
+    def load_page(self, page, targets):
+        started = time.perf_counter()
+        futures = [self._executor.submit(self.fetch, route, target) for route, target in targets]
+        for future in futures:
+            future.result()
+        self.results.record_page(page, (time.perf_counter() - started) * 1000)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def run_user(user, args, deadline, rng):
+    pages, page_weights = zip(*args.pages.items())
+    presets, preset_weights = zip(*args.presets.items())
+    loads = 0
+    while time.monotonic() < deadline and (not args.iterations or loads < args.iterations):
+        page = rng.choices(pages, page_weights)[0]
+        preset = rng.choices(presets, preset_weights)[0]
+        user.load_page(page, page_requests(page, preset, date.today()))
+        loads += 1
+        if args.think:
+            time.sleep(min(rng.expovariate(1 / args.think), max(deadline - time.monotonic(), 0)))
+    user.close()
+
+
+class PoolSampler(threading.Thread):
+    """Polls /api/admin/pool and /api/admin/admission once a second."""
+
+    def __init__(self, url, headers, interval=1.0):
+        super().__init__(daemon=True)
+        self.url = url.rstrip('/')
+        self.headers = headers
+        self.interval = interval
+        self.samples = []
+        self.admission = None
+        self.error = None
+        self._stop = threading.Event()
+
+    def _get(self, path):
+        parts = urlsplit(self.url + path)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        connection = connection_class(parts.netloc, timeout=5)
+        try:
+            connection.request('GET', parts.path, headers=self.headers)
+            response = connection.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise RuntimeError(f'{path} answered {response.status}')
+            return json.loads(body)
+        finally:
+            connection.close()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.samples.append(self._get('/api/admin/pool'))
+                self.admission = self._get('/api/admin/admission')
+            except (OSError, http.client.HTTPException, RuntimeError, ValueError) as e:
+                self.error = str(e)
+                return
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {'unavailable': self.error or 'no samples'}
+        saturation = sorted(sample.get('saturation', 0) for sample in self.samples)
+        last_wait = self.samples[-1]['checkoutWait']
+        return {
+            'samples': len(self.samples),
+            'saturationMean': round(sum(saturation) / len(saturation), 3),
+            'saturationP95': percentile(saturation, 95),
+            'saturationMax': saturation[-1],
+            'maxCheckedOut': max(sample.get('checkedOut', 0) for sample in self.samples),
+            'checkoutWaitP95Ms': last_wait['p95WaitMs'],
+            'checkoutWaitMaxMs': last_wait['maxWaitMs'],
+            'checkoutTimeouts': last_wait['timeouts'] - self.samples[0]['checkoutWait']['timeouts'],
+            'admission': self.admission,
+        }
+
+
+def summarize(results: Results, elapsed: float, pool: dict) -> dict:
+    routes = {}
+    total = errors = shed = 0
+    for route in sorted(results.latencies):
+        latencies = sorted(results.latencies[route])
+        statuses = results.statuses[route]
+        count = len(latencies)
+        route_shed = statuses.get(503, 0)
+        route_errors = sum(n for status, n in statuses.items() if status == 'error' or status >= 400)
+        routes[route] = {
+            'requests': count,
+            'p50Ms': round(percentile(latencies, 50), 1),
+            'p95Ms': round(percentile(latencies, 95), 1),
+            'p99Ms': round(percentile(latencies, 99), 1),
+            'maxMs': round(latencies[-1], 1),
+            'errorRate': round(route_errors / count, 4),
+            'shedRate': round(route_shed / count, 4),
+            'cacheHitRate': round(results.cache_hits[route] / count, 3),
+            'statuses': {str(status): n for status, n in sorted(statuses.items(), key=str)},
+        }
+        total += count
+        errors += route_errors
+        shed += route_shed
+
+    pages = {}
+    for page in sorted(results.page_loads):
+        loads = sorted(results.page_loads[page])
+        pages[page] = {
+            'loads': len(loads),
+            'p50Ms': round(percentile(loads, 50), 1),
+            'p95Ms': round(percentile(loads, 95), 1),
+            'p99Ms': round(percentile(loads, 99), 1),
+        }
+
+    return {
+        'durationS': round(elapsed, 1),
+        'requests': total,
+        'throughputRps': round(total / elapsed, 1) if elapsed else None,
+        'pageLoads': sum(page['loads'] for page in pages.values()),
+        'errorRate': round(errors / total, 4) if total else None,
+        'shedRate': round(shed / total, 4) if total else None,
+        'pages': pages,
+        'routes': routes,
+        'pool': pool,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['requests']} requests, {report['pageLoads']} page loads in {report['durationS']}s "
+          f"- {report['throughputRps']} req/s, errors {report['errorRate']:.2%}, "
+          f"503 {report['shedRate']:.2%}")
+
+    print(f"\n{'page':<14}{'loads':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for page, stats in report['pages'].items():
+        print(f"{page:<14}{stats['loads']:>8}{stats['p50Ms']:>10}{stats['p95Ms']:>10}{stats['p99Ms']:>10}")
+
+    print(f"\n{'route':<44}{'reqs':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>8}{'503':>8}{'hit':>7}")
+    for route, stats in report['routes'].items():
+        print(f"{route:<44}{stats['requests']:>7}{stats['p50Ms']:>9}{stats['p95Ms']:>9}{stats['p99Ms']:>9}"
+              f"{stats['errorRate']:>8.1%}{stats['shedRate']:>8.1%}{stats['cacheHitRate']:>7.0%}")
+
+    pool = report['pool']
+    if 'unavailable' in pool:
+        print(f"\nDB pool: not sampled ({pool['unavailable']})")
+    else:
+        print(f"\nDB pool ({pool['samples']} samples): saturation mean {pool['saturationMean']:.0%}, "
+              f"p95 {pool['saturationP95']:.0%}, max {pool['saturationMax']:.0%}; "
+              f"max checked out {pool['maxCheckedOut']}; checkout wait p95 {pool['checkoutWaitP95Ms']}ms, "
+              f"max {pool['checkoutWaitMaxMs']}ms; {pool['checkoutTimeouts']} checkout timeouts")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5001', help='backend base URL')
+    parser.add_argument('--users', type=int, default=50, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='seconds to run')
+    parser.add_argument('--iterations', type=int, default=0,
+                        help='stop each user after this many page loads (0 = until --duration)')
+    parser.add_argument('--ramp', type=float, default=5, help='seconds over which users start')
+    parser.add_argument('--think', type=float, default=3,
+                        help='mean think time between page loads in seconds (0 = none)')
+    parser.add_argument('--pages', default=DEFAULT_PAGES,
+                        type=lambda spec: parse_weights(spec, PAGES), help='page mix as name=weight,...')
+    parser.add_argument('--presets', default=DEFAULT_PRESETS,
+                        type=lambda spec: parse_weights(spec, PRESET_GRANULARITY),
+                        help='date preset mix as name=weight,...')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds')
+    parser.add_argument('--admin-token', help='X-Admin-Token for sampling /api/admin/pool')
+    parser.add_argument('--seed', type=int, help='random seed for a reproducible request mix')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}
+    admin_headers = {'X-Admin-Token': args.admin_token} if args.admin_token else {}
+
+    results = Results()
+    sampler = PoolSampler(args.url, admin_headers)
+    sampler.start()
+
+    seeds = random.Random(args.seed)
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = []
+    print(f'{args.users} users against {args.url} for {args.duration:g}s...', file=sys.stderr)
+    for i in range(args.users):
+        user = VirtualUser(args.url, results, headers, args.timeout)
+        thread = threading.Thread(
+            target=run_user, args=(user, args, deadline, random.Random(seeds.random())), daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+        if args.ramp and i < args.users - 1:
+            time.sleep(args.ramp / args.users)
+
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print('Interrupted - reporting what finished', file=sys.stderr)
+    elapsed = time.monotonic() - started
+    sampler.stop()
+
+    report = summarize(results, elapsed, sampler.summary())
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['requests'] == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,11 +2,28 @@
 
 Runs seed_database() with fresh dates and exits.
 Configure as a separate Railway service with a cron schedule.
+
+    python reseed.py                # regenerate the full two-year window
+    python reseed.py --incremental  # append new days and expire old ones
 """
 
-from data.seed_data import seed_database
+import argparse
+
+from data.seed_data import incremental_update, seed_database
 
 if __name__ == '__main__':
-    print("Starting scheduled reseed...")
-    seed_database()
-    print("Reseed complete.")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='roll the existing window forward instead of regenerating it',
+    )
+    args = parser.parse_args()
+
+    if args.incremental:
+        print("Starting incremental refresh...")
+        incremental_update()
+        print("Incremental refresh complete.")
+    else:
+        print("Starting scheduled reseed...")
+        seed_database()
+        print("Reseed complete.")
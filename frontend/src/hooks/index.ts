@@ -3,11 +3,13 @@ export type { DatePreset } from './useFilters';
 
 export {
   useDashboardSummary,
+  useKpiStream,
   useRevenueTrends,
   useRevenueByCategory,
   useRevenueByRegion,
   useRevenueByChannel,
   useTopProducts,
+  useRevenueQuantiles,
   useCustomerOverview,
   useCustomerSegments,
   useCustomerCohorts,
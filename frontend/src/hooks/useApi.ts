@@ -14,7 +14,9 @@
  * - use{Domain}{Resource} - e.g., useRevenueTrends, useCustomerSegments
  *
  * All hooks automatically subscribe to the global filter context and refetch
- * when date range changes.
+ * when the date range or any dimension filter (region, channel, segment,
+ * category) changes. Dimension filters are part of every query key, so each
+ * drill-down is cached separately.
  *
  * Usage Example:
  *   const { data, isLoading, error } = useRevenueTrends('month');
@@ -22,8 +24,9 @@
  *   return <Chart data={data} />;
  */
 
-import { useQuery, keepPreviousData } from '@tanstack/react-query';
-import type { UseQueryOptions } from '@tanstack/react-query';
+import { useEffect, useState } from 'react';
+import { useQuery, useQueryClient, keepPreviousData, hashKey } from '@tanstack/react-query';
+import type { QueryClient, QueryKey, UseQueryOptions } from '@tanstack/react-query';
 import { useFilters } from './useFilters';
 import {
   dashboardApi,
@@ -31,9 +34,12 @@ import {
   customerApi,
   operationsApi,
   forecastingApi,
+  streamApi,
 } from '../services/api';
 import type {
   DashboardSummary,
+  KPI,
+  KpiStreamEvent,
   RevenueTrend,
   CategoryData,
   ChannelData,
@@ -46,8 +52,44 @@ import type {
   ForecastDataPoint,
   ChurnRiskCustomer,
   Customer,
+  Series,
+  QuantileMetric,
+  QuantileGroup,
+  QuantileGrouping,
 } from '../types';
 
+/** Options for a hook whose query caches a Series and returns its rows */
+type SeriesQueryOptions<T> = Omit<UseQueryOptions<Series<T>, Error, T[]>, 'queryKey' | 'queryFn' | 'select'>;
+
+/**
+ * The cached copy of a series that a refetch can update with a delta request
+ * instead of downloading it again: the query's own data, or - when
+ * `extendable`, i.e. the key is [domain, name, start, end, ...params] and
+ * longer ranges only add buckets at the end - the copy with the same start
+ * and params and the latest earlier end, as left behind when the end date
+ * is moved forward.
+ */
+function previousSeries<T>(
+  queryClient: QueryClient,
+  queryKey: QueryKey,
+  extendable = false
+): Series<T> | undefined {
+  const own = queryClient.getQueryData<Series<T>>(queryKey);
+  if (own || !extendable) return own;
+
+  const end = queryKey[3] as string;
+  const params = hashKey(queryKey.slice(4));
+  let best: Series<T> | undefined;
+  let bestEnd = '';
+  for (const [key, data] of queryClient.getQueriesData<Series<T>>({ queryKey: queryKey.slice(0, 3) })) {
+    const candidateEnd = key[3] as string;
+    if (!data || candidateEnd >= end || candidateEnd <= bestEnd || hashKey(key.slice(4)) !== params) continue;
+    best = data;
+    bestEnd = candidateEnd;
+  }
+  return best;
+}
+
 // ============================================================================
 // Dashboard Hooks
 // ============================================================================
@@ -58,27 +100,125 @@ import type {
 export function useDashboardSummary(
   options?: Omit<UseQueryOptions<DashboardSummary>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['dashboard', 'summary', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => dashboardApi.getSummary(filters.dateRange),
+    queryKey: ['dashboard', 'summary', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => dashboardApi.getSummary(filters.dateRange, dimensions),
     staleTime: 30 * 1000, // 30 seconds for more responsive updates
     placeholderData: keepPreviousData,
     ...options,
   });
 }
 
+// How often the summary is refetched when the KPI stream is refused
+const KPI_POLL_FALLBACK_MS = 30 * 1000;
+
+/**
+ * A KPI with a pushed value. Its change and changePercent are recomputed
+ * against previousValue, rounded like the server's; KPIs without one (or with
+ * an empty previous period) keep the server's percentage.
+ */
+function withStreamedValue(kpi: KPI, value: number): KPI {
+  if (!kpi.previousValue) return { ...kpi, value };
+  const change = value - kpi.previousValue;
+  return { ...kpi, value, change, changePercent: Math.round((change / kpi.previousValue) * 1000) / 10 };
+}
+
+/**
+ * Keep the dashboard summary's KPI cards live: subscribes to /api/stream/kpis
+ * for the current filters and writes each pushed total into the cached
+ * summary, so new data shows up without refetching. The server computes each
+ * update once for everyone watching the same filters. When the server refuses
+ * the stream (503 at its per-worker limit) the summary is refetched every
+ * KPI_POLL_FALLBACK_MS instead. Returns the latest event.
+ */
+export function useKpiStream(enabled = true) {
+  const { filters, dimensions } = useFilters();
+  const queryClient = useQueryClient();
+  const [latest, setLatest] = useState<KpiStreamEvent | null>(null);
+  const url = streamApi.kpisUrl(filters.dateRange, dimensions);
+  const { startDate, endDate } = filters.dateRange;
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === 'undefined') return;
+
+    const summaryKey = ['dashboard', 'summary', startDate, endDate, dimensions];
+    let poll: ReturnType<typeof setInterval> | undefined;
+
+    // EventSource reconnects by itself when the server ends a stream
+    const source = new EventSource(url);
+    // ...but not after a non-200 response: it closes, and we poll instead
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && poll === undefined) {
+        poll = setInterval(
+          () => queryClient.invalidateQueries({ queryKey: summaryKey }),
+          KPI_POLL_FALLBACK_MS
+        );
+      }
+    };
+    source.addEventListener('kpis', (event) => {
+      const update: KpiStreamEvent = JSON.parse((event as MessageEvent<string>).data);
+      setLatest(update);
+
+      const { revenue, orders, activeCustomers, pipelineValue } = update.totals;
+      queryClient.setQueryData<DashboardSummary>(
+        summaryKey,
+        (summary) =>
+          summary && {
+            ...summary,
+            kpis: {
+              ...summary.kpis,
+              totalRevenue: withStreamedValue(summary.kpis.totalRevenue, revenue),
+              totalCustomers: withStreamedValue(summary.kpis.totalCustomers, activeCustomers),
+              avgOrderValue: withStreamedValue(
+                summary.kpis.avgOrderValue,
+                orders ? Math.round((revenue / orders) * 100) / 100 : 0
+              ),
+              pipelineValue: withStreamedValue(summary.kpis.pipelineValue, pipelineValue),
+            },
+          }
+      );
+    });
+
+    return () => {
+      source.close();
+      clearInterval(poll);
+    };
+  }, [url, enabled, queryClient, startDate, endDate, dimensions]);
+
+  return latest;
+}
+
 // Revenue hooks
+/**
+ * Revenue trend series. Refetches - and moving the end date forward - only
+ * download the buckets changed since the cached copy (see fetchSeries).
+ * With `maxPoints` the server downsamples longer series to that many points
+ * for charting; those are always fetched whole.
+ */
 export function useRevenueTrends(
   granularity: 'day' | 'week' | 'month' = 'day',
-  options?: Omit<UseQueryOptions<RevenueTrend[]>, 'queryKey' | 'queryFn'>
+  maxPoints?: number,
+  options?: SeriesQueryOptions<RevenueTrend>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
+  const queryClient = useQueryClient();
+  const queryKey = [
+    'revenue', 'trends', filters.dateRange.startDate, filters.dateRange.endDate, granularity, dimensions, maxPoints ?? null,
+  ];
 
   return useQuery({
-    queryKey: ['revenue', 'trends', filters.dateRange.startDate, filters.dateRange.endDate, granularity],
-    queryFn: () => revenueApi.getTrends(filters.dateRange, granularity),
+    queryKey,
+    queryFn: () =>
+      revenueApi.getTrends(
+        filters.dateRange,
+        granularity,
+        dimensions,
+        previousSeries<RevenueTrend>(queryClient, queryKey, true),
+        maxPoints
+      ),
+    select: (series) => series.rows,
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -88,11 +228,11 @@ export function useRevenueTrends(
 export function useRevenueByCategory(
   options?: Omit<UseQueryOptions<CategoryData[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['revenue', 'by-category', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => revenueApi.getByCategory(filters.dateRange),
+    queryKey: ['revenue', 'by-category', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => revenueApi.getByCategory(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -102,11 +242,11 @@ export function useRevenueByCategory(
 export function useRevenueByRegion(
   options?: Omit<UseQueryOptions<RegionData[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['revenue', 'by-region', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => revenueApi.getByRegion(filters.dateRange),
+    queryKey: ['revenue', 'by-region', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => revenueApi.getByRegion(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -116,11 +256,11 @@ export function useRevenueByRegion(
 export function useRevenueByChannel(
   options?: Omit<UseQueryOptions<ChannelData[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['revenue', 'by-channel', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => revenueApi.getByChannel(filters.dateRange),
+    queryKey: ['revenue', 'by-channel', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => revenueApi.getByChannel(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -131,11 +271,33 @@ export function useTopProducts(
   limit = 10,
   options?: Omit<UseQueryOptions<Product[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
+
+  return useQuery({
+    queryKey: ['revenue', 'top-products', filters.dateRange.startDate, filters.dateRange.endDate, limit, dimensions],
+    queryFn: () => revenueApi.getTopProducts(filters.dateRange, limit, dimensions),
+    staleTime: 30 * 1000,
+    placeholderData: keepPreviousData,
+    ...options,
+  });
+}
+
+/**
+ * Order value or deal size quantiles (default p50/p90/p99) for the current
+ * filters, optionally per month or dimension value. Served from mergeable
+ * daily sketches, so long ranges cost no more than short ones.
+ */
+export function useRevenueQuantiles(
+  metric: QuantileMetric = 'order_value',
+  by?: QuantileGrouping,
+  quantiles: number[] = [0.5, 0.9, 0.99],
+  options?: Omit<UseQueryOptions<QuantileGroup[]>, 'queryKey' | 'queryFn'>
+) {
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['revenue', 'top-products', filters.dateRange.startDate, filters.dateRange.endDate, limit],
-    queryFn: () => revenueApi.getTopProducts(filters.dateRange, limit),
+    queryKey: ['revenue', 'quantiles', filters.dateRange.startDate, filters.dateRange.endDate, metric, by, quantiles, dimensions],
+    queryFn: () => revenueApi.getQuantiles(filters.dateRange, metric, by, quantiles, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -158,11 +320,11 @@ export function useCustomerOverview(
     'queryKey' | 'queryFn'
   >
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['customers', 'overview', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => customerApi.getOverview(filters.dateRange),
+    queryKey: ['customers', 'overview', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => customerApi.getOverview(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -172,11 +334,11 @@ export function useCustomerOverview(
 export function useCustomerSegments(
   options?: Omit<UseQueryOptions<CustomerSegment[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['customers', 'segments', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => customerApi.getSegments(filters.dateRange),
+    queryKey: ['customers', 'segments', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => customerApi.getSegments(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -186,11 +348,11 @@ export function useCustomerSegments(
 export function useCustomerCohorts(
   options?: Omit<UseQueryOptions<CohortData[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['customers', 'cohorts', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => customerApi.getCohorts(filters.dateRange),
+    queryKey: ['customers', 'cohorts', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => customerApi.getCohorts(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -201,11 +363,11 @@ export function useAtRiskCustomers(
   limit = 10,
   options?: Omit<UseQueryOptions<Customer[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['customers', 'at-risk', limit, filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => customerApi.getAtRisk(limit, filters.dateRange),
+    queryKey: ['customers', 'at-risk', limit, filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => customerApi.getAtRisk(limit, filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -215,25 +377,38 @@ export function useAtRiskCustomers(
 export function useLifetimeValue(
   options?: Omit<UseQueryOptions<{ range: string; count: number; percentage: number }[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['customers', 'lifetime-value', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => customerApi.getLifetimeValue(filters.dateRange),
+    queryKey: ['customers', 'lifetime-value', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => customerApi.getLifetimeValue(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
   });
 }
 
+/**
+ * New customers per bucket and channel. Refetches only download the buckets
+ * changed since the cached copy; the bucket size follows the range length, so
+ * only the query's own copy is reused.
+ */
 export function useCustomerAcquisition(
-  options?: Omit<UseQueryOptions<{ date: string; channel: string; count: number }[]>, 'queryKey' | 'queryFn'>
+  options?: SeriesQueryOptions<{ date: string; channel: string; count: number }>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
+  const queryClient = useQueryClient();
+  const queryKey = ['customers', 'acquisition', filters.dateRange.startDate, filters.dateRange.endDate, dimensions];
 
   return useQuery({
-    queryKey: ['customers', 'acquisition', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => customerApi.getAcquisition(filters.dateRange),
+    queryKey,
+    queryFn: () =>
+      customerApi.getAcquisition(
+        filters.dateRange,
+        dimensions,
+        previousSeries<{ date: string; channel: string; count: number }>(queryClient, queryKey)
+      ),
+    select: (series) => series.rows,
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -244,11 +419,11 @@ export function useCustomerAcquisition(
 export function usePipeline(
   options?: Omit<UseQueryOptions<PipelineStage[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['operations', 'pipeline', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => operationsApi.getPipeline(filters.dateRange),
+    queryKey: ['operations', 'pipeline', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => operationsApi.getPipeline(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -258,11 +433,11 @@ export function usePipeline(
 export function useSalesPerformance(
   options?: Omit<UseQueryOptions<SalesRep[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['operations', 'sales-performance', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => operationsApi.getSalesPerformance(filters.dateRange),
+    queryKey: ['operations', 'sales-performance', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => operationsApi.getSalesPerformance(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -298,11 +473,11 @@ export function usePipelineKpis(
     'queryKey' | 'queryFn'
   >
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['operations', 'pipeline-kpis', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => operationsApi.getPipelineKpis(filters.dateRange),
+    queryKey: ['operations', 'pipeline-kpis', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => operationsApi.getPipelineKpis(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -312,11 +487,11 @@ export function usePipelineKpis(
 export function useDealSizeDistribution(
   options?: Omit<UseQueryOptions<{ bucket: string; count: number; value: number }[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['operations', 'deal-size-distribution', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => operationsApi.getDealSizeDistribution(filters.dateRange),
+    queryKey: ['operations', 'deal-size-distribution', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => operationsApi.getDealSizeDistribution(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -328,11 +503,11 @@ export function useRevenueForecast(
   periods = 6,
   options?: Omit<UseQueryOptions<ForecastDataPoint[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['forecasting', 'revenue', periods, filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => forecastingApi.getRevenueForecast(periods, filters.dateRange),
+    queryKey: ['forecasting', 'revenue', periods, filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => forecastingApi.getRevenueForecast(periods, filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -343,11 +518,11 @@ export function useChurnRisk(
   limit = 10,
   options?: Omit<UseQueryOptions<ChurnRiskCustomer[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['forecasting', 'churn-risk', limit, filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => forecastingApi.getChurnRisk(limit, filters.dateRange),
+    queryKey: ['forecasting', 'churn-risk', limit, filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => forecastingApi.getChurnRisk(limit, filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -357,11 +532,11 @@ export function useChurnRisk(
 export function useSeasonality(
   options?: Omit<UseQueryOptions<{ month: string; index: number; trend: number }[]>, 'queryKey' | 'queryFn'>
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['forecasting', 'seasonality', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => forecastingApi.getSeasonality(filters.dateRange),
+    queryKey: ['forecasting', 'seasonality', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => forecastingApi.getSeasonality(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -382,11 +557,11 @@ export function useForecastingKpis(
     'queryKey' | 'queryFn'
   >
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['forecasting', 'kpis', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => forecastingApi.getKpis(filters.dateRange),
+    queryKey: ['forecasting', 'kpis', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => forecastingApi.getKpis(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -429,11 +604,11 @@ export function useRevenueAtRisk(
     'queryKey' | 'queryFn'
   >
 ) {
-  const { filters } = useFilters();
+  const { filters, dimensions } = useFilters();
 
   return useQuery({
-    queryKey: ['forecasting', 'revenue-at-risk', filters.dateRange.startDate, filters.dateRange.endDate],
-    queryFn: () => forecastingApi.getRevenueAtRisk(filters.dateRange),
+    queryKey: ['forecasting', 'revenue-at-risk', filters.dateRange.startDate, filters.dateRange.endDate, dimensions],
+    queryFn: () => forecastingApi.getRevenueAtRisk(filters.dateRange, dimensions),
     staleTime: 30 * 1000,
     placeholderData: keepPreviousData,
     ...options,
@@ -1,8 +1,8 @@
 /* eslint-disable react-refresh/only-export-components */
-import { createContext, useContext, useState, useCallback } from 'react';
+import { createContext, useContext, useState, useCallback, useMemo } from 'react';
 import type { ReactNode } from 'react';
 import { subDays, subMonths, startOfYear, format } from 'date-fns';
-import type { DateRange, FilterState } from '../types';
+import type { DateRange, Dimension, DimensionFilters, FilterState } from '../types';
 
 type DatePreset = 'last7d' | 'last30d' | 'last90d' | 'ytd' | 'lastYear' | 'custom';
 
@@ -52,21 +52,44 @@ function getDateRangeFromPreset(preset: DatePreset): DateRange {
 
 interface FilterContextType {
   filters: FilterState;
+  /** Active dimension filters only, suitable for API calls and query keys */
+  dimensions: DimensionFilters;
   setDateRange: (range: DateRange) => void;
   setDatePreset: (preset: DatePreset) => void;
-  setRegion: (region: string | undefined) => void;
-  setSegment: (segment: string | undefined) => void;
-  setCategory: (category: string | undefined) => void;
+  setDimension: (dimension: Dimension, values: string[]) => void;
+  toggleDimensionValue: (dimension: Dimension, value: string) => void;
+  setRegion: (regions: string[]) => void;
+  setChannel: (channels: string[]) => void;
+  setSegment: (segments: string[]) => void;
+  setCategory: (categories: string[]) => void;
   resetFilters: () => void;
 }
 
+const DIMENSIONS: Dimension[] = ['region', 'channel', 'segment', 'category'];
+
+/**
+ * Pick the non-empty dimension filters in a fixed order with sorted values,
+ * so equivalent selections produce identical query keys and URLs.
+ */
+function activeDimensions(filters: FilterState): DimensionFilters {
+  const active: DimensionFilters = {};
+  for (const dimension of DIMENSIONS) {
+    const values = filters[dimension];
+    if (values && values.length > 0) {
+      active[dimension] = [...values].sort();
+    }
+  }
+  return active;
+}
+
 const FilterContext = createContext<FilterContextType | undefined>(undefined);
 
 const defaultFilters: FilterState = {
   dateRange: getDateRangeFromPreset('last90d'),
-  region: undefined,
-  segment: undefined,
-  category: undefined,
+  region: [],
+  channel: [],
+  segment: [],
+  category: [],
 };
 
 export function FilterProvider({ children }: { children: ReactNode }) {
@@ -83,17 +106,26 @@ export function FilterProvider({ children }: { children: ReactNode }) {
     }));
   }, []);
 
-  const setRegion = useCallback((region: string | undefined) => {
-    setFilters((prev) => ({ ...prev, region }));
+  const setDimension = useCallback((dimension: Dimension, values: string[]) => {
+    setFilters((prev) => ({ ...prev, [dimension]: Array.from(new Set(values)) }));
   }, []);
 
-  const setSegment = useCallback((segment: string | undefined) => {
-    setFilters((prev) => ({ ...prev, segment }));
+  const toggleDimensionValue = useCallback((dimension: Dimension, value: string) => {
+    setFilters((prev) => {
+      const current = prev[dimension] ?? [];
+      const next = current.includes(value)
+        ? current.filter((v) => v !== value)
+        : [...current, value];
+      return { ...prev, [dimension]: next };
+    });
   }, []);
 
-  const setCategory = useCallback((category: string | undefined) => {
-    setFilters((prev) => ({ ...prev, category }));
-  }, []);
+  const setRegion = useCallback((regions: string[]) => setDimension('region', regions), [setDimension]);
+  const setChannel = useCallback((channels: string[]) => setDimension('channel', channels), [setDimension]);
+  const setSegment = useCallback((segments: string[]) => setDimension('segment', segments), [setDimension]);
+  const setCategory = useCallback((categories: string[]) => setDimension('category', categories), [setDimension]);
+
+  const dimensions = useMemo(() => activeDimensions(filters), [filters]);
 
   const resetFilters = useCallback(() => {
     setFilters(defaultFilters);
@@ -103,9 +135,13 @@ export function FilterProvider({ children }: { children: ReactNode }) {
     <FilterContext.Provider
       value={{
         filters,
+        dimensions,
         setDateRange,
         setDatePreset,
+        setDimension,
+        toggleDimensionValue,
         setRegion,
+        setChannel,
         setSegment,
         setCategory,
         resetFilters,
@@ -10,6 +10,7 @@ import { DataTable } from '../components/tables/DataTable';
 import { formatCurrency } from '../utils/formatters';
 import {
   useDashboardSummary,
+  useKpiStream,
   useRevenueTrends,
   useRevenueByCategory,
   usePipeline,
@@ -17,6 +18,9 @@ import {
 } from '../hooks/useApi';
 import { useFilters } from '../hooks/useFilters';
 
+// Most points the revenue trend charts are sent (roughly one per few pixels of width)
+const CHART_MAX_POINTS = 200;
+
 // Determine appropriate granularity based on date range
 function getGranularity(preset?: string): 'day' | 'week' | 'month' {
   switch (preset) {
@@ -52,7 +56,10 @@ export function Dashboard() {
 
   // Fetch data from API
   const { data: summaryData, isLoading: summaryLoading } = useDashboardSummary();
-  const { data: revenueTrends, isLoading: trendsLoading } = useRevenueTrends(granularity);
+  // Pushes new KPI totals into the summary above as data is ingested
+  useKpiStream();
+  // Long daily ranges are downsampled server-side to what the chart can show
+  const { data: revenueTrends, isLoading: trendsLoading } = useRevenueTrends(granularity, CHART_MAX_POINTS);
   const { data: categoryData, isLoading: categoryLoading } = useRevenueByCategory();
   const { data: pipelineData, isLoading: pipelineLoading } = usePipeline();
   const { data: topProducts, isLoading: productsLoading } = useTopProducts(8);
@@ -4,14 +4,17 @@
  * Centralized API client for all backend communication. This module provides:
  * - Type-safe API functions organized by domain (dashboard, revenue, customers, etc.)
  * - Automatic error handling and JSON parsing
- * - Query string building for filter parameters
+ * - Query string building for date range and multi-valued dimension filters
+ * - Columnar and binary typed-column decoding for long time-series endpoints
+ * - Delta updates of cached time series (only the buckets changed since its data version)
+ * - Server-side downsampling of long time series to a chart's resolution (`maxPoints`)
  *
  * API Base URL:
  * - Development: Uses VITE_API_URL env var or defaults to '/api'
  * - Production: Relative '/api' path (same-origin with Flask backend)
  *
  * Usage Example:
- *   const data = await revenueApi.getTrends({ startDate: '2024-01-01', endDate: '2024-12-31' });
+ *   const { rows } = await revenueApi.getTrends({ startDate: '2024-01-01', endDate: '2024-12-31' });
  *
  * Error Handling:
  *   All functions throw on non-2xx responses with the error message from the server.
@@ -33,6 +36,13 @@ import type {
   ForecastDataPoint,
   ChurnRiskCustomer,
   DateRange,
+  DimensionFilters,
+  TransactionRecord,
+  QuantileMetric,
+  QuantileGroup,
+  QuantileGrouping,
+  Series,
+  SeriesDelta,
 } from '../types';
 
 /** Base URL for API requests - configurable via environment variable */
@@ -63,81 +73,285 @@ async function fetchApi<T>(endpoint: string, options?: RequestInit): Promise<T>
   return response.json();
 }
 
-function buildQueryString(params: Record<string, string | number | undefined>): string {
-  const filtered = Object.entries(params)
-    .filter(([, value]) => value !== undefined)
-    .map(([key, value]) => `${encodeURIComponent(key)}=${encodeURIComponent(String(value))}`);
+/** Column-oriented response shape returned by list endpoints for `format=columnar` */
+type Columnar<T> = { [K in keyof T]: T[K][] };
+
+/** Expand a columnar response back into row objects */
+function expandColumns<T extends object>(columns: Columnar<T>): T[] {
+  const keys = Object.keys(columns) as (keyof T)[];
+  const length = keys.length > 0 ? columns[keys[0]].length : 0;
+
+  const rows = new Array<T>(length);
+  for (let i = 0; i < length; i++) {
+    const row = {} as T;
+    for (const key of keys) {
+      row[key] = columns[key][i];
+    }
+    rows[i] = row;
+  }
+  return rows;
+}
+
+/** Media type of the binary typed-column format (see backend/app/binary.py) */
+const BINARY_COLUMNS_TYPE = 'application/vnd.analytics.columns';
+
+/** Response header carrying the data version of a series (see backend/app/deltas.py) */
+const DATA_VERSION_HEADER = 'X-Data-Version';
+
+/** Headers describing a downsampled series (see backend/app/downsample.py) */
+const TOTAL_POINTS_HEADER = 'X-Total-Points';
+const SERIES_TOTALS_HEADER = 'X-Series-Totals';
+
+const INT32_MIN = -2147483648;
+const MS_PER_DAY = 86400000;
+
+interface BinaryColumn {
+  name: string;
+  type: 'f64' | 'i32' | 'date32' | 'dict' | 'json';
+  offset: number;
+  length: number;
+  dictionary?: string[];
+  values?: unknown[];
+}
+
+/**
+ * Decode a binary typed-column body into column arrays. Numeric columns are
+ * read straight into typed arrays; dates and dictionary-encoded strings are
+ * turned back into the strings the JSON responses use.
+ */
+function decodeBinaryColumns(buffer: ArrayBuffer): Record<string, unknown[]> {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== 'ACOL' || view.getUint8(4) !== 1) {
+    throw new Error('Unsupported binary response format');
+  }
+  const headerLength = view.getUint32(8, true);
+  const header: { rows: number; columns: BinaryColumn[] } = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 16, headerLength)).replace(/\0+$/, '')
+  );
+
+  const columns: Record<string, unknown[]> = {};
+  for (const column of header.columns) {
+    const count = header.rows;
+    if (column.type === 'json') {
+      columns[column.name] = column.values ?? [];
+    } else if (column.type === 'f64') {
+      const values = new Float64Array(buffer, column.offset, count);
+      columns[column.name] = Array.from(values, (v) => (Number.isNaN(v) ? null : v));
+    } else if (column.type === 'i32') {
+      columns[column.name] = Array.from(new Int32Array(buffer, column.offset, count));
+    } else if (column.type === 'date32') {
+      const values = new Int32Array(buffer, column.offset, count);
+      columns[column.name] = Array.from(values, (v) =>
+        v === INT32_MIN ? null : new Date(v * MS_PER_DAY).toISOString().slice(0, 10)
+      );
+    } else {
+      const dictionary = column.dictionary ?? [];
+      const values = new Int32Array(buffer, column.offset, count);
+      columns[column.name] = Array.from(values, (v) => (v < 0 ? null : dictionary[v]));
+    }
+  }
+  return columns;
+}
+
+/**
+ * Fetch a list endpoint as binary typed columns and expand it into row
+ * objects, along with the data version the server reports for them (null if
+ * it doesn't) and, when downsampled, the full series' point count and totals.
+ * Servers (or proxies) that don't negotiate the binary format answer with
+ * columnar JSON instead, which is expanded the same way.
+ */
+async function fetchBinarySeries<T extends object>(endpoint: string): Promise<Series<T>> {
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const response = await fetch(`${API_BASE}${endpoint}${separator}format=columnar`, {
+    headers: { Accept: `${BINARY_COLUMNS_TYPE}, application/json;q=0.9` },
+  });
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({ message: 'An error occurred' }));
+    throw new Error(error.message || `HTTP error! status: ${response.status}`);
+  }
+
+  const versionHeader = response.headers.get(DATA_VERSION_HEADER);
+  const series: Omit<Series<T>, 'rows'> = { version: versionHeader === null ? null : Number(versionHeader) };
+  const totalPoints = response.headers.get(TOTAL_POINTS_HEADER);
+  if (totalPoints !== null) {
+    series.totalPoints = Number(totalPoints);
+  }
+  const totals = response.headers.get(SERIES_TOTALS_HEADER);
+  if (totals !== null) {
+    series.totals = JSON.parse(totals);
+  }
+
+  const contentType = response.headers.get('Content-Type') || '';
+  if (contentType.startsWith(BINARY_COLUMNS_TYPE)) {
+    return { rows: expandColumns(decodeBinaryColumns(await response.arrayBuffer()) as Columnar<T>), ...series };
+  }
+  return { rows: expandColumns<T>(await response.json()), ...series };
+}
+
+/** Fetch a list endpoint as binary typed columns, expanded into row objects */
+async function fetchBinaryRows<T extends object>(endpoint: string): Promise<T[]> {
+  return (await fetchBinarySeries<T>(endpoint)).rows;
+}
+
+/**
+ * Fetch a time series, bringing `previous` - a copy of the same series, or of
+ * the same series ending earlier - up to date rather than downloading it
+ * again. The server is sent the copy's data version and last bucket and
+ * answers with the buckets that may have changed since; the copy's rows from
+ * `replaceFrom` on are swapped for them. Without a usable copy - or with a
+ * downsampled one, whose points depend on the whole series - the whole series
+ * is fetched in binary.
+ */
+async function fetchSeries<T extends { date: string }>(endpoint: string, previous?: Series<T>): Promise<Series<T>> {
+  if (!previous || previous.version === null || previous.rows.length === 0 || previous.totalPoints !== undefined) {
+    return fetchBinarySeries<T>(endpoint);
+  }
+
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const since = buildQueryString({
+    since_version: previous.version,
+    since: previous.rows[previous.rows.length - 1].date,
+  });
+  const delta = await fetchApi<SeriesDelta<T>>(`${endpoint}${separator}${since.slice(1)}`);
+
+  if (delta.full) {
+    return { rows: delta.rows, version: delta.version };
+  }
+  const { replaceFrom } = delta;
+  const kept = replaceFrom === null ? previous.rows : previous.rows.filter((row) => row.date < replaceFrom);
+  return { rows: kept.concat(delta.rows), version: delta.version };
+}
+
+type QueryValue = string | number | string[] | undefined;
+
+/**
+ * Build a query string from parameters. Array values (dimension filters) are
+ * sent as repeated keys - `region=Europe&region=APAC` - and empty arrays are
+ * omitted like undefined values.
+ */
+function buildQueryString(params: Record<string, QueryValue>): string {
+  const filtered = Object.entries(params).flatMap(([key, value]) => {
+    if (value === undefined) return [];
+    const values = Array.isArray(value) ? value : [value];
+    return values.map((v) => `${encodeURIComponent(key)}=${encodeURIComponent(String(v))}`);
+  });
 
   return filtered.length > 0 ? `?${filtered.join('&')}` : '';
 }
 
 // Dashboard API
 export const dashboardApi = {
-  getSummary: (dateRange: DateRange) =>
+  getSummary: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<DashboardSummary>(
       `/dashboard/summary${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getKPIs: (dateRange: DateRange) =>
+  getKPIs: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<DashboardSummary['kpis']>(
       `/dashboard/kpis${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 };
 
 // Revenue API
 export const revenueApi = {
-  getTrends: (dateRange: DateRange, granularity: 'day' | 'week' | 'month' = 'day') =>
-    fetchApi<RevenueTrend[]>(
+  getTrends: (
+    dateRange: DateRange,
+    granularity: 'day' | 'week' | 'month' = 'day',
+    dimensions?: DimensionFilters,
+    previous?: Series<RevenueTrend>,
+    maxPoints?: number
+  ) =>
+    fetchSeries<RevenueTrend>(
       `/revenue/trends${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
         granularity,
-      })}`
+        max_points: maxPoints,
+        ...dimensions,
+      })}`,
+      previous
     ),
 
-  getByCategory: (dateRange: DateRange) =>
+  getByCategory: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<CategoryData[]>(
       `/revenue/by-category${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getByRegion: (dateRange: DateRange) =>
+  getByRegion: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<RegionData[]>(
       `/revenue/by-region${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getByChannel: (dateRange: DateRange) =>
+  getByChannel: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<ChannelData[]>(
       `/revenue/by-channel${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getTopProducts: (dateRange: DateRange, limit = 10) =>
+  getTopProducts: (dateRange: DateRange, limit = 10, dimensions?: DimensionFilters) =>
     fetchApi<Product[]>(
       `/revenue/top-products${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
         limit,
+        ...dimensions,
+      })}`
+    ),
+
+  getQuantiles: (
+    dateRange: DateRange,
+    metric: QuantileMetric = 'order_value',
+    by?: QuantileGrouping,
+    quantiles: number[] = [0.5, 0.9, 0.99],
+    dimensions?: DimensionFilters
+  ) =>
+    fetchApi<QuantileGroup[]>(
+      `/revenue/quantiles${buildQueryString({
+        start_date: dateRange.startDate,
+        end_date: dateRange.endDate,
+        metric,
+        by,
+        q: quantiles.join(','),
+        ...dimensions,
+      })}`
+    ),
+
+  getTransactions: (dateRange: DateRange, status?: string, limit = 10000, dimensions?: DimensionFilters) =>
+    fetchBinaryRows<TransactionRecord>(
+      `/revenue/transactions${buildQueryString({
+        start_date: dateRange.startDate,
+        end_date: dateRange.endDate,
+        status,
+        limit,
+        ...dimensions,
       })}`
     ),
 };
 
 // Customer API
 export const customerApi = {
-  getOverview: (dateRange: DateRange) =>
+  getOverview: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{
       total: number;
       totalChange: number;
@@ -151,60 +365,72 @@ export const customerApi = {
       `/customers/overview${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getSegments: (dateRange: DateRange) =>
+  getSegments: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<CustomerSegment[]>(
       `/customers/segments${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getCohorts: (dateRange: DateRange) =>
+  getCohorts: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<CohortData[]>(
       `/customers/cohorts${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getLifetimeValue: (dateRange?: DateRange) =>
+  getLifetimeValue: (dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{ range: string; count: number; percentage: number }[]>(
       `/customers/lifetime-value${buildQueryString({
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getAcquisition: (dateRange: DateRange) =>
-    fetchApi<{ date: string; channel: string; count: number }[]>(
+  getAcquisition: (
+    dateRange: DateRange,
+    dimensions?: DimensionFilters,
+    previous?: Series<{ date: string; channel: string; count: number }>
+  ) =>
+    fetchSeries<{ date: string; channel: string; count: number }>(
       `/customers/acquisition${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
-      })}`
+        ...dimensions,
+      })}`,
+      previous
     ),
 
-  getAtRisk: (limit = 10, dateRange?: DateRange) =>
+  getAtRisk: (limit = 10, dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<Customer[]>(`/customers/at-risk${buildQueryString({
       limit,
       start_date: dateRange?.startDate,
       end_date: dateRange?.endDate,
+      ...dimensions,
     })}`),
 };
 
 // Operations API
 export const operationsApi = {
-  getPipeline: (dateRange: DateRange) =>
+  getPipeline: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<PipelineStage[]>(
       `/operations/pipeline${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getPipelineKpis: (dateRange: DateRange) =>
+  getPipelineKpis: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{
       pipelineValue: number;
       pipelineChange: number;
@@ -218,20 +444,22 @@ export const operationsApi = {
       `/operations/pipeline-kpis${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getSalesPerformance: (dateRange: DateRange) =>
+  getSalesPerformance: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<SalesRep[]>(
       `/operations/sales-performance${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getConversionRates: () =>
+  getConversionRates: (dimensions?: DimensionFilters) =>
     fetchApi<{ fromStage: string; toStage: string; rate: number }[]>(
-      '/operations/conversion-rates'
+      `/operations/conversion-rates${buildQueryString({ ...dimensions })}`
     ),
 
   getCycleTime: (dateRange: DateRange) =>
@@ -241,57 +469,62 @@ export const operationsApi = {
       })}`
     ),
 
-  getDealSizeDistribution: (dateRange: DateRange) =>
+  getDealSizeDistribution: (dateRange: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{ bucket: string; count: number; value: number }[]>(
       `/operations/deal-size-distribution${buildQueryString({
         start_date: dateRange.startDate,
         end_date: dateRange.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getOpportunities: (stage?: string, limit = 20) =>
-    fetchApi<PipelineOpportunity[]>(
-      `/operations/opportunities${buildQueryString({ stage, limit })}`
+  getOpportunities: (stage?: string, limit = 20, dimensions?: DimensionFilters) =>
+    fetchBinaryRows<PipelineOpportunity>(
+      `/operations/opportunities${buildQueryString({ stage, limit, ...dimensions })}`
     ),
 };
 
 // Forecasting API
 export const forecastingApi = {
-  getRevenueForecast: (periods = 6, dateRange?: DateRange) =>
+  getRevenueForecast: (periods = 6, dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<ForecastDataPoint[]>(
       `/forecasting/revenue${buildQueryString({
         periods,
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getPipelineForecast: (dateRange?: DateRange) =>
+  getPipelineForecast: (dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{ month: string; weighted: number; best: number; worst: number }[]>(
       `/forecasting/pipeline${buildQueryString({
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getChurnRisk: (limit = 10, dateRange?: DateRange) =>
+  getChurnRisk: (limit = 10, dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<ChurnRiskCustomer[]>(
       `/forecasting/churn-risk${buildQueryString({
         limit,
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getSeasonality: (dateRange?: DateRange) =>
+  getSeasonality: (dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{ month: string; index: number; trend: number }[]>(
       `/forecasting/seasonality${buildQueryString({
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 
-  getKpis: (dateRange?: DateRange) =>
+  getKpis: (dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{
       predictedRevenue: number;
       predictedChange: number;
@@ -304,6 +537,7 @@ export const forecastingApi = {
       `/forecasting/kpis${buildQueryString({
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 
@@ -323,7 +557,7 @@ export const forecastingApi = {
       })}`
     ),
 
-  getRevenueAtRisk: (dateRange?: DateRange) =>
+  getRevenueAtRisk: (dateRange?: DateRange, dimensions?: DimensionFilters) =>
     fetchApi<{
       highRisk: { value: number; customers: number; label: string; threshold: string };
       mediumRisk: { value: number; customers: number; label: string; threshold: string };
@@ -333,10 +567,21 @@ export const forecastingApi = {
       `/forecasting/revenue-at-risk${buildQueryString({
         start_date: dateRange?.startDate,
         end_date: dateRange?.endDate,
+        ...dimensions,
       })}`
     ),
 };
 
+// Live updates (server-sent events, consumed with EventSource)
+export const streamApi = {
+  kpisUrl: (dateRange: DateRange, dimensions?: DimensionFilters) =>
+    `${API_BASE}/stream/kpis${buildQueryString({
+      start_date: dateRange.startDate,
+      end_date: dateRange.endDate,
+      ...dimensions,
+    })}`,
+};
+
 // Health check
 export const healthApi = {
   check: () => fetchApi<{ status: string; timestamp: string }>('/health'),
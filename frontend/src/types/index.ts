@@ -100,6 +100,40 @@ export interface RegionData {
   growth: number;
 }
 
+/** Single transaction row from the /revenue/transactions export */
+export interface TransactionRecord {
+  id: number;
+  transactionDate: string;
+  amount: number;
+  quantity: number;
+  productId: number;
+  customerId: number;
+  region: string;
+  channel: string;
+  status: string;
+}
+
+/** Sketched quantity for /revenue/quantiles */
+export type QuantileMetric = 'order_value' | 'deal_size';
+
+/**
+ * Grouping for /revenue/quantiles. Together with the dimension filters it may
+ * use one dimension; channel and category apply to order_value only.
+ */
+export type QuantileGrouping = 'month' | 'region' | 'channel' | 'segment' | 'category';
+
+/**
+ * Quantiles of one group ('all', a month 'YYYY-MM', or a dimension value)
+ * from /revenue/quantiles, keyed 'p50', 'p90', 'p99' etc. by quantile.
+ */
+export interface QuantileGroup {
+  group: string;
+  count: number;
+  min: number | null;
+  max: number | null;
+  [quantile: `p${string}`]: number | null;
+}
+
 // ============================================================================
 // Product Types
 // ============================================================================
@@ -256,6 +290,56 @@ export interface DashboardSummary {
   recentCustomers: Customer[];
 }
 
+// ============================================================================
+// Live KPI Stream Types
+// ============================================================================
+
+/** Headline totals pushed by /api/stream/kpis for the current filters */
+export interface KpiTotals {
+  revenue: number;
+  orders: number;
+  activeCustomers: number;
+  pipelineValue: number;
+}
+
+/**
+ * One `kpis` server-sent event. The first event of a connection is a
+ * 'snapshot' with no delta; later ones follow each data change.
+ */
+export interface KpiStreamEvent {
+  version: number;
+  source: 'snapshot' | 'ingest' | 'reseed' | 'incremental' | 'resync';
+  totals: KpiTotals;
+  delta: KpiTotals | null;
+}
+
+// ============================================================================
+// Series Delta Types
+// ============================================================================
+
+/**
+ * A time series with the data version it reflects (its X-Data-Version
+ * header). Downsampled series (`max_points`) also carry the number of points
+ * before sampling and totals over all of them.
+ */
+export interface Series<T> {
+  rows: T[];
+  version: number | null;
+  totalPoints?: number;
+  totals?: Record<string, number>;
+}
+
+/**
+ * Response of a series endpoint to a `since_version` request: the rows dated
+ * from `replaceFrom` on (none when null), or with `full` the whole series.
+ */
+export interface SeriesDelta<T> {
+  version: number;
+  full: boolean;
+  replaceFrom: string | null;
+  rows: T[];
+}
+
 // ============================================================================
 // Filter Types
 // ============================================================================
@@ -270,12 +354,22 @@ export interface DateRange {
   preset?: 'last7d' | 'last30d' | 'last90d' | 'ytd' | 'lastYear' | 'custom';
 }
 
+/**
+ * Multi-valued dimension filters pushed down to the API.
+ * An empty or missing list means "no filter" for that dimension.
+ */
+export interface DimensionFilters {
+  region?: string[];
+  channel?: string[];
+  segment?: string[];
+  category?: string[];
+}
+
+export type Dimension = keyof DimensionFilters;
+
 /** Global filter state shared across all dashboard pages */
-export interface FilterState {
+export interface FilterState extends DimensionFilters {
   dateRange: DateRange;
-  region?: string;
-  segment?: string;
-  category?: string;
 }
 
 // ============================================================================